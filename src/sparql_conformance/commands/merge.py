@@ -0,0 +1,50 @@
+import os
+
+from qlever.command import QleverCommand
+from qlever.log import log
+from sparql_conformance.runner import merge_runs
+
+
+class MergeCommand(QleverCommand):
+    """
+    Class for executing the `merge` command.
+    """
+
+    def __init__(self):
+        pass
+
+    def description(self) -> str:
+        return "Merge the result files of a sharded run into one result file"
+
+    def should_have_qleverfile(self) -> bool:
+        return False
+
+    def relevant_qleverfile_arguments(self) -> dict[str, list[str]]:
+        return {
+            "conformance": [
+                "name",
+                "results_dir",
+                "report",
+            ],
+        }
+
+    def additional_arguments(self, subparser):
+        subparser.add_argument(
+            "result_files",
+            type=str,
+            nargs="+",
+            help="The <name>.json.bz2 result file of every shard.",
+        )
+
+    def execute(self, args) -> bool:
+        for path in args.result_files:
+            if not os.path.isfile(path):
+                log.error(f"Result file not found: {path}")
+                return False
+        try:
+            merge_runs(args.result_files, args.name, args.results_dir,
+                       args.report)
+        except ValueError as error:
+            log.error(f"Cannot merge the result files: {error}")
+            return False
+        return True
@@ -0,0 +1,93 @@
+import functools
+from pathlib import Path
+
+from qlever.command import QleverCommand
+from qlever.log import log
+from sparql_conformance.config import Config
+from sparql_conformance.engines import ENGINE_TYPES, get_engine_manager
+from sparql_conformance.runner import assemble_suites, prebuild_suites
+from sparql_conformance.util import warn_if_missing_image
+
+
+class PrebuildCommand(QleverCommand):
+    """
+    Class for executing the `prebuild` command.
+    """
+
+    def __init__(self):
+        self.options = ENGINE_TYPES
+
+    def description(self) -> str:
+        return "Build the indexes of all test graphs into the index cache"
+
+    def should_have_qleverfile(self) -> bool:
+        return False
+
+    def relevant_qleverfile_arguments(self) -> dict[str, list[str]]:
+        return {
+            "conformance": [
+                "name",
+                "port",
+                "engine",
+                "graph_store",
+                "test_suites",
+                "exclude",
+                "include",
+                "binaries_directory",
+                "jobs",
+                "index_cache",
+            ],
+            "runtime": ["system"],
+            "qlever": ["qlever_image"],
+            "oxigraph": ["oxigraph_image"],
+            "blazegraph": ["blazegraph_image"],
+            "virtuoso": ["virtuoso_image"],
+            "graphdb": ["graphdb_image"],
+            "jena": ["jena_image"],
+            "mdb": ["mdb_image"],
+        }
+
+    def additional_arguments(self, subparser):
+        pass
+
+    def execute(self, args) -> bool:
+        if args.engine not in self.options:
+            log.error(f"Invalid engine type: {args.engine}")
+            return False
+        if not args.index_cache:
+            log.error("The prebuild command requires --index-cache")
+            return False
+        image = getattr(args, f"{args.engine}_image", None)
+        if (args.system == "native" and args.binaries_directory == "" or
+                args.system != "native" and image is None and args.engine != "blazegraph"):
+            log.error(
+                f"Selected system {args.system} not compatible with image: {image}"
+                f" and binaries_directory: {args.binaries_directory}"
+            )
+            return False
+
+        warn_if_missing_image(args.system, image, args.engine)
+
+        active_suites = assemble_suites(args.test_suites)
+
+        for suite_name, d in active_suites:
+            if not Path(d).is_dir():
+                log.error(
+                    f"Test suite {suite_name!r} directory not found: {d}. "
+                    "Use `sparql_conformance setup` to download it."
+                )
+                return False
+
+        def make_config(suite_dir):
+            return Config(image, args.system, args.port, args.graph_store,
+                          suite_dir, [], args.binaries_directory,
+                          args.exclude, args.include, run_id=args.name)
+
+        return prebuild_suites(
+            active_suites,
+            make_config,
+            functools.partial(get_engine_manager, args.engine),
+            name=args.name,
+            index_cache=args.index_cache,
+            jobs=args.jobs,
+        )
@@ -1,3 +1,4 @@
+import functools
 from pathlib import Path
 
 from qlever.command import QleverCommand
@@ -37,6 +38,19 @@ class TestCommand(QleverCommand):
                 "results_dir",
                 "report",
                 "compare_to",
+                "jobs",
+                "index_cache",
+                "expectation_cache",
+                "hot_swap",
+                "resume",
+                "changed_only",
+                "shard",
+                "request_concurrency",
+                "timeout",
+                "comparison_budget",
+                "compact_passing",
+                "pipeline",
+                "durations_from",
             ],
             "runtime": ["system"],
             "qlever": ["qlever_image"],
@@ -86,10 +100,23 @@ class TestCommand(QleverCommand):
         run_suites(
             active_suites,
             make_config,
-            lambda: get_engine_manager(args.engine),
+            functools.partial(get_engine_manager, args.engine),
             name=args.name,
             results_dir=args.results_dir,
             report_mode=args.report,
             compare_to=args.compare_to,
+            jobs=args.jobs,
+            index_cache=args.index_cache,
+            hot_swap=args.hot_swap,
+            resume=args.resume,
+            changed_only=args.changed_only,
+            shard=args.shard,
+            request_concurrency=args.request_concurrency,
+            timeout_policy=args.timeout,
+            comparison_budget=args.comparison_budget,
+            compact_passing=args.compact_passing,
+            pipeline=args.pipeline,
+            durations_from=args.durations_from,
+            expectation_cache=args.expectation_cache,
         )
         return True
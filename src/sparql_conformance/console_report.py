@@ -12,6 +12,7 @@ unless NO_COLOR is set.
 """
 
 import bz2
+import io
 import json
 import os
 import sys
@@ -118,6 +119,13 @@ def read_json_bz2(path: str) -> dict:
         return json.load(raw_file)
 
 
+def write_json_bz2(data: dict, path: str) -> None:
+    """Write a results file in the format read_json_bz2 loads."""
+    with bz2.BZ2File(path, "w") as raw_file:
+        with io.TextIOWrapper(raw_file, encoding="utf-8") as zipfile:
+            json.dump(data, zipfile, indent=4)
+
+
 def compare_runs(baseline: dict, current: dict) -> dict:
     """Diff two v2 result documents by per-test status.
 
@@ -0,0 +1,42 @@
+"""Send the requests of a graph group to the running engine concurrently.
+
+The tests of a read-only session only read the data, so their requests do not
+depend on each other. ``dispatch`` sends them from a pool of threads around the
+blocking ``EngineManager.query``/``update`` calls and yields the responses in
+the order of the requests, so every response is evaluated for the right
+``TestObject`` and tests are reported in the same order as a sequential run.
+
+Only engines whose ``supports_concurrent_requests`` returns True are sent
+concurrent requests (``--request-concurrency``).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Tuple
+
+Response = Tuple[int, str]
+
+
+def dispatch(
+        requests: List[Callable[[], Response]],
+        concurrency: int) -> Iterator[Response]:
+    """
+    Call every request on up to `concurrency` threads.
+
+    Yields the responses in the order of `requests` as soon as they are
+    available. With a concurrency of 1 the requests are sent one by one from
+    the calling thread.
+    """
+    if concurrency <= 1 or len(requests) <= 1:
+        for request in requests:
+            yield request()
+        return
+    executor = ThreadPoolExecutor(
+        max_workers=min(concurrency, len(requests)),
+        thread_name_prefix="sparql-request",
+    )
+    try:
+        yield from executor.map(lambda request: request(), requests)
+    finally:
+        # Also reached when the consumer stops early (e.g. Ctrl-C): do not
+        # send the requests that have not started yet.
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -1,19 +1,20 @@
 import os
-import shlex
 import shutil
 from pathlib import Path
 from typing import List, Tuple
-from urllib.parse import quote, urlparse
+from urllib.parse import urlparse
 
 from qblazegraph.commands.index import IndexCommand
 from qblazegraph.commands.start import StartCommand
 from qblazegraph.commands.stop import StopCommand
-from qlever.commands.query import QueryCommand
 from qlever.log import mute_log
-from qlever.util import run_command
 from sparql_conformance.config import Config
 from sparql_conformance.engines.engine_manager import EngineManager
-from sparql_conformance.rdf_tools import rdf_xml_to_turtle, replace_empty_base_iri
+from sparql_conformance.graph_snapshot import SnapshotReset
+from sparql_conformance.lifecycle import remove_paths
+from sparql_conformance.rdf_tools import replace_empty_base_iri, stage_rdf_xml_as_turtle
+from sparql_conformance.graph_loader import GraphSource, upload_graphs
+from sparql_conformance.sparql_client import client_for
 import sparql_conformance.util as conformance_util
 
 
@@ -35,7 +36,7 @@ def _copy_graph_to_workdir(file_path: str, workdir: str) -> str:
     )
 
 
-class BlazegraphManager(EngineManager):
+class BlazegraphManager(SnapshotReset, EngineManager):
     """Manager for Blazegraph using qblazegraph commands."""
 
     _CONFORMANCE_RWSTORE_TEMPLATE = "RWStore.conformance.properties"
@@ -83,23 +84,17 @@ class BlazegraphManager(EngineManager):
             server_success, server_log = self._start_server(config)
             return index_success, server_success, index_log, server_log
 
-        graph_files, cleanup_paths = self._prepare_graphs_for_http_load(
-            graph_paths
-        )
         index_success, index_log = self._index_empty_journal(config)
         if not index_success:
-            self._cleanup_graph_copies(cleanup_paths)
             return index_success, server_success, index_log, ""
 
         server_success, server_log = self._start_server(config)
         if not server_success:
-            self._cleanup_graph_copies(cleanup_paths)
             return index_success, server_success, index_log, server_log
 
         load_success, load_log = self._load_graphs_over_http(
-            config, graph_files
+            config, graph_paths
         )
-        self._cleanup_graph_copies(cleanup_paths)
         if not load_success:
             combined_log = f"{server_log}\n\n{load_log}".strip()
             return index_success, False, index_log, combined_log
@@ -107,15 +102,92 @@ class BlazegraphManager(EngineManager):
         combined_log = f"{server_log}\n\n{load_log}".strip()
         return index_success, server_success, index_log, combined_log
 
+    def build_index(
+        self,
+        config: Config,
+        graph_paths: Tuple[Tuple[str, str], ...],
+    ) -> Tuple[bool, str]:
+        """
+        Build blazegraph.jnl for the graphs without leaving a server running.
+
+        In quads mode the graphs can only be loaded over HTTP, so the server
+        is started on an empty journal, loaded and stopped again; the journal
+        then holds the complete index.
+        """
+        try:
+            self._ensure_rwstore_properties(graph_paths)
+        except Exception as e:
+            return False, str(e)
+
+        if not self._requires_quads_mode(graph_paths):
+            graph_files, cleanup_paths = self._prepare_graphs_for_index(
+                graph_paths
+            )
+            index_success, index_log = self._index(config, graph_files)
+            self._cleanup_graph_copies(cleanup_paths)
+            return index_success, index_log
+
+        index_success, index_log = self._index_empty_journal(config)
+        if not index_success:
+            return index_success, index_log
+        server_success, server_log = self._start_server(config)
+        if not server_success:
+            return False, f"{index_log}\n\n{server_log}".strip()
+        load_success, load_log = self._load_graphs_over_http(
+            config, graph_paths
+        )
+        self._stop_server(config)
+        return load_success, f"{index_log}\n\n{load_log}".strip()
+
+    def start_server(
+        self,
+        config: Config,
+        graph_paths: Tuple[Tuple[str, str], ...],
+    ) -> Tuple[bool, str]:
+        self._quads_mode = self._requires_quads_mode(graph_paths)
+        try:
+            self._ensure_rwstore_properties(graph_paths)
+        except Exception as e:
+            return False, str(e)
+        return self._start_server(config)
+
+    def load_dataset(
+        self,
+        config: Config,
+        graph_paths: Tuple[Tuple[str, str], ...],
+    ) -> bool:
+        """
+        Replace the data of the running server: DROP ALL, then one upload.
+
+        The journal is created in triples or quads mode and keeps it, so a
+        group that needs the other mode falls back to a restart.
+        """
+        if self._requires_quads_mode(graph_paths) != self._quads_mode:
+            return False
+        status, _ = self.update(config, "DROP ALL")
+        if status >= 400:
+            return False
+        if not graph_paths:
+            return True
+        load_success, _ = self._load_graphs_over_http(config, graph_paths)
+        return load_success
+
+    def index_artifacts(self, config: Config) -> List[str]:
+        return ["blazegraph.jnl"]
+
+    def engine_identity(self, config: Config) -> str:
+        return conformance_util.engine_identity(config, "blazegraph.jar")
+
     def cleanup(self, config: Config):
         self._stop_server(config)
-        with mute_log():
-            run_command(
-                f"rm -f blazegraph.jnl "
-                f"{config.run_id}.index-log.txt "
-                f"{config.run_id}.server-log.txt "
-                f"web.xml {config.run_id}.web.xml"
-            )
+        remove_paths(
+            "blazegraph.jnl",
+            f"{config.run_id}.index-log.txt",
+            f"{config.run_id}.server-log.txt",
+            "web.xml",
+            f"{config.run_id}.web.xml",
+            files_only=True,
+        )
 
     def query(
         self,
@@ -135,26 +207,11 @@ class BlazegraphManager(EngineManager):
         content_type: str,
         result_format: str,
     ) -> Tuple[int, str]:
-        args = _make_args(
-            config,
-            accept=_get_accept_header(result_format),
-            query=query,
-            content_type=content_type,
-            sparql_endpoint=(
-                f"{config.server_address}:{config.port}"
-                "/blazegraph/namespace/kb/sparql"
-            ),
-        )
-        try:
-            with mute_log():
-                qc = QueryCommand()
-                qc.execute(args, True)
-                query_output = str(qc.query_output)
-                body, _, status_line = query_output.rpartition("HTTP_STATUS:")
-                status = int(status_line.strip())
-            return status, body
-        except Exception as e:
-            return 1, str(e)
+        client = client_for(f"{config.server_address}:{config.port}")
+        endpoint = "blazegraph/namespace/kb/sparql"
+        if content_type == "update=":
+            return client.update(query, endpoint)
+        return client.query(query, _get_accept_header(result_format), endpoint)
 
     def _index(
         self,
@@ -255,10 +312,7 @@ class BlazegraphManager(EngineManager):
             src = Path(graph_path).resolve()
             if src.suffix == ".rdf":
                 generated_name = f"{src.stem}.{i}.ttl"
-                turtle_data = rdf_xml_to_turtle(str(src), graph_name)
-                (workdir / generated_name).write_text(
-                    turtle_data, encoding="utf-8"
-                )
+                stage_rdf_xml_as_turtle(str(src), graph_name, workdir / generated_name)
                 graph_files.append(generated_name)
                 cleanup_paths.append(workdir / generated_name)
                 continue
@@ -276,100 +330,43 @@ class BlazegraphManager(EngineManager):
             cleanup_paths.append(workdir / src.name)
         return graph_files, cleanup_paths
 
-    def _prepare_graphs_for_http_load(
+    def _load_graphs_over_http(
         self,
+        config: Config,
         graph_paths: Tuple[Tuple[str, str], ...],
-    ) -> Tuple[List[Tuple[Path, str]], List[Path]]:
-        workdir = Path(os.getcwd()).resolve()
-        cwd_uri = workdir.as_uri() + "/"
+    ) -> Tuple[bool, str]:
+        """Load the graphs into the running server as one N-Quads upload."""
+        cwd_uri = Path(os.getcwd()).resolve().as_uri() + "/"
         file_to_named_uri: dict[str, str] = {}
         for gp, gn in graph_paths:
-            if gn and gn not in ("-", ""):
-                fname = Path(gp).resolve().name
-                file_to_named_uri[fname] = gn
-        graph_files: List[Tuple[Path, str]] = []
-        cleanup_paths: List[Path] = []
-        for i, (graph_path, graph_name) in enumerate(graph_paths):
+            named_uri = self._normalize_graph_name(gn, Path(gp))
+            if named_uri is not None:
+                file_to_named_uri[Path(gp).resolve().name] = named_uri
+        sources: List[GraphSource] = []
+        for graph_path, graph_name in graph_paths:
             src = Path(graph_path).resolve()
-            if src.suffix == ".rdf":
-                generated_path = workdir / f"{src.stem}.{i}.ttl"
-                turtle_data = rdf_xml_to_turtle(str(src), graph_name)
-                generated_path.write_text(turtle_data, encoding="utf-8")
-                graph_files.append((generated_path, graph_name))
-                cleanup_paths.append(generated_path)
-                continue
-            is_default = graph_name in ("-", "", None)
-            if is_default:
-                replacement = file_to_named_uri.get(src.name, cwd_uri)
-                temp_name, temp_path = replace_empty_base_iri(src, workdir, replacement, "blazegraph")
-                if temp_path is not None:
-                    graph_files.append((temp_path, graph_name))
-                    cleanup_paths.append(temp_path)
-                    continue
-            graph_files.append((src, graph_name))
-        return graph_files, cleanup_paths
-
-    def _load_graphs_over_http(
-        self,
-        config: Config,
-        graph_files: List[Tuple[Path, str]],
-    ) -> Tuple[bool, str]:
-        endpoint = (
-            f"http://{config.server_address}:{config.port}"
-            "/blazegraph/namespace/kb/sparql"
+            named_uri = self._normalize_graph_name(graph_name, src)
+            if named_uri is not None:
+                sources.append(GraphSource(str(src), named_uri, named_uri))
+            else:
+                base = file_to_named_uri.get(src.name, cwd_uri)
+                sources.append(GraphSource(str(src), None, base))
+
+        client = client_for(f"{config.server_address}:{config.port}")
+        endpoint = "blazegraph/namespace/kb/sparql"
+
+        def send_graph(graph, body, content_type):
+            params = {"context-uri": graph} if graph else None
+            return client.send_graph("POST", endpoint, body, content_type, params)
+
+        def send_dataset(body, content_type):
+            return client.send_graph("POST", endpoint, body, content_type)
+
+        # Only a quads mode journal stores named graphs.
+        quads_mode = self._requires_quads_mode(graph_paths)
+        return upload_graphs(
+            sources, send_graph, send_dataset if quads_mode else None
         )
-        load_logs: List[str] = []
-        for graph_path, graph_name in graph_files:
-            content_type = self._get_rdf_content_type(graph_path)
-            normalized_graph_name = self._normalize_graph_name(
-                graph_name, graph_path
-            )
-            url = endpoint
-            if normalized_graph_name is not None:
-                url = (
-                    f"{endpoint}?context-uri="
-                    f"{quote(normalized_graph_name, safe='')}"
-                )
-            curl_cmd = (
-                f'curl -sS -X POST "{url}" '
-                f'-H "Content-Type: {content_type}" '
-                f'--data-binary @{shlex.quote(str(graph_path))} '
-                f'-w "HTTP_STATUS:%{{http_code}}"'
-            )
-            try:
-                response = run_command(curl_cmd, return_output=True)
-            except Exception as e:
-                load_logs.append(
-                    f"LOAD_FAIL path={graph_path} "
-                    f"graph={normalized_graph_name}: {e}"
-                )
-                return False, "\n".join(load_logs)
-
-            body, _, status_line = response.rpartition("HTTP_STATUS:")
-            status_line = status_line.strip()
-            status = int(status_line) if status_line.isdigit() else 0
-            load_logs.append(
-                f"LOAD path={graph_path.name} "
-                f"graph={normalized_graph_name or '-'} status={status}"
-            )
-            if not 200 <= status < 300:
-                load_logs.append(body.strip())
-                return False, "\n".join(load_logs)
-
-        return True, "\n".join(load_logs)
-
-    @staticmethod
-    def _get_rdf_content_type(graph_path: Path) -> str:
-        suffix = graph_path.suffix.lower()
-        mapping = {
-            ".ttl": "text/turtle",
-            ".nt": "application/n-triples",
-            ".nq": "application/n-quads",
-            ".trig": "application/trig",
-            ".rdf": "application/rdf+xml",
-            ".xml": "application/rdf+xml",
-        }
-        return mapping.get(suffix, "text/turtle")
 
     @staticmethod
     def _normalize_graph_name(graph_name: str, graph_path: Path) -> str | None:
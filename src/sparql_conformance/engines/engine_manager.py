@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
 import re
-from typing import Set, Tuple
+from typing import List, Optional, Set, Tuple
 
 from sparql_conformance.config import Config
+from sparql_conformance.graph_snapshot import GraphSnapshot
 from sparql_conformance.util import read_file
 
 
@@ -41,6 +42,95 @@ class EngineManager(ABC):
         """
         pass
 
+    def build_index(
+            self,
+            config: Config,
+            graph_paths: Tuple[Tuple[str, str], ...],
+    ) -> Tuple[bool, str]:
+        """
+        Build the index for the given graphs in the working directory without
+        starting a server.
+
+        Together with start_server and index_artifacts this is the optional
+        interface of the on-disk index cache (see index_cache.py): an engine
+        that overrides all three can have its index files stored after a
+        build and restored instead of rebuilt. The same hooks let the harness
+        reset mutating test groups from an index snapshot (see
+        index_snapshot.py). When the server is stopped after build_index, the
+        files named by index_artifacts must be the complete index.
+
+        Returns:
+            index_success (bool), index_log (str)
+        """
+        raise NotImplementedError
+
+    def start_server(
+            self,
+            config: Config,
+            graph_paths: Tuple[Tuple[str, str], ...],
+    ) -> Tuple[bool, str]:
+        """
+        Start the server on an index that is already in the working directory,
+        either freshly built by build_index or restored from the index cache.
+
+        Returns:
+            server_success (bool), server_log (str)
+        """
+        raise NotImplementedError
+
+    def index_artifacts(self, config: Config) -> List[str]:
+        """
+        Return the files and directories (relative to the working directory)
+        that make up the index written by build_index. Default: none.
+        """
+        return []
+
+    def engine_identity(self, config: Config) -> str:
+        """
+        Return a string identifying the engine build (binary or container
+        image) used for config. It is part of the index cache key, so a new
+        engine version never reuses indexes of an old one. Default: "".
+        """
+        return ""
+
+    def version(self, config: Config) -> str:
+        """
+        Return a string identifying the engine build, for the test
+        fingerprints of --changed-only (see fingerprint.py). Tests are only
+        taken from a baseline run if it reported the same version. "" means
+        unknown, and --changed-only then runs all tests. Default:
+        engine_identity.
+        """
+        return self.engine_identity(config)
+
+    def supports_index_cache(self) -> bool:
+        """Return whether this engine implements build_index and start_server."""
+        cls = type(self)
+        return (
+            cls.build_index is not EngineManager.build_index
+            and cls.start_server is not EngineManager.start_server
+        )
+
+    def index_files_immutable(self) -> bool:
+        """
+        Return whether the running server never writes to the files named by
+        index_artifacts. Index snapshots of such engines are hard links where
+        reflinks are not available. Default: False.
+        """
+        return False
+
+    def resets_in_place(self) -> bool:
+        """Return whether this engine overrides reset_graphs."""
+        return type(self).reset_graphs is not EngineManager.reset_graphs
+
+    def supports_concurrent_requests(self) -> bool:
+        """
+        Return whether query and update may be called from several threads
+        at once. With --request-concurrency N, the requests of read-only
+        tests are then sent N at a time (see dispatch.py). Default: False.
+        """
+        return False
+
     @abstractmethod
     def cleanup(self, config: Config):
         """Clean up the test environment after testing"""
@@ -125,14 +215,61 @@ class EngineManager(ABC):
         test starts from a known clean state.  The default performs a full
         teardown + setup (always correct).  Engines that support a cheaper
         in-place reset (e.g. CLEAR ALL + HTTP re-upload) should override this
-        to avoid repeated server startups.
+        to avoid repeated server startups. If the engine has an index snapshot
+        (see index_snapshot.py), the harness restores that instead of calling
+        the default.
 
-        Returns True on success, False if the engine could not be reset.
+        Returns True on success, False if the engine could not be reset; the
+        harness then restarts the engine.
         """
         self.cleanup(config)
         ok_i, ok_s, _, _ = self.setup(config, graph_paths)
         return ok_i and ok_s
 
+    def snapshot_initial_state(
+        self,
+        config: Config,
+        graph_paths: Tuple[Tuple[str, str], ...],
+    ):
+        """Record the initial graphs of a group whose tests modify the data.
+
+        Called once right after setup for update, protocol and graph store
+        groups, before the first test. Engines that reset in place remember
+        what reset_graphs has to restore here; the built-in managers capture
+        a GraphSnapshot. Default is a no-op.
+        """
+        pass
+
+    def graph_state(self, config: Config) -> Optional[str]:
+        """Return a fingerprint of all data of the running server.
+
+        The harness compares it before the first test and after every
+        reset_graphs, and restarts the engine if a reset did not restore the
+        initial state. The default queries every graph (see
+        graph_snapshot.py); None means the state could not be determined and
+        is not checked.
+        """
+        snapshot = GraphSnapshot.capture(self, config)
+        return snapshot.fingerprint() if snapshot is not None else None
+
+    def load_dataset(
+        self,
+        config: Config,
+        graph_paths: Tuple[Tuple[str, str], ...],
+    ) -> bool:
+        """Replace all data of the running server with the given graphs.
+
+        Used by the hot-swap mode (--hot-swap): the server is started once and
+        the dataset is swapped in place between read-only graph groups
+        instead of a cleanup + setup per group. Engines that can clear and
+        reload their data over SPARQL Update or the Graph Store Protocol
+        should override this.
+
+        Returns True if the server now holds exactly the given graphs. The
+        default returns False, and the harness falls back to a restart.
+        """
+        return False
+
     def supported_graphstore_features(self) -> Set[str]:
         """
         Return the Graph Store Protocol features this engine supports.
@@ -2,24 +2,25 @@ from __future__ import annotations
 
 import re
 import os
-import urllib.parse
 from pathlib import Path
 
 import rdflib
 
 from qgraphdb.commands.index import IndexCommand
-from qgraphdb.commands.query import QueryCommand
 from qgraphdb.commands.start import StartCommand
 from qgraphdb.commands.stop import StopCommand
 from qlever.log import mute_log
-from qlever.util import run_command, run_curl_command
+from qlever.util import run_curl_command
 import sparql_conformance.util as conformance_util
 from sparql_conformance.config import Config
 from sparql_conformance.engines.engine_manager import (
     EngineManager,
     has_uri_scheme,
 )
-from sparql_conformance.rdf_tools import rdf_xml_to_turtle, write_ttl_file, replace_empty_base_iri
+from sparql_conformance.rdf_tools import rdf_xml_to_turtle, write_ttl_file, replace_empty_base_iri, turtle_to_trig
+from sparql_conformance.graph_loader import GraphSource, upload_graphs
+from sparql_conformance.lifecycle import remove_paths
+from sparql_conformance.sparql_client import client_for
 
 
 GRAPHDB_CONFIG_TTL_URL = (
@@ -49,13 +50,7 @@ def _copy_graph_to_workdir(file_path: str, workdir: str) -> str:
 
 
 def _graph_to_trig(turtle_data: str, graph_name: str) -> str:
-    graph = rdflib.Graph()
-    graph.parse(data=turtle_data, format="turtle", publicID=graph_name)
-    dataset = rdflib.ConjunctiveGraph()
-    context = dataset.get_context(rdflib.URIRef(graph_name))
-    for triple in graph:
-        context.add(triple)
-    return str(dataset.serialize(format="trig"))
+    return turtle_to_trig(turtle_data, graph_name, public_id=graph_name)
 
 
 def _ensure_base_iri(query: str) -> str:
@@ -136,12 +131,11 @@ class GraphdbManager(EngineManager):
 
     def cleanup(self, config: Config):
         self._stop_server(config)
-        with mute_log():
-            run_command(
-                f"rm -rf {config.run_id}_index "
-                f"{config.run_id}.index-log.txt "
-                f"{config.run_id}.server-log.txt"
-            )
+        remove_paths(
+            f"{config.run_id}_index",
+            f"{config.run_id}.index-log.txt",
+            f"{config.run_id}.server-log.txt",
+        )
 
     def reset_graphs(
         self,
@@ -149,11 +143,21 @@ class GraphdbManager(EngineManager):
         graph_paths: tuple[tuple[str, str], ...],
     ) -> bool:
         """Clear all graphs and reload initial data via HTTP without restarting GraphDB."""
+        if self.load_dataset(config, graph_paths):
+            return True
+        self.cleanup(config)
+        ok_i, ok_s, _, _ = self.setup(config, graph_paths)
+        return ok_i and ok_s
+
+    def load_dataset(
+        self,
+        config: Config,
+        graph_paths: tuple[tuple[str, str], ...],
+    ) -> bool:
+        """Replace the data of the GraphDB repository: CLEAR ALL, then one N-Quads upload."""
         status, _ = self.update(config, "CLEAR ALL")
         if status >= 400:
-            self.cleanup(config)
-            ok_i, ok_s, _, _ = self.setup(config, graph_paths)
-            return ok_i and ok_s
+            return False
 
         if not graph_paths:
             return True
@@ -167,49 +171,32 @@ class GraphdbManager(EngineManager):
                 abs_gn = gn if has_uri_scheme(gn) else DEFAULT_BASE_IRI + fname
                 file_to_named_uri[fname] = abs_gn
 
-        base_data_url = (
-            f"http://{config.server_address}:{config.port}"
-            f"/repositories/{config.run_id}/rdf-graphs/service"
-        )
-        tmp_file = workdir / "_graphdb_reset_tmp.ttl"
-        try:
-            for graph_path, graph_name in graph_paths:
-                src = Path(graph_path).resolve()
-                is_named = graph_name not in ("-", "", None)
-                if src.suffix == ".rdf":
-                    abs_name = graph_name if has_uri_scheme(graph_name) else DEFAULT_BASE_IRI + src.name
-                    turtle_data = rdf_xml_to_turtle(str(src), abs_name)
-                elif is_named:
-                    turtle_data = src.read_text(encoding="utf-8")
-                else:
-                    replacement = file_to_named_uri.get(src.name, cwd_uri)
-                    temp_name, temp_path = replace_empty_base_iri(
-                        src, workdir, replacement, "graphdb"
-                    )
-                    if temp_path is not None:
-                        turtle_data = temp_path.read_text(encoding="utf-8")
-                        temp_path.unlink()
-                    else:
-                        turtle_data = src.read_text(encoding="utf-8")
-
-                if is_named:
-                    abs_name = graph_name if has_uri_scheme(graph_name) else DEFAULT_BASE_IRI + src.name
-                    encoded = urllib.parse.quote(abs_name, safe="")
-                    target_url = f"{base_data_url}?graph={encoded}"
-                else:
-                    target_url = f"{base_data_url}?default"
-
-                tmp_file.write_text(turtle_data, encoding="utf-8")
-                with mute_log():
-                    run_command(
-                        f'curl -s -X PUT "{target_url}"'
-                        f' -H "Content-Type: text/turtle"'
-                        f' --data-binary @"{tmp_file}"'
-                    )
-        finally:
-            if tmp_file.exists():
-                tmp_file.unlink()
-        return True
+        sources: list[GraphSource] = []
+        for graph_path, graph_name in graph_paths:
+            src = Path(graph_path).resolve()
+            if graph_name not in ("-", "", None):
+                abs_name = graph_name if has_uri_scheme(graph_name) else DEFAULT_BASE_IRI + src.name
+                sources.append(GraphSource(str(src), abs_name, abs_name))
+            else:
+                base = file_to_named_uri.get(src.name, cwd_uri)
+                sources.append(GraphSource(str(src), None, base))
+
+        client = client_for(f"{config.server_address}:{config.port}")
+        repository = f"repositories/{config.run_id}"
+
+        def send_graph(graph, body, content_type):
+            params = {"graph": graph} if graph else {"default": None}
+            return client.send_graph(
+                "PUT", f"{repository}/rdf-graphs/service", body, content_type, params
+            )
+
+        def send_dataset(body, content_type):
+            return client.send_graph(
+                "POST", f"{repository}/statements", body, content_type
+            )
+
+        success, _ = upload_graphs(sources, send_graph, send_dataset)
+        return success
 
     def query(
         self,
@@ -241,29 +228,11 @@ class GraphdbManager(EngineManager):
         endpoint_suffix: str = "",
     ) -> tuple[int, str]:
         query = _ensure_base_iri(query)
-        args = _make_args(
-            config,
-            accept=_get_accept_header(result_format),
-            query=query,
-            content_type=content_type,
-            sparql_endpoint=(
-                f"http://{config.server_address}:{config.port}"
-                f"/repositories/{config.run_id}{endpoint_suffix}"
-            ),
-        )
-        try:
-            with mute_log():
-                qc = QueryCommand()
-                qc.execute(args, called_from_conformance_test=True)
-                query_output = str(qc.query_output)
-                body, _, status_line = query_output.rpartition("HTTP_STATUS:")
-                status_line = status_line.strip()
-                if not status_line:
-                    return 1, query_output
-                status = int(status_line)
-            return status, body
-        except Exception as e:
-            return 1, str(e)
+        client = client_for(f"{config.server_address}:{config.port}")
+        endpoint = f"repositories/{config.run_id}{endpoint_suffix}"
+        if content_type == "update=":
+            return client.update(query, endpoint)
+        return client.query(query, _get_accept_header(result_format), endpoint)
 
     def _ensure_config_ttl(self) -> tuple[bool, str]:
         if Path("config.ttl").exists():
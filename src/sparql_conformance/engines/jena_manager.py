@@ -2,24 +2,24 @@ from __future__ import annotations
 
 import os
 import re
-import urllib.parse
 from pathlib import Path
 
 import rdflib
 
 from qjena.commands.index import IndexCommand
-from qjena.commands.query import QueryCommand
 from qjena.commands.start import StartCommand
 from qjena.commands.stop import StopCommand
 from qlever.log import mute_log
-from qlever.util import run_command
 import sparql_conformance.util as conformance_util
 from sparql_conformance.config import Config
 from sparql_conformance.engines.engine_manager import (
     EngineManager,
     has_uri_scheme,
 )
-from sparql_conformance.rdf_tools import rdf_xml_to_turtle, write_ttl_file, replace_empty_base_iri
+from sparql_conformance.rdf_tools import rdf_xml_to_turtle, replace_empty_base_iri, stage_rdf_xml_as_turtle, turtle_to_trig
+from sparql_conformance.graph_loader import GraphSource, upload_graphs
+from sparql_conformance.lifecycle import remove_paths
+from sparql_conformance.sparql_client import client_for
 
 
 DEFAULT_NAME = "qlever-sparql-conformance"
@@ -44,13 +44,7 @@ def _copy_graph_to_workdir(file_path: str, workdir: str) -> str:
 
 
 def _graph_to_trig(turtle_data: str, graph_name: str) -> str:
-    graph = rdflib.Graph()
-    graph.parse(data=turtle_data, format="turtle")
-    dataset = rdflib.ConjunctiveGraph()
-    context = dataset.get_context(rdflib.URIRef(graph_name))
-    for triple in graph:
-        context.add(triple)
-    return str(dataset.serialize(format="trig"))
+    return turtle_to_trig(turtle_data, graph_name)
 
 
 class JenaManager(EngineManager):
@@ -84,12 +78,12 @@ class JenaManager(EngineManager):
 
     def cleanup(self, config: Config):
         self._stop_server(config)
-        with mute_log():
-            run_command(
-                f"rm -rf index {config.run_id}.index-log.txt "
-                f"{config.run_id}.server-log.txt "
-                f"{config.run_id}-fuseki.ttl"
-            )
+        remove_paths(
+            "index",
+            f"{config.run_id}.index-log.txt",
+            f"{config.run_id}.server-log.txt",
+            f"{config.run_id}-fuseki.ttl",
+        )
 
     def reset_graphs(
         self,
@@ -97,11 +91,21 @@ class JenaManager(EngineManager):
         graph_paths: tuple[tuple[str, str], ...],
     ) -> bool:
         """Clear all graphs and reload initial data via HTTP without restarting Fuseki."""
+        if self.load_dataset(config, graph_paths):
+            return True
+        self.cleanup(config)
+        ok_i, ok_s, _, _ = self.setup(config, graph_paths)
+        return ok_i and ok_s
+
+    def load_dataset(
+        self,
+        config: Config,
+        graph_paths: tuple[tuple[str, str], ...],
+    ) -> bool:
+        """Replace the data of Fuseki: CLEAR ALL, then one N-Quads upload."""
         status, _ = self.update(config, "CLEAR ALL")
         if status >= 400:
-            self.cleanup(config)
-            ok_i, ok_s, _, _ = self.setup(config, graph_paths)
-            return ok_i and ok_s
+            return False
 
         if not graph_paths:
             return True
@@ -117,50 +121,35 @@ class JenaManager(EngineManager):
                     f"/{DEFAULT_NAME}/{gn}"
                 )
 
-        base_data_url = (
-            f"http://{config.server_address}:{config.port}/{DEFAULT_NAME}/data"
-        )
-        tmp_file = workdir / "_jena_reset_tmp.ttl"
-        try:
-            for graph_path, graph_name in graph_paths:
-                src = Path(graph_path).resolve()
-                if src.suffix == ".rdf":
-                    turtle_data = rdf_xml_to_turtle(str(src), graph_name)
-                else:
-                    replacement = file_to_named_uri.get(src.name, cwd_uri)
-                    temp_name, temp_path = replace_empty_base_iri(
-                        src, workdir, replacement, "jena"
-                    )
-                    if temp_path is not None:
-                        turtle_data = temp_path.read_text(encoding="utf-8")
-                        temp_path.unlink()
-                    else:
-                        turtle_data = src.read_text(encoding="utf-8")
-
-                if graph_name and graph_name != "-":
-                    if has_uri_scheme(graph_name):
-                        resolved_name = graph_name
-                    else:
-                        resolved_name = (
-                            f"http://{config.server_address}:{config.port}"
-                            f"/{DEFAULT_NAME}/{graph_name}"
-                        )
-                    encoded = urllib.parse.quote(resolved_name, safe="")
-                    target_url = f"{base_data_url}?graph={encoded}"
+        sources: list[GraphSource] = []
+        for graph_path, graph_name in graph_paths:
+            src = Path(graph_path).resolve()
+            if graph_name and graph_name != "-":
+                if has_uri_scheme(graph_name):
+                    resolved_name = graph_name
                 else:
-                    target_url = f"{base_data_url}?default"
-
-                tmp_file.write_text(turtle_data, encoding="utf-8")
-                with mute_log():
-                    run_command(
-                        f'curl -s -X PUT "{target_url}"'
-                        f' -H "Content-Type: text/turtle"'
-                        f' --data-binary @"{tmp_file}"'
+                    resolved_name = (
+                        f"http://{config.server_address}:{config.port}"
+                        f"/{DEFAULT_NAME}/{graph_name}"
                     )
-        finally:
-            if tmp_file.exists():
-                tmp_file.unlink()
-        return True
+                sources.append(GraphSource(str(src), resolved_name, resolved_name))
+            else:
+                base = file_to_named_uri.get(src.name, cwd_uri)
+                sources.append(GraphSource(str(src), None, base))
+
+        client = client_for(f"{config.server_address}:{config.port}")
+        data_path = f"{DEFAULT_NAME}/data"
+
+        def send_graph(graph, body, content_type):
+            params = {"graph": graph} if graph else {"default": None}
+            return client.send_graph("PUT", data_path, body, content_type, params)
+
+        def send_dataset(body, content_type):
+            # Without a graph parameter Fuseki adds the quads to the dataset.
+            return client.send_graph("POST", data_path, body, content_type)
+
+        success, _ = upload_graphs(sources, send_graph, send_dataset)
+        return success
 
     def _add_base_if_missing(self, config: Config, query: str) -> str:
         """Prepend BASE <endpoint_root/> if the query has no BASE declaration.
@@ -208,29 +197,11 @@ class JenaManager(EngineManager):
         result_format: str,
         endpoint_suffix: str,
     ) -> tuple[int, str]:
-        args = _make_args(
-            config,
-            accept=_get_accept_header(result_format),
-            query=query,
-            content_type=content_type,
-            sparql_endpoint=(
-                f"{config.server_address}:{config.port}"
-                f"/{DEFAULT_NAME}{endpoint_suffix}"
-            ),
-        )
-        try:
-            with mute_log():
-                qc = QueryCommand()
-                qc.execute(args, called_from_conformance_test=True)
-                query_output = str(qc.query_output)
-                body, _, status_line = query_output.rpartition("HTTP_STATUS:")
-                status_line = status_line.strip()
-                if not status_line:
-                    return 1, query_output
-                status = int(status_line)
-            return status, body
-        except Exception as e:
-            return 1, str(e)
+        client = client_for(f"{config.server_address}:{config.port}")
+        endpoint = f"{DEFAULT_NAME}{endpoint_suffix}"
+        if content_type == "update=":
+            return client.update(query, endpoint)
+        return client.query(query, _get_accept_header(result_format), endpoint)
 
     @staticmethod
     def _has_no_triples(graph_files: list[str]) -> bool:
@@ -406,8 +377,7 @@ class JenaManager(EngineManager):
                 continue
             if src.suffix == ".rdf":
                 graph_path_new = f"{src.stem}.ttl"
-                turtle_data = rdf_xml_to_turtle(str(src), graph_name)
-                write_ttl_file(graph_path_new, turtle_data)
+                stage_rdf_xml_as_turtle(str(src), graph_name, graph_path_new)
                 graph_files.append(graph_path_new)
                 cleanup_paths.append(workdir / graph_path_new)
                 continue
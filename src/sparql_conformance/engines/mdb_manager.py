@@ -4,7 +4,6 @@ import os
 from pathlib import Path
 
 from qlever.log import mute_log
-from qlever.util import run_command
 from qmdb.commands.index import IndexCommand
 from qmdb.commands.query import QueryCommand
 from qmdb.commands.start import StartCommand
@@ -12,7 +11,9 @@ from qmdb.commands.stop import StopCommand
 import sparql_conformance.util as conformance_util
 from sparql_conformance.config import Config
 from sparql_conformance.engines.engine_manager import EngineManager
-from sparql_conformance.rdf_tools import rdf_xml_to_turtle, write_ttl_file
+from sparql_conformance.graph_snapshot import SnapshotReset
+from sparql_conformance.lifecycle import remove_paths
+from sparql_conformance.rdf_tools import stage_rdf_xml_as_turtle
 
 
 
@@ -35,7 +36,7 @@ def _copy_graph_to_workdir(file_path: str, workdir: str) -> str:
     )
 
 
-class MdbManager(EngineManager):
+class MdbManager(SnapshotReset, EngineManager):
     """Manager for MillenniumDB using qmdb commands."""
 
     def protocol_endpoint(self) -> str:
@@ -50,24 +51,45 @@ class MdbManager(EngineManager):
         graph_paths: tuple[tuple[str, str], ...],
     ) -> tuple[bool, bool, str, str]:
         server_success = False
-        graph_files, cleanup_paths = self._prepare_graphs(graph_paths)
-        index_success, index_log = self._index(config, graph_files)
-        self._cleanup_graph_copies(cleanup_paths)
+        index_success, index_log = self.build_index(config, graph_paths)
         if not index_success:
             return index_success, server_success, index_log, ""
 
-        server_success, server_log = self._start_server(config)
+        server_success, server_log = self.start_server(config, graph_paths)
         if not server_success:
             return index_success, server_success, index_log, server_log
         return index_success, server_success, index_log, server_log
 
+    def build_index(
+        self,
+        config: Config,
+        graph_paths: tuple[tuple[str, str], ...],
+    ) -> tuple[bool, str]:
+        graph_files, cleanup_paths = self._prepare_graphs(graph_paths)
+        index_success, index_log = self._index(config, graph_files)
+        self._cleanup_graph_copies(cleanup_paths)
+        return index_success, index_log
+
+    def start_server(
+        self,
+        config: Config,
+        graph_paths: tuple[tuple[str, str], ...],
+    ) -> tuple[bool, str]:
+        return self._start_server(config)
+
+    def index_artifacts(self, config: Config) -> list[str]:
+        return [f"{config.run_id}_index"]
+
+    def engine_identity(self, config: Config) -> str:
+        return conformance_util.engine_identity(config, "mdb")
+
     def cleanup(self, config: Config):
         self._stop_server(config)
-        with mute_log():
-            run_command(
-                f"rm -rf {config.run_id}_index {config.run_id}.index-log.txt "
-                f"{config.run_id}.server-log.txt"
-            )
+        remove_paths(
+            f"{config.run_id}_index",
+            f"{config.run_id}.index-log.txt",
+            f"{config.run_id}.server-log.txt",
+        )
 
     def query(
         self,
@@ -206,9 +228,7 @@ class MdbManager(EngineManager):
             src = Path(graph_path).resolve()
             if src.suffix == ".rdf":
                 ttl_name = f"{src.stem}.ttl"
-                write_ttl_file(
-                    ttl_name, rdf_xml_to_turtle(str(src), _graph_name)
-                )
+                stage_rdf_xml_as_turtle(str(src), _graph_name, ttl_name)
                 graph_file = ttl_name
                 cleanup_paths.append(workdir / ttl_name)
             elif src.parent == workdir:
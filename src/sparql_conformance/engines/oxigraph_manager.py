@@ -4,18 +4,17 @@ import os
 import re
 from pathlib import Path
 
-import rdflib
-
 from qlever.log import mute_log
-from qlever.util import run_command
 from qoxigraph.commands.index import IndexCommand
-from qoxigraph.commands.query import QueryCommand
 from qoxigraph.commands.start import StartCommand
 from qoxigraph.commands.stop import StopCommand
 from sparql_conformance import util as conformance_util
 from sparql_conformance.config import Config
 from sparql_conformance.engines.engine_manager import EngineManager
-from sparql_conformance.rdf_tools import rdf_xml_to_turtle, write_ttl_file, replace_empty_base_iri
+from sparql_conformance.graph_snapshot import SnapshotReset
+from sparql_conformance.lifecycle import remove_paths
+from sparql_conformance.rdf_tools import rdf_xml_to_turtle, write_ttl_file, replace_empty_base_iri, turtle_to_trig
+from sparql_conformance.sparql_client import client_for
 
 
 def _is_select_or_ask(query: str) -> bool:
@@ -44,16 +43,10 @@ def _copy_graph_to_workdir(file_path: str, workdir: str) -> str:
 
 
 def _graph_to_trig(turtle_data: str, graph_name: str) -> str:
-    graph = rdflib.Graph()
-    graph.parse(data=turtle_data, format="turtle")
-    dataset = rdflib.ConjunctiveGraph()
-    context = dataset.get_context(rdflib.URIRef(graph_name))
-    for triple in graph:
-        context.add(triple)
-    return str(dataset.serialize(format="trig"))
+    return turtle_to_trig(turtle_data, graph_name)
 
 
-class OxigraphManager(EngineManager):
+class OxigraphManager(SnapshotReset, EngineManager):
     """Manager for Oxigraph using qoxigraph commands."""
 
     def protocol_endpoint(self) -> str:
@@ -68,25 +61,45 @@ class OxigraphManager(EngineManager):
         graph_paths: tuple[tuple[str, str], ...],
     ) -> tuple[bool, bool, str, str]:
         server_success = False
-        graph_files, cleanup_paths = self._prepare_graphs(graph_paths)
-        index_success, index_log = self._index(config, graph_files)
-        self._cleanup_graph_copies(cleanup_paths)
+        index_success, index_log = self.build_index(config, graph_paths)
         if not index_success:
             return index_success, server_success, index_log, ""
 
-        server_success, server_log = self._start_server(config)
+        server_success, server_log = self.start_server(config, graph_paths)
         if not server_success:
             return index_success, server_success, index_log, server_log
         return index_success, server_success, index_log, server_log
 
+    def build_index(
+        self,
+        config: Config,
+        graph_paths: tuple[tuple[str, str], ...],
+    ) -> tuple[bool, str]:
+        graph_files, cleanup_paths = self._prepare_graphs(graph_paths)
+        index_success, index_log = self._index(config, graph_files)
+        self._cleanup_graph_copies(cleanup_paths)
+        return index_success, index_log
+
+    def start_server(
+        self,
+        config: Config,
+        graph_paths: tuple[tuple[str, str], ...],
+    ) -> tuple[bool, str]:
+        return self._start_server(config)
+
+    def index_artifacts(self, config: Config) -> list[str]:
+        return [f"{config.run_id}_index"]
+
+    def engine_identity(self, config: Config) -> str:
+        return conformance_util.engine_identity(config, "oxigraph")
+
     def cleanup(self, config: Config):
         self._stop_server(config)
-        with mute_log():
-            run_command(
-                f"rm -rf {config.run_id}_index "
-                f"{config.run_id}.index-log.txt "
-                f"{config.run_id}.server-log.txt"
-            )
+        remove_paths(
+            f"{config.run_id}_index",
+            f"{config.run_id}.index-log.txt",
+            f"{config.run_id}.server-log.txt",
+        )
 
     def query(
         self,
@@ -104,6 +117,9 @@ class OxigraphManager(EngineManager):
     def update(self, config: Config, query: str) -> tuple[int, str]:
         return self._query(config, query, "update=", "json")
 
+    def supports_concurrent_requests(self) -> bool:
+        return True
+
     def _query(
         self,
         config: Config,
@@ -111,31 +127,10 @@ class OxigraphManager(EngineManager):
         content_type: str,
         result_format: str,
     ) -> tuple[int, str]:
-        sparql_endpoint = None
+        client = client_for(f"{config.server_address}:{config.port}")
         if content_type == "update=":
-            sparql_endpoint = (
-                f"{config.server_address}:{config.port}/update"
-            )
-        args = _make_args(
-            config,
-            accept=_get_accept_header(result_format),
-            query=query,
-            content_type=content_type,
-            sparql_endpoint=sparql_endpoint,
-        )
-        try:
-            with mute_log():
-                qc = QueryCommand()
-                qc.execute(args, called_from_conformance_test=True)
-                query_output = str(qc.query_output)
-                body, _, status_line = query_output.rpartition("HTTP_STATUS:")
-                status_line = status_line.strip()
-                if not status_line:
-                    return 1, query_output
-                status = int(status_line)
-            return status, body
-        except Exception as e:
-            return 1, str(e)
+            return client.update(query, "update")
+        return client.query(query, _get_accept_header(result_format), "query")
 
     def _index(
         self,
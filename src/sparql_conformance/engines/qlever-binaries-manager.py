@@ -18,7 +18,8 @@ import requests
 
 from sparql_conformance.config import Config
 from sparql_conformance.engines.engine_manager import EngineManager
-from sparql_conformance.rdf_tools import rdf_xml_to_turtle, write_ttl_file, delete_ttl_file
+from sparql_conformance.lifecycle import remove_paths, start_process, terminate_process_group
+from sparql_conformance.rdf_tools import delete_ttl_file, stage_rdf_xml_as_turtle
 from sparql_conformance.util import get_accept_header, read_file, remove_date_time_parts
 
 _INDEX_NAME = "qlever-sparql-conformance"
@@ -63,16 +64,7 @@ class QleverBinariesManager(EngineManager):
 
     def cleanup(self, config: Config):
         self._stop_server()
-        subprocess.run(
-            f"pkill -f 'qlever-server.*-p {config.port}'",
-            shell=True,
-            capture_output=True,
-        )
-        subprocess.run(
-            f"rm -f {_INDEX_NAME}*",
-            shell=True,
-            capture_output=True,
-        )
+        remove_paths(f"{_INDEX_NAME}*", files_only=True)
 
     def query(self, config: Config, query: str, result_format: str) -> Tuple[int, str]:
         return self._http_request(config, query, "application/sparql-query", result_format)
@@ -80,6 +72,9 @@ class QleverBinariesManager(EngineManager):
     def update(self, config: Config, query: str) -> Tuple[int, str]:
         return self._http_request(config, query, "application/sparql-update", "json")
 
+    def supports_concurrent_requests(self) -> bool:
+        return True
+
     def protocol_endpoint(self) -> str:
         return "sparql"
 
@@ -121,7 +116,7 @@ class QleverBinariesManager(EngineManager):
         for graph_path, graph_name in graph_paths:
             if graph_path.endswith(".rdf"):
                 local_name = Path(graph_path).stem + ".ttl"
-                write_ttl_file(local_name, rdf_xml_to_turtle(graph_path, graph_name))
+                stage_rdf_xml_as_turtle(graph_path, graph_name, local_name)
                 result.append((local_name, graph_name))
             else:
                 src = Path(graph_path).resolve()
@@ -138,25 +133,27 @@ class QleverBinariesManager(EngineManager):
         with open(settings_file, "w") as f:
             f.write(_SETTINGS_CONTENT)
 
-        input_parts = []
+        cmd_args = [
+            self._binary(config, config.index_binary),
+            "-i", _INDEX_NAME,
+            "-s", settings_file,
+            "--vocabulary-type", "on-disk-compressed",
+        ]
         for graph_path, graph_name in graph_paths:
             fmt = _FORMAT_BY_EXTENSION.get(Path(graph_path).suffix.lower(), "ttl")
             graph_arg = graph_name if graph_name else "-"
-            input_parts.append(f"-f <(cat {graph_path}) -g {graph_arg} -F {fmt} -p false")
-        input_options = " ".join(input_parts)
+            # qlever-index reads the files itself, no `cat` in between.
+            cmd_args += ["-f", graph_path, "-g", graph_arg, "-F", fmt, "-p", "false"]
 
         log_file = f"{_INDEX_NAME}.index-log.txt"
-        cmd = (
-            f"{self._binary(config, config.index_binary)}"
-            f" -i {_INDEX_NAME}"
-            f" -s {settings_file}"
-            f" --vocabulary-type on-disk-compressed"
-            f" {input_options}"
-            f" > {log_file} 2>&1"
-        )
-
         try:
-            proc = subprocess.run(cmd, shell=True, executable="/bin/bash")
+            proc = start_process(cmd_args, log_file)
+            try:
+                proc.wait()
+            except BaseException:
+                # The new session does not see a Ctrl-C of the terminal.
+                terminate_process_group(proc)
+                raise
             index_log = read_file(log_file)
             success = proc.returncode == 0 and "Index build completed" in index_log
             return success, remove_date_time_parts(index_log)
@@ -177,10 +174,7 @@ class QleverBinariesManager(EngineManager):
             '-a', config.access_token,
         ]
         try:
-            with open(log_file, 'w') as lf:
-                self._server_process = subprocess.Popen(
-                    cmd_args, stdout=lf, stderr=subprocess.STDOUT
-                )
+            self._server_process = start_process(cmd_args, log_file)
         except Exception as e:
             return False, f"Exception starting qlever-server: {e}"
 
@@ -203,12 +197,10 @@ class QleverBinariesManager(EngineManager):
         return False
 
     def _stop_server(self):
+        # Only the server this manager started: other runs on the host may
+        # use the same binary and port pattern.
         if self._server_process is not None:
-            try:
-                self._server_process.terminate()
-                self._server_process.wait(timeout=10)
-            except Exception:
-                self._server_process.kill()
+            terminate_process_group(self._server_process)
             self._server_process = None
 
     def _http_request(
@@ -1,23 +1,26 @@
+import glob
 import json
 import os
+import shlex
 from pathlib import Path
 from argparse import Namespace
 from typing import Tuple, List
 import requests
 
-from qlever.commands.query import QueryCommand
 from qlever.log import mute_log
-from qlever.util import run_command
 from qlever.commands.start import StartCommand
 from qlever.commands.stop import StopCommand
 from sparql_conformance.config import Config
 from sparql_conformance.engines.engine_manager import EngineManager
+from sparql_conformance.graph_snapshot import SnapshotReset
+from sparql_conformance.lifecycle import remove_paths
+from sparql_conformance.sparql_client import client_for
 from sparql_conformance import util
 from qlever.commands.index import IndexCommand
-from sparql_conformance.rdf_tools import write_ttl_file, delete_ttl_file, rdf_xml_to_turtle, replace_empty_base_iri
+from sparql_conformance.rdf_tools import delete_ttl_file, replace_empty_base_iri, stage_rdf_xml_as_turtle
 
 
-class QLeverManager(EngineManager):
+class QLeverManager(SnapshotReset, EngineManager):
     """Manager for QLever using docker execution"""
 
     def update(self, config: Config, query: str) -> Tuple[int, str]:
@@ -31,33 +34,31 @@ class QLeverManager(EngineManager):
 
     def cleanup(self, config: Config):
         self._stop_server(config)
-        with mute_log():
-            run_command(f'rm -f {config.run_id}*')
+        remove_paths(f'{config.run_id}*', files_only=True)
 
     def query(self, config: Config, query: str, result_format: str) -> Tuple[int, str]:
         return self._query(config, query, "rq", result_format)
 
     def _query(self, config: Config, query: str, query_type: str, result_format: str) -> Tuple[int, str]:
-        content_type = "query=" if query_type == "rq" else "update="
-        args = util.make_args(
-            config,
-            accept=util.get_accept_header(result_format),
-            query=query,
-            content_type=content_type,
-        )
-
-        try:
-            with mute_log():
-                qc = QueryCommand()
-                qc.execute(args, True)
-                body, _, status_line = qc.query_output.rpartition("HTTP_STATUS:")
-                status = int(status_line.strip())
-            return status, body
-        except Exception as e:
-            return 1, str(e)
+        client = client_for(
+            f"{config.server_address}:{config.port}", config.access_token)
+        if query_type == "rq":
+            return client.query(query, util.get_accept_header(result_format))
+        return client.update(query)
 
     def setup(self, config: Config, graph_paths: Tuple[Tuple[str, str], ...]) -> Tuple[bool, bool, str, str]:
         server_success = False
+        index_success, index_log = self.build_index(config, graph_paths)
+        if not index_success:
+            return index_success, server_success, index_log, ''
+        else:
+            server_success, server_log = self.start_server(config, graph_paths)
+
+            if not server_success:
+                return index_success, server_success, index_log, server_log
+        return index_success, server_success, index_log, server_log
+
+    def build_index(self, config: Config, graph_paths: Tuple[Tuple[str, str], ...]) -> Tuple[bool, str]:
         workdir = Path(os.getcwd()).resolve()
         cwd_uri = workdir.as_uri() + "/"
         file_to_named_uri: dict[str, str] = {}
@@ -72,7 +73,7 @@ class QLeverManager(EngineManager):
             # Handle rdf files by turning them into turtle format.
             if graph_path.endswith(".rdf"):
                 graph_path_new = src.name.replace(".rdf", ".ttl")
-                write_ttl_file(graph_path_new, rdf_xml_to_turtle(graph_path, graph_name))
+                stage_rdf_xml_as_turtle(graph_path, graph_name, graph_path_new)
                 graph_path = graph_path_new
             else:
                 replacement = file_to_named_uri.get(src.name, cwd_uri)
@@ -92,14 +93,27 @@ class QLeverManager(EngineManager):
                 temp_path.unlink()
             except FileNotFoundError:
                 pass
-        if not index_success:
-            return index_success, server_success, index_log, ''
-        else:
-            server_success, server_log = self._start_server(config)
+        return index_success, index_log
 
-            if not server_success:
-                return index_success, server_success, index_log, server_log
-        return index_success, server_success, index_log, server_log
+    def start_server(self, config: Config, graph_paths: Tuple[Tuple[str, str], ...]) -> Tuple[bool, str]:
+        return self._start_server(config)
+
+    def index_artifacts(self, config: Config) -> List[str]:
+        # All index files share the run_id prefix (the -i basename).
+        return sorted(
+            path for path in glob.glob(f'{glob.escape(config.run_id)}.*')
+            if not path.endswith('.server-log.txt')
+        )
+
+    def index_files_immutable(self) -> bool:
+        # The server keeps updates in memory (persist_updates=False).
+        return True
+
+    def supports_concurrent_requests(self) -> bool:
+        return True
+
+    def engine_identity(self, config: Config) -> str:
+        return util.engine_identity(config, 'qlever-index', 'qlever-server')
 
     def _stop_server(self, config: Config) -> Tuple[bool, str]:
         args = Namespace(
@@ -177,11 +191,17 @@ class QLeverManager(EngineManager):
         return self._FORMAT_BY_EXTENSION.get(ext, 'ttl')
 
     def _generate_multi_input_json(self, graph_paths: List[Tuple[str, str]]) -> str:
-        """Generate the JSON input for multi_input_json in IndexCommand.execute()"""
+        """
+        Generate the JSON input for multi_input_json in IndexCommand.execute()
+
+        qlever-control only takes inputs as commands (it passes each one as
+        `-f <(cmd)` to qlever-index), so every file is still read by `cat`,
+        inside the one shell of the index command. The path is quoted.
+        """
         input_list = []
         for graph_path, graph_name in graph_paths:
             entry = {
-                'cmd': f'cat {graph_path}',
+                'cmd': f'cat {shlex.quote(graph_path)}',
                 'graph': graph_name if graph_name else '-',
                 'format': self._format_for_file(graph_path)
             }
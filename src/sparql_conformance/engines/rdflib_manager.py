@@ -48,6 +48,13 @@ class RdflibEngineManager(EngineManager):
         config: Config,
         graph_paths: Tuple[Tuple[str, str], ...],
     ) -> Tuple[bool, bool, str, str]:
+        success, log = self._load_graphs(graph_paths)
+        return success, success, log, ""
+
+    def _load_graphs(
+        self,
+        graph_paths: Tuple[Tuple[str, str], ...],
+    ) -> Tuple[bool, str]:
         self._dataset = rdflib.Dataset()
         try:
             for graph_path, graph_name in graph_paths:
@@ -60,12 +67,25 @@ class RdflibEngineManager(EngineManager):
                     target = _default_graph(self._dataset)
                 target.parse(graph_path, format=fmt)
         except Exception as e:
-            return False, False, f"Loading graphs failed: {e}", ""
-        return True, True, "", ""
+            return False, f"Loading graphs failed: {e}"
+        return True, ""
 
     def cleanup(self, config: Config):
         self._dataset = None
 
+    def version(self, config: Config) -> str:
+        return f"rdflib {rdflib.__version__}"
+
+    def load_dataset(
+        self,
+        config: Config,
+        graph_paths: Tuple[Tuple[str, str], ...],
+    ) -> bool:
+        if self._dataset is None:
+            return False
+        success, _ = self._load_graphs(graph_paths)
+        return success
+
     def query(
         self, config: Config, query: str, result_format: str
     ) -> Tuple[int, str]:
@@ -14,7 +14,9 @@ from qvirtuoso.commands.stop import StopCommand
 from sparql_conformance import util as conformance_util
 from sparql_conformance.config import Config
 from sparql_conformance.engines.engine_manager import EngineManager
-from sparql_conformance.rdf_tools import rdf_xml_to_turtle, write_ttl_file, replace_empty_base_iri
+from sparql_conformance.graph_snapshot import SnapshotReset
+from sparql_conformance.lifecycle import remove_paths
+from sparql_conformance.rdf_tools import replace_empty_base_iri, stage_rdf_xml_as_turtle
 
 
 DEFAULT_GRAPH_URI = "urn:qlever:default-graph"
@@ -41,7 +43,7 @@ def _copy_graph_to_workdir(file_path: str, workdir: str) -> str:
     )
 
 
-class VirtuosoManager(EngineManager):
+class VirtuosoManager(SnapshotReset, EngineManager):
     """Manager for Virtuoso using qvirtuoso commands."""
 
     def protocol_endpoint(self) -> str:
@@ -56,6 +58,18 @@ class VirtuosoManager(EngineManager):
         graph_paths: tuple[tuple[str, str], ...],
     ) -> tuple[bool, bool, str, str]:
         server_success = False
+        index_success, index_log = self.build_index(config, graph_paths)
+        if not index_success:
+            return index_success, server_success, index_log, ""
+
+        server_success, server_log = self.start_server(config, graph_paths)
+        return index_success, server_success, index_log, server_log
+
+    def build_index(
+        self,
+        config: Config,
+        graph_paths: tuple[tuple[str, str], ...],
+    ) -> tuple[bool, str]:
         graph_files, cleanup_paths, graph_names = self._prepare_graphs(
             graph_paths
         )
@@ -63,27 +77,42 @@ class VirtuosoManager(EngineManager):
             config, graph_files, graph_names
         )
         self._cleanup_graph_copies(cleanup_paths)
-        if not index_success:
-            return index_success, server_success, index_log, ""
+        return index_success, index_log
 
+    def start_server(
+        self,
+        config: Config,
+        graph_paths: tuple[tuple[str, str], ...],
+    ) -> tuple[bool, str]:
+        graph_names = [
+            self._map_graph_name(graph_name) for _, graph_name in graph_paths
+        ]
         server_success, server_log = self._start_server(
             config,
             graph_names=graph_names,
         )
         if not server_success:
-            return index_success, server_success, index_log, server_log
+            return server_success, server_log
         auth_success, auth_log = self._configure_update_auth(
             config,
             graph_names,
         )
         if not auth_success:
-            return (
-                index_success,
-                server_success,
-                index_log,
-                f"{server_log}\n{auth_log}",
-            )
-        return index_success, server_success, index_log, server_log
+            return server_success, f"{server_log}\n{auth_log}"
+        return server_success, server_log
+
+    def index_artifacts(self, config: Config) -> list[str]:
+        # The transaction log is only present if the loader did not
+        # checkpoint it into the database on shutdown.
+        if not os.path.exists("virtuoso.db"):
+            return []
+        return [
+            name for name in ("virtuoso.db", "virtuoso.trx")
+            if os.path.exists(name)
+        ]
+
+    def engine_identity(self, config: Config) -> str:
+        return conformance_util.engine_identity(config, "virtuoso-t", "isql")
 
     def cleanup(self, config: Config):
         self._stop_server(config)
@@ -106,12 +135,16 @@ class VirtuosoManager(EngineManager):
                     if not is_port_used(int(config.port)):
                         break
                     time.sleep(0.2)
-            run_command(
-                f"rm -f {config.run_id}*log.txt "
-                "virtuoso.db virtuoso.trx virtuoso.pxa "
-                "virtuoso-temp.db virtuoso.cpt-after-recov "
-                "virtuoso.trx-after-recov"
-            )
+        remove_paths(
+            f"{config.run_id}*log.txt",
+            "virtuoso.db",
+            "virtuoso.trx",
+            "virtuoso.pxa",
+            "virtuoso-temp.db",
+            "virtuoso.cpt-after-recov",
+            "virtuoso.trx-after-recov",
+            files_only=True,
+        )
 
     def query(
         self,
@@ -280,10 +313,7 @@ class VirtuosoManager(EngineManager):
             if graph_path.endswith(".rdf"):
                 graph_path_new = Path(graph_path).name
                 graph_path_new = graph_path_new.replace(".rdf", ".ttl")
-                write_ttl_file(
-                    graph_path_new,
-                    rdf_xml_to_turtle(graph_path, graph_name),
-                )
+                stage_rdf_xml_as_turtle(graph_path, graph_name, graph_path_new)
                 graph_files.append(graph_path_new)
                 cleanup_paths.append(workdir / graph_path_new)
                 graph_names.append(self._map_graph_name(graph_name))
@@ -0,0 +1,181 @@
+"""Content-addressed cache of parsed expected results and manifests.
+
+Every run parses the same expected results again, for every engine: Turtle
+and RDF/XML expectations when the tests are extracted (to tell RDF result
+sets from graphs) and again in every comparison, and all manifests of a suite
+even if only one test is selected. Parsing RDF with rdflib is slow, so
+``ExpectationCache`` keeps the parsed form of such a file under a key that
+hashes its kind, its parse parameters and its content:
+
+- in memory, for the other parses of the same run,
+- and, with a directory (``--expectation-cache``, by default
+  ``~/.cache/sparql-conformance/expectations``), on disk, for later runs and
+  other engines.
+
+The graph loader keeps the parsed data files it uploads to engines here too,
+keyed by a digest of the file and on disk only (``memory=False``): data files
+can be large, and the in-memory layer is never evicted.
+
+Graphs are stored on disk as their namespace bindings and triples. A cached
+graph is shared by all lookups of the same content, so it must not be
+modified. Entries are written to a temporary file and renamed into place; an
+entry that cannot be read or written is simply parsed again.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import rdflib
+
+# Bump to invalidate all existing entries when the stored forms change.
+CACHE_FORMAT = "1"
+
+# The namespace bindings and the triples of a graph.
+GraphState = Tuple[tuple, tuple]
+
+
+def default_directory() -> str:
+    """Return the default directory of the on-disk cache."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "sparql-conformance", "expectations")
+
+
+class ExpectationCache:
+    """Parsed expected results by content hash, in memory and optionally on disk."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = os.path.abspath(directory) if directory else None
+        self._memory: Dict[str, Any] = {}
+
+    def key(self, kind: str, content: str, params: Tuple[str, ...]) -> str:
+        """Return the cache key of content parsed as kind with params."""
+        digest = hashlib.sha256()
+        for value in (CACHE_FORMAT, rdflib.__version__, kind, *params, content):
+            digest.update(value.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pickle")
+
+    def _read(self, key: str) -> Tuple[bool, Any]:
+        try:
+            with open(self._entry_path(key), "rb") as f:
+                return True, pickle.load(f)
+        except Exception:
+            return False, None
+
+    def _write(self, key: str, value: Any):
+        path = self._entry_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handle, staging = tempfile.mkstemp(
+                prefix=".tmp-", dir=os.path.dirname(path))
+            try:
+                with os.fdopen(handle, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(staging, path)
+            finally:
+                if os.path.exists(staging):
+                    os.remove(staging)
+        except OSError:
+            pass
+
+    def contains(self, kind: str, content: str, params: Tuple[str, ...]) -> bool:
+        """Return whether content parsed as kind with params is cached."""
+        key = self.key(kind, content, params)
+        if key in self._memory:
+            return True
+        return self.directory is not None and os.path.exists(self._entry_path(key))
+
+    def get(
+            self,
+            kind: str,
+            content: str,
+            params: Tuple[str, ...],
+            build: Callable[[], Any],
+            dump: Callable[[Any], Any] = lambda value: value,
+            load: Callable[[Any], Any] = lambda value: value,
+            memory: bool = True) -> Any:
+        """
+        Return the cached value of content parsed as kind with params, or
+        build, cache and return it. Exceptions of build are not cached.
+        On disk, the value is stored as dump(value) and read with load.
+        With memory=False, the value is not kept in memory.
+        """
+        key = self.key(kind, content, params)
+        if memory and key in self._memory:
+            return self._memory[key]
+        found = False
+        if self.directory is not None:
+            found, stored = self._read(key)
+            if found:
+                value = load(stored)
+        if not found:
+            value = build()
+            if self.directory is not None:
+                self._write(key, dump(value))
+        if memory:
+            self._memory[key] = value
+        return value
+
+
+# The cache of this process; tests and library use keep it in memory only.
+_cache = ExpectationCache()
+
+
+def use_directory(directory: Optional[str]):
+    """Use the on-disk cache in directory (None: memory only) from now on."""
+    global _cache
+    if directory != cache_directory():
+        _cache = ExpectationCache(directory)
+
+
+def cache_directory() -> Optional[str]:
+    """Return the directory of the current cache, or None."""
+    return _cache.directory
+
+
+def is_cached(kind: str, content: str, params: Tuple[str, ...]) -> bool:
+    """Return whether the current cache has content, see ExpectationCache.contains."""
+    return _cache.contains(kind, content, params)
+
+
+def cached(
+        kind: str,
+        content: str,
+        params: Tuple[str, ...],
+        build: Callable[[], Any],
+        dump: Callable[[Any], Any] = lambda value: value,
+        load: Callable[[Any], Any] = lambda value: value,
+        memory: bool = True) -> Any:
+    """Look up content in the current cache, see ExpectationCache.get."""
+    return _cache.get(kind, content, params, build, dump, load, memory)
+
+
+def graph_state(graph: rdflib.Graph) -> GraphState:
+    """Return the picklable state of a graph."""
+    return tuple(graph.namespaces()), tuple(graph)
+
+
+def graph_from_state(state: GraphState) -> rdflib.Graph:
+    """Return a new graph with the namespaces and triples of state."""
+    namespaces, triples = state
+    graph = rdflib.Graph()
+    for prefix, namespace in namespaces:
+        graph.bind(prefix, namespace, override=True, replace=True)
+    graph.addN((s, p, o, graph) for s, p, o in triples)
+    return graph
+
+
+def cached_graph(
+        kind: str,
+        content: str,
+        params: Tuple[str, ...],
+        parse: Callable[[], rdflib.Graph]) -> rdflib.Graph:
+    """Return the cached graph parse returns for content; do not modify it."""
+    return cached(kind, content, params, parse, graph_state, graph_from_state)
@@ -1,5 +1,7 @@
+import copy
 import os
 import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
 from rdflib import Graph, Namespace, RDF, URIRef
 from typing import Union, Dict, Any, List, Tuple, Optional, Set
@@ -12,6 +14,7 @@ except ImportError:
     log = logging.getLogger(__name__)
 
 from .config import Config
+from .expectations import cache_directory, cached, is_cached, use_directory
 from .util import uri_to_path, local_name
 from .test_object import TestObject
 from .protocol_request import ProtocolHeader, ProtocolRequest, ProtocolResponse, render_protocol_requests
@@ -313,25 +316,18 @@ def parse_node(graph: Graph, node: Any) -> Union[str, Dict[str, Any], None]:
     return value_dict
 
 
-def load_tests_from_manifest(
-        manifest_path: str,
-        config: Config,
-        visited: Optional[Set[str]] = None
-) -> List[TestObject]:
-    """
-    Load tests from a manifest file and all included sub-manifests.
+def parse_manifest(manifest_abs_path: str) -> Tuple[List[Dict[str, Any]], List[str]]:
     """
-    if visited is None:
-        visited = set()
-
-    manifest_abs_path = os.path.abspath(manifest_path)
-    if manifest_abs_path in visited:
-        return []
-    visited.add(manifest_abs_path)
+    Parse a manifest file without applying include or exclude filters.
 
+    Returns:
+        Tuple:
+        - The TestObject arguments (without config) of every test entry
+        - The paths of the included sub-manifests
+    """
     g = Graph()
     g.parse(manifest_abs_path, format="turtle")
-    tests: List[TestObject] = []
+    entries: List[Dict[str, Any]] = []
     sub_manifest_paths: List[str] = []
 
     for collection in g.objects(None, MF.entries):
@@ -362,10 +358,6 @@ def load_tests_from_manifest(
             entailment_regime = g.value(test_uri, SD.entailmentRegime)
             entailment_profile = g.value(test_uri, SD.entailmentProfile)
             group = os.path.basename(os.path.normpath(path))
-            if str(name) in config.exclude or group in config.exclude:
-                continue
-            if config.include and str(name) not in config.include and group not in config.include:
-                continue
 
             protocol_requests = None
             if test_type in ('ProtocolTest', 'GraphStoreProtocolTest'):
@@ -377,7 +369,7 @@ def load_tests_from_manifest(
                 if protocol_requests:
                     comment = render_protocol_requests(protocol_requests)
 
-            tests.append(TestObject(
+            entries.append(dict(
                 test=str(test_uri),
                 name=str(name),
                 type_name=test_type,
@@ -391,7 +383,6 @@ def load_tests_from_manifest(
                 entailment_regime=str(entailment_regime) if entailment_regime else None,
                 entailment_profile=str(entailment_profile) if entailment_profile else None,
                 feature=feature,
-                config=config,
                 protocol_requests=protocol_requests,
                 requires=requires,
             ))
@@ -399,22 +390,156 @@ def load_tests_from_manifest(
     for include_list in g.objects(None, MF.include):
         for sub_manifest_uri in g.items(include_list):
             sub_manifest_path = uri_to_path(sub_manifest_uri)
-            sub_manifest_path = os.path.normpath(sub_manifest_path)
+            sub_manifest_paths.append(os.path.normpath(sub_manifest_path))
+
+    return entries, sub_manifest_paths
+
+
+def _read_manifest_content(manifest_abs_path: str) -> str:
+    with open(manifest_abs_path, encoding="utf-8") as f:
+        return f.read()
+
+
+def read_manifest(manifest_abs_path: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Like parse_manifest, but cached by the path and content of the manifest
+    (see expectations.py), so only changed manifests are parsed again. The
+    result is shared and must not be modified.
+    """
+    return cached(
+        "manifest",
+        _read_manifest_content(manifest_abs_path),
+        (manifest_abs_path,),
+        lambda: parse_manifest(manifest_abs_path),
+    )
+
+
+def manifests_cached(manifest_abs_paths: List[str]) -> bool:
+    """Return whether read_manifest finds all manifest_abs_paths in the cache."""
+    return all(
+        is_cached("manifest", _read_manifest_content(path), (path,))
+        for path in manifest_abs_paths
+    )
+
+
+def is_selected(name: str, group: str, config: Config) -> bool:
+    """Return whether the include and exclude filters of config select a test."""
+    if name in config.exclude or group in config.exclude:
+        return False
+    if config.include and name not in config.include and group not in config.include:
+        return False
+    return True
+
+
+def _load_manifest(
+        manifest_abs_path: str,
+        config: Config
+) -> Tuple[List[TestObject], List[str]]:
+    """
+    Create the selected tests of one manifest.
 
-            if os.path.exists(sub_manifest_path):
-                sub_manifest_paths.append(sub_manifest_path)
-                tests.extend(load_tests_from_manifest(
-                    sub_manifest_path,
-                    config,
-                    visited=visited
-                ))
+    Returns:
+        Tuple:
+        - The tests of the manifest selected by the filters of config
+        - The absolute paths of the existing included sub-manifests
+    """
+    entries, sub_manifest_paths = read_manifest(manifest_abs_path)
+    # TestObjects keep their entry, the cached one stays untouched.
+    tests = [
+        TestObject(config=config, **copy.deepcopy(entry))
+        for entry in entries
+        if is_selected(entry["name"], entry["group"], config)
+    ]
+    return tests, [
+        os.path.abspath(path)
+        for path in sub_manifest_paths
+        if os.path.exists(path)
+    ]
+
+
+def _load_manifests_in_parallel(
+        manifest_abs_paths: List[str],
+        config: Config,
+        loaded: Dict[str, Tuple[List[TestObject], List[str]]],
+        jobs: int):
+    """
+    Load manifest_abs_paths and all manifests they include into loaded, one
+    task per manifest in a pool of jobs processes.
+    """
+    submitted = set(loaded) | set(manifest_abs_paths)
+    with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=use_directory,
+            initargs=(cache_directory(),)) as executor:
+        pending = {
+            executor.submit(_load_manifest, path, config): path
+            for path in manifest_abs_paths
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                tests, sub_manifest_paths = future.result()
+                # The tests come back with a copy of config; share the
+                # original again, as the suite updates it.
+                for test in tests:
+                    test.config = config
+                loaded[path] = tests, sub_manifest_paths
+                for sub_manifest_path in sub_manifest_paths:
+                    if sub_manifest_path not in submitted:
+                        submitted.add(sub_manifest_path)
+                        pending[executor.submit(
+                            _load_manifest, sub_manifest_path, config)] = sub_manifest_path
 
-    return tests
 
+def load_tests_from_manifest(
+        manifest_path: str,
+        config: Config,
+        visited: Optional[Set[str]] = None,
+        jobs: int = 1
+) -> List[TestObject]:
+    """
+    Load tests from a manifest file and all included sub-manifests.
+
+    Only the tests selected by the include and exclude filters of config are
+    created; the manifests themselves come from the cache (read_manifest).
+    With jobs > 1, the included manifests are loaded by a pool of jobs
+    processes, unless the cache already has them all: then starting the
+    pool takes longer than creating the selected tests. The tests are in the
+    same order either way: those of a manifest, then those of each included
+    manifest in turn.
+    """
+    if visited is None:
+        visited = set()
 
-def extract_tests(config: Config) -> Tuple[Dict[str, Dict[Tuple[Tuple[str, str], ...], List[TestObject]]], int]:
+    loaded: Dict[str, Tuple[List[TestObject], List[str]]] = {}
+    root = os.path.abspath(manifest_path)
+    if root not in visited:
+        loaded[root] = _load_manifest(root, config)
+        sub_manifest_paths = loaded[root][1]
+        if (jobs > 1 and len(sub_manifest_paths) > 1
+                and not manifests_cached(sub_manifest_paths)):
+            _load_manifests_in_parallel(sub_manifest_paths, config, loaded, jobs)
+
+    def in_order(manifest_abs_path: str) -> List[TestObject]:
+        if manifest_abs_path in visited:
+            return []
+        visited.add(manifest_abs_path)
+        if manifest_abs_path not in loaded:
+            loaded[manifest_abs_path] = _load_manifest(manifest_abs_path, config)
+        tests, sub_manifest_paths = loaded[manifest_abs_path]
+        tests = list(tests)
+        for sub_manifest_path in sub_manifest_paths:
+            tests.extend(in_order(sub_manifest_path))
+        return tests
+
+    return in_order(root)
+
+
+def extract_tests(config: Config, jobs: int = 1) -> Tuple[Dict[str, Dict[Tuple[Tuple[str, str], ...], List[TestObject]]], int]:
     """
-    Extract tests from the SPARQL testsuite manifest file.
+    Extract tests from the SPARQL testsuite manifest file, with a pool of
+    jobs processes if jobs > 1 (see load_tests_from_manifest).
 
     Returns:
         Tuple:
@@ -423,5 +548,5 @@ def extract_tests(config: Config) -> Tuple[Dict[str, Dict[Tuple[Tuple[str, str],
     """
     manifest_all = os.path.join(config.path_to_test_suite, 'manifest-all.ttl')
     path_to_manifest = manifest_all if os.path.exists(manifest_all) else os.path.join(config.path_to_test_suite, 'manifest.ttl')
-    tests = load_tests_from_manifest(path_to_manifest, config)
+    tests = load_tests_from_manifest(path_to_manifest, config, jobs=jobs)
     return collect_tests_by_graph(tests), len(tests)
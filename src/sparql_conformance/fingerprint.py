@@ -0,0 +1,170 @@
+"""Fingerprints of test inputs, for rerunning only changed tests.
+
+A test's fingerprint hashes everything its result depends on:
+
+- the run context: the harness version, the source of the modules that
+  produce a test's result (an editable install keeps its version across
+  fixes to the comparators), the engine manager class and the source of its
+  module, ``EngineManager.version``, the comparison budget and the Config
+  fields that affect evaluation (type aliases, number types, graph store
+  endpoint, system),
+- the test itself: URI, type, query, expected results, protocol requests,
+  SERVICE fixtures and the content of every graph file the engine is set up
+  with for the test's group.
+
+Every result file records the fingerprint of each test. ``--changed-only``
+compares them with a baseline result file and copies the results of tests
+with an unchanged fingerprint forward instead of running them. Results that
+may turn out differently on the next attempt, timeouts and exceeded
+comparison budgets, are not copied.
+"""
+
+import functools
+import hashlib
+import importlib.metadata
+import importlib.util
+import inspect
+import json
+from typing import Dict, Optional, Tuple
+
+from sparql_conformance.config import Config
+from sparql_conformance.engines.engine_manager import EngineManager
+from sparql_conformance.graph_compare import DEFAULT_BUDGET
+from sparql_conformance.test_object import TestObject
+
+# Bump when the fingerprint inputs change, to invalidate old fingerprints.
+FINGERPRINT_FORMAT = "3"
+
+# Modules that run the tests, load their data, send their requests and
+# compare and render their results.
+RESULT_MODULES = (
+    "sparql_conformance.testsuite",
+    "sparql_conformance.test_object",
+    "sparql_conformance.dataset_tools",
+    "sparql_conformance.protocol_request",
+    "sparql_conformance.sparql_client",
+    "sparql_conformance.mock_sparql_server",
+    "sparql_conformance.staging",
+    "sparql_conformance.graph_loader",
+    "sparql_conformance.expectations",
+    "sparql_conformance.html_diff",
+    "sparql_conformance.xml_tools",
+    "sparql_conformance.json_tools",
+    "sparql_conformance.tsv_csv_tools",
+    "sparql_conformance.solution_keys",
+    "sparql_conformance.graph_compare",
+    "sparql_conformance.rdf_tools",
+    "sparql_conformance.result_set_tools",
+    "sparql_conformance.protocol_tools",
+    "sparql_conformance.util",
+)
+
+
+def _digest(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _harness_version() -> str:
+    try:
+        return importlib.metadata.version("sparql-conformance")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _manager_source(engine_manager: EngineManager) -> str:
+    """Return a hash of the source file of the engine manager's class."""
+    try:
+        path = inspect.getsourcefile(type(engine_manager))
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except (OSError, TypeError):
+        return ""
+
+
+@functools.lru_cache(maxsize=None)
+def _result_source() -> str:
+    """Return a hash of the source files of RESULT_MODULES."""
+    digest = hashlib.sha256()
+    for name in RESULT_MODULES:
+        digest.update(name.encode("utf-8"))
+        spec = importlib.util.find_spec(name)
+        try:
+            with open(spec.origin, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        except (AttributeError, OSError, TypeError):
+            digest.update(b"missing")
+    return digest.hexdigest()
+
+
+def run_context(
+        engine_manager: EngineManager,
+        config: Config,
+        comparison_budget: float = DEFAULT_BUDGET) -> Optional[str]:
+    """
+    Return the hash of everything all tests of a run depend on, with
+    comparison_budget the --comparison-budget of the run.
+
+    Returns None if the engine does not report its version, so changed
+    engine builds can not be detected.
+    """
+    version = engine_manager.version(config)
+    if not version:
+        return None
+    engine_class = type(engine_manager)
+    return _digest(
+        FINGERPRINT_FORMAT,
+        _harness_version(),
+        _result_source(),
+        f"{engine_class.__module__}.{engine_class.__qualname__}",
+        _manager_source(engine_manager),
+        version,
+        json.dumps(sorted(list(pair) for pair in config.alias)),
+        json.dumps(sorted(set(config.number_types))),
+        repr(float(comparison_budget)),
+        str(config.GRAPHSTORE),
+        str(config.system),
+    )
+
+
+def file_digest(path: str, cache: Dict[str, str]) -> str:
+    """Return the sha256 of a file's content, memoized in cache."""
+    if path not in cache:
+        try:
+            with open(path, "rb") as f:
+                cache[path] = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            cache[path] = "missing"
+    return cache[path]
+
+
+def fingerprint_test(
+        test: TestObject,
+        graph_paths: Tuple[Tuple[str, str], ...],
+        context: str,
+        file_digests: Dict[str, str]) -> str:
+    """Return the fingerprint of a test whose group is set up with graph_paths."""
+    return _digest(
+        context,
+        test.test,
+        test.type_name,
+        test.query_file,
+        test.execution_query,
+        test.result_file,
+        json.dumps(test.result_files, sort_keys=True),
+        test.comment or "",
+        ";".join(test.requires),
+        test.entailment_regime or "",
+        test.setup_error,
+        json.dumps([
+            [fixture.endpoint, fixture.content]
+            for fixture in test.service_data_fixtures
+        ]),
+        json.dumps([
+            [graph_name, file_digest(graph_path, file_digests)]
+            for graph_path, graph_name in graph_paths
+        ]),
+    )
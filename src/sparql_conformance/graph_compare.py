@@ -0,0 +1,199 @@
+"""Decide whether two RDF graphs are isomorphic, within a time budget.
+
+``rdflib.compare.isomorphic`` canonicalizes both graphs completely, which is
+slow on large CONSTRUCT and update results and can take practically forever
+on graphs with many similar blank nodes. ``graphs_isomorphic`` works in tiers:
+
+1. Graphs with a different number of triples differ.
+2. The triples without blank nodes must be the same sets.
+3. Only the triples with blank nodes are matched: blank nodes are colored by
+   their neighbourhood until the colors are stable (color refinement), and
+   where colors leave a choice, one blank node is fixed at a time and the
+   search backtracks if that fails. Blank nodes without blank node neighbours
+   never need a choice; equal colors make them interchangeable.
+
+The search checks its deadline after every refinement round and raises
+``ComparisonBudgetExceeded`` once it has passed, so a pathological graph costs
+at most the budget (``--comparison-budget``) instead of hanging the run.
+"""
+
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import rdflib
+
+# Seconds one graph comparison may take by default.
+DEFAULT_BUDGET = 60.0
+
+Triple = Tuple[rdflib.term.Node, rdflib.term.Node, rdflib.term.Node]
+
+
+class ComparisonBudgetExceeded(Exception):
+    """The comparison did not finish within its budget."""
+
+
+def _has_bnode(triple: Triple) -> bool:
+    return any(isinstance(term, rdflib.BNode) for term in triple)
+
+
+def _bnode_triples(graph: rdflib.Graph) -> Tuple[Set[Triple], Set[Triple]]:
+    ground, with_bnodes = set(), set()
+    for triple in graph:
+        (with_bnodes if _has_bnode(triple) else ground).add(triple)
+    return ground, with_bnodes
+
+
+class _BnodeGraph:
+    """
+    The triples of a graph that contain blank nodes, with blank nodes numbered
+    0..n-1 and other terms replaced by ids shared between the two graphs.
+    """
+
+    def __init__(self, triples: Set[Triple], term_ids: Dict[rdflib.term.Node, int]):
+        self.triples = triples
+        self.nodes: List[rdflib.BNode] = []
+        number: Dict[rdflib.BNode, int] = {}
+        for triple in triples:
+            for term in triple:
+                if isinstance(term, rdflib.BNode) and term not in number:
+                    number[term] = len(self.nodes)
+                    self.nodes.append(term)
+        # Per blank node, its position in each of its triples and the triple
+        # with blank node j as -j-1 and any other term as its id.
+        self.occurrences: List[List[Tuple[int, Tuple[int, ...]]]] = [[] for _ in self.nodes]
+        for triple in triples:
+            template = tuple(
+                -number[term] - 1 if isinstance(term, rdflib.BNode)
+                else term_ids.setdefault(term, len(term_ids))
+                for term in triple)
+            for position, value in enumerate(template):
+                if value < 0:
+                    self.occurrences[-value - 1].append((position, template))
+        self.linked = [
+            any(value < 0 and value != -node - 1
+                for _, template in occurrences for value in template)
+            for node, occurrences in enumerate(self.occurrences)
+        ]
+
+    def signature(self, node: int, colors: List[int]) -> Hashable:
+        # Colors are stored as -color-1, apart from the non-negative term ids.
+        return tuple(sorted(
+            (position, tuple(
+                value if value >= 0 else -colors[-value - 1] - 1
+                for value in template))
+            for position, template in self.occurrences[node]
+        ))
+
+
+class _Search:
+    """Color refinement with individualization over two blank node graphs."""
+
+    def __init__(self, graph1: _BnodeGraph, graph2: _BnodeGraph, deadline: Optional[float]):
+        self.graph1 = graph1
+        self.graph2 = graph2
+        self.deadline = deadline
+
+    def refine(self, colors1: List[int], colors2: List[int]) -> Optional[Tuple[List[int], List[int]]]:
+        """Refine both colorings until they are stable, or None if they diverge."""
+        classes = len(set(colors1) | set(colors2))
+        while True:
+            if self.deadline is not None and time.monotonic() > self.deadline:
+                raise ComparisonBudgetExceeded()
+            # One palette for both graphs, so equal neighbourhoods get equal colors.
+            palette: Dict[Hashable, int] = {}
+            refined1 = [
+                palette.setdefault(
+                    (colors1[node], self.graph1.signature(node, colors1)), len(palette))
+                for node in range(len(colors1))
+            ]
+            refined2 = [
+                palette.setdefault(
+                    (colors2[node], self.graph2.signature(node, colors2)), len(palette))
+                for node in range(len(colors2))
+            ]
+            if Counter(refined1) != Counter(refined2):
+                return None
+            if len(palette) == classes:
+                return refined1, refined2
+            classes = len(palette)
+            colors1, colors2 = refined1, refined2
+
+    def branch_color(self, colors1: List[int]) -> Optional[int]:
+        """Return the smallest ambiguous color of linked blank nodes, if any."""
+        sizes = Counter(
+            color for color, linked in zip(colors1, self.graph1.linked) if linked)
+        ambiguous = [(size, color) for color, size in sizes.items() if size > 1]
+        return min(ambiguous)[1] if ambiguous else None
+
+    def mapping_holds(self, colors1: List[int], colors2: List[int]) -> bool:
+        by_color: Dict[int, List[rdflib.BNode]] = defaultdict(list)
+        for node, color in zip(self.graph2.nodes, colors2):
+            by_color[color].append(node)
+        mapping = {
+            node: by_color[color].pop()
+            for node, color in zip(self.graph1.nodes, colors1)
+        }
+        return {
+            tuple(mapping.get(term, term) for term in triple)
+            for triple in self.graph1.triples
+        } == self.graph2.triples
+
+    def run(self) -> bool:
+        state = self.refine([0] * len(self.graph1.nodes), [0] * len(self.graph2.nodes))
+        choices = []
+        while True:
+            if state is not None:
+                colors1, colors2 = state
+                color = self.branch_color(colors1)
+                if color is None:
+                    if self.mapping_holds(colors1, colors2):
+                        return True
+                else:
+                    node1 = next(
+                        node for node, linked in enumerate(self.graph1.linked)
+                        if linked and colors1[node] == color)
+                    candidates = iter([
+                        node for node, other in enumerate(colors2) if other == color])
+                    choices.append((colors1, colors2, node1, candidates))
+            state = None
+            while choices and state is None:
+                colors1, colors2, node1, candidates = choices[-1]
+                node2 = next(candidates, None)
+                if node2 is None:
+                    choices.pop()
+                    continue
+                # A color that neither coloring uses yet.
+                fixed = max(colors1 + colors2) + 1
+                fixed1, fixed2 = list(colors1), list(colors2)
+                fixed1[node1] = fixed2[node2] = fixed
+                state = self.refine(fixed1, fixed2)
+            if state is None and not choices:
+                return False
+
+
+def graphs_isomorphic(
+        graph1: rdflib.Graph,
+        graph2: rdflib.Graph,
+        budget: Optional[float] = DEFAULT_BUDGET) -> bool:
+    """
+    Return whether the graphs are equal up to blank node labels.
+
+    Raises ComparisonBudgetExceeded if this takes longer than budget seconds;
+    None means no budget.
+    """
+    if len(graph1) != len(graph2):
+        return False
+    ground1, bnode_triples1 = _bnode_triples(graph1)
+    ground2, bnode_triples2 = _bnode_triples(graph2)
+    if ground1 != ground2:
+        return False
+    if not bnode_triples1:
+        return not bnode_triples2
+    deadline = None if budget is None else time.monotonic() + budget
+    term_ids: Dict[rdflib.term.Node, int] = {}
+    return _Search(
+        _BnodeGraph(bnode_triples1, term_ids),
+        _BnodeGraph(bnode_triples2, term_ids),
+        deadline,
+    ).run()
@@ -0,0 +1,239 @@
+"""Load the graphs of a group into a running engine over HTTP.
+
+Managers that load data over HTTP used to upload every graph file with a
+separate, sequential ``curl`` call, after writing a converted or base-fixed
+copy of it to disk. ``upload_graphs`` parses the files of a group in memory
+instead (RDF/XML included) and merges the files that go to the same graph.
+Then it uploads all graphs as one N-Quads request if the engine can store
+quads, or as one N-Triples request per graph, sent concurrently, otherwise.
+
+Files are parsed without normalizing literals, so the engine stores the
+lexical forms of the files. rdflib has no parser option for that, only the
+global ``rdflib.NORMALIZE_LITERALS``; it is switched off under a lock for
+the parse alone and restored right after. The parsed statements of the last
+``DATA_CACHE_SIZE`` files are kept in memory, keyed by path, size and
+modification time, which resets of the same group hit every time. With an
+on-disk expectation cache, they are also stored there under the digest of
+the file.
+"""
+
+import functools
+import hashlib
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import rdflib
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+
+from sparql_conformance.expectations import cached
+
+# Per-graph requests sent at once if the engine cannot store quads.
+LOAD_CONCURRENCY = 8
+
+# Parsed data files kept in memory.
+DATA_CACHE_SIZE = 32
+
+NTRIPLES = "application/n-triples"
+NQUADS = "application/n-quads"
+
+_FORMATS = {
+    ".ttl": "turtle",
+    ".nt": "nt",
+    ".n3": "n3",
+    ".nq": "nquads",
+    ".trig": "trig",
+    ".rdf": "xml",
+    ".xml": "xml",
+}
+_QUAD_FORMATS = ("nquads", "trig")
+
+Response = Tuple[int, str]
+# Subject, predicate, object and the named graph of a statement, if any.
+Quad = Tuple[rdflib.term.Node, rdflib.term.Node, rdflib.term.Node, Optional[str]]
+
+
+class GraphSource(NamedTuple):
+    """One data file of a group and the graph the engine stores it in."""
+
+    path: str
+    # Absolute IRI of the named graph, None for the default graph. The named
+    # graphs of a TriG or N-Quads file keep their names.
+    graph: Optional[str]
+    # IRI that the relative IRIs of the file resolve against.
+    base: str
+
+
+class GraphPayload(NamedTuple):
+    """The statements of one graph, serialized as N-Triples."""
+
+    graph: Optional[str]
+    ntriples: bytes
+    triples: int
+
+
+_literals_lock = threading.Lock()
+
+
+@contextmanager
+def _lexical_literals() -> Iterator[None]:
+    # rdflib normalizes literals its parsers create by default, e.g.
+    # "01"^^xsd:integer to "1"; the engine has to see the data as written.
+    # The parsers only read the module-level flag, so switch it off for the
+    # parse and restore it right after.
+    with _literals_lock:
+        normalize = rdflib.NORMALIZE_LITERALS
+        rdflib.NORMALIZE_LITERALS = False
+        try:
+            yield
+        finally:
+            rdflib.NORMALIZE_LITERALS = normalize
+
+
+def _dump_quads(quads: Tuple[Quad, ...]) -> tuple:
+    # A pickled Literal is created again with normalization; store the
+    # lexical form, language and datatype of literals instead.
+    return tuple(
+        (s, p, (str(o), o.language, o.datatype) if isinstance(o, rdflib.Literal) else o, g)
+        for s, p, o, g in quads
+    )
+
+
+def _load_quads(stored: tuple) -> Tuple[Quad, ...]:
+    return tuple(
+        (s, p, rdflib.Literal(*o, normalize=False) if isinstance(o, tuple) else o, g)
+        for s, p, o, g in stored
+    )
+
+
+def _parse_quads(data: bytes, rdf_format: str, base: str) -> Tuple[Quad, ...]:
+    if rdf_format in _QUAD_FORMATS:
+        dataset = rdflib.Dataset()
+        dataset.parse(data=data, format=rdf_format, publicID=base)
+        return tuple(
+            (s, p, o, None if g is None or g.identifier == DATASET_DEFAULT_GRAPH_ID
+             else str(g.identifier))
+            for s, p, o, g in dataset.quads((None, None, None, None))
+        )
+    graph = rdflib.Graph()
+    graph.parse(data=data, format=rdf_format, publicID=base)
+    return tuple((s, p, o, None) for s, p, o in graph)
+
+
+@functools.lru_cache(maxsize=DATA_CACHE_SIZE)
+def _read_quads(
+        path: str,
+        size: int,
+        mtime_ns: int,
+        rdf_format: str,
+        base: str) -> Tuple[Quad, ...]:
+    # size and mtime_ns only key the cache.
+    data = Path(path).read_bytes()
+
+    def parse() -> Tuple[Quad, ...]:
+        with _lexical_literals():
+            return _parse_quads(data, rdf_format, base)
+
+    return cached(
+        "lexical-quads", hashlib.sha256(data).hexdigest(), (rdf_format, base),
+        parse, _dump_quads, _load_quads, memory=False)
+
+
+def read_quads(source: GraphSource) -> Tuple[Quad, ...]:
+    """Return the statements of a source file, with the graph it names."""
+    stat = os.stat(source.path)
+    rdf_format = _FORMATS.get(Path(source.path).suffix.lower(), "turtle")
+    return _read_quads(
+        os.path.abspath(source.path), stat.st_size, stat.st_mtime_ns,
+        rdf_format, source.base)
+
+
+def merge_graphs(sources: List[GraphSource]) -> List[GraphPayload]:
+    """
+    Return one payload per graph the sources store statements in, in the
+    order the graphs first occur.
+
+    Blank nodes of different sources stay different, also if two sources
+    are the same file.
+    """
+    graphs: Dict[Optional[str], rdflib.Graph] = defaultdict(rdflib.Graph)
+    for index, source in enumerate(sources):
+        for s, p, o, graph in read_quads(source):
+            s, o = (
+                rdflib.BNode(f"{term}x{index}") if isinstance(term, rdflib.BNode)
+                else term for term in (s, o))
+            graphs[graph if graph is not None else source.graph].add((s, p, o))
+    return [
+        GraphPayload(name, graph.serialize(format="nt", encoding="utf-8"), len(graph))
+        for name, graph in graphs.items()
+    ]
+
+
+def to_nquads(payloads: List[GraphPayload]) -> bytes:
+    """Return the statements of all payloads as one N-Quads document."""
+    lines = []
+    for payload in payloads:
+        for line in payload.ntriples.splitlines():
+            if not line:
+                continue
+            if payload.graph is not None and line.endswith(b" ."):
+                line = line[:-1] + f"<{payload.graph}> .".encode("utf-8")
+            lines.append(line + b"\n")
+    return b"".join(lines)
+
+
+def upload_graphs(
+        sources: List[GraphSource],
+        send_graph: Callable[[Optional[str], bytes, str], Response],
+        send_dataset: Optional[Callable[[bytes, str], Response]] = None,
+        concurrency: int = LOAD_CONCURRENCY) -> Tuple[bool, str]:
+    """
+    Upload the graphs of the sources to the engine.
+
+    Parameters:
+        sources (List[GraphSource]): The data files of the group.
+        send_graph (Callable): Sends one graph; called with the graph IRI
+            (None for the default graph), the body and its content type.
+        send_dataset (Callable): Sends statements of all graphs at once;
+            called with the body and its content type. None if the engine
+            cannot store quads in one request.
+        concurrency (int): Number of per-graph requests sent at once.
+
+    Returns:
+        Tuple[bool, str]: Whether every request succeeded, and a log with one
+        line per graph (its statement count, its N-Triples size in bytes and
+        the status of its request) followed by the bodies of failed requests.
+    """
+    try:
+        payloads = merge_graphs(sources)
+    except Exception as e:
+        return False, f"LOAD_FAIL could not read the graph files: {e}"
+    if not payloads:
+        return True, ""
+    if send_dataset is not None:
+        response = send_dataset(to_nquads(payloads), NQUADS)
+        responses = [response] * len(payloads)
+    else:
+        def send(payload: GraphPayload) -> Response:
+            return send_graph(payload.graph, payload.ntriples, NTRIPLES)
+
+        with ThreadPoolExecutor(
+                max_workers=max(1, min(concurrency, len(payloads))),
+                thread_name_prefix="graph-upload") as executor:
+            responses = list(executor.map(send, payloads))
+
+    log: List[str] = []
+    errors: List[str] = []
+    for payload, (status, body) in zip(payloads, responses):
+        log.append(
+            f"LOAD graph={payload.graph or '-'} triples={payload.triples} "
+            f"bytes={len(payload.ntriples)} status={status}"
+        )
+        if not 200 <= status < 300 and body.strip() not in errors:
+            errors.append(body.strip())
+    success = all(200 <= status < 300 for status, _ in responses)
+    return success, "\n".join(log + [error for error in errors if error])
@@ -0,0 +1,262 @@
+"""Capture and restore the graphs of a running engine over SPARQL.
+
+Update, protocol and graph store tests modify the data, so the harness resets
+the engine before each test of such a group (EngineManager.reset_graphs).
+``GraphSnapshot`` records the default graph and every named graph right after
+setup, using only SPARQL queries. Restoring compares the current graphs with
+the snapshot and rewrites just the graphs that differ (CLEAR + INSERT DATA),
+and drops graphs a test created. Graphs that did not change, e.g. the system
+graphs of Virtuoso, are never touched.
+
+``fingerprint`` (triple count + hash of the canonicalized triples) lets the
+harness verify that a reset restored the initial state. A restore leaves
+the fingerprint of the graphs after it in ``restored_fingerprint``, from the
+graphs it compared and, for the graphs it rewrote, queried again, so the
+check does not capture all graphs a second time.
+
+Managers that reset this way inherit ``SnapshotReset``.
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Optional, Set, Tuple
+
+import rdflib
+from rdflib.compare import to_canonical_graph
+
+from sparql_conformance.config import Config
+
+NAMED_GRAPHS_QUERY = "SELECT DISTINCT ?g WHERE { GRAPH ?g { ?s ?p ?o } }"
+# Triples per INSERT DATA request, to keep the requests small.
+INSERT_CHUNK_SIZE = 500
+
+
+def graph_fingerprint(graph: rdflib.Graph) -> str:
+    """
+    Return "<triple count>:<sha256>" of a graph; blank node labels do not
+    matter.
+    """
+    lines = sorted(
+        f"{s.n3()} {p.n3()} {o.n3()} ." for s, p, o in to_canonical_graph(graph)
+    )
+    digest = hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+    return f"{len(lines)}:{digest}"
+
+
+def _combined_fingerprint(default: str, named: Dict[str, str]) -> str:
+    parts = [f"default {default}"] + [
+        f"<{name}> {named[name]}" for name in sorted(named)
+    ]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _graph_query(name: str) -> str:
+    return f"CONSTRUCT {{?s ?p ?o}} WHERE {{ GRAPH <{name}> {{?s ?p ?o}}}}"
+
+
+def _construct(engine_manager, config: Config, query: str) -> Optional[rdflib.Graph]:
+    status, body = engine_manager.query(config, query, "ttl")
+    if status != 200:
+        return None
+    graph = rdflib.Graph()
+    try:
+        graph.parse(data=body, format="turtle")
+    except Exception:
+        return None
+    return graph
+
+
+def _named_graphs(engine_manager, config: Config) -> Optional[List[str]]:
+    status, body = engine_manager.query(config, NAMED_GRAPHS_QUERY, "srj")
+    if status != 200:
+        return None
+    try:
+        bindings = json.loads(body)["results"]["bindings"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    return sorted({
+        binding["g"]["value"] for binding in bindings
+        if binding.get("g", {}).get("type") == "uri"
+    })
+
+
+class GraphSnapshot:
+    """The default graph and named graphs of an engine at one point in time."""
+
+    def __init__(self, default_graph: rdflib.Graph, named_graphs: Dict[str, rdflib.Graph]):
+        # Fingerprint of the engine's graphs after the last successful
+        # restore, None if it could not be determined.
+        self.restored_fingerprint: Optional[str] = None
+        self.default_graph = default_graph
+        self.named_graphs = named_graphs
+        self._fingerprints = {
+            name: graph_fingerprint(graph) for name, graph in named_graphs.items()
+        }
+        self._default_fingerprint = graph_fingerprint(default_graph)
+
+    @classmethod
+    def capture(cls, engine_manager, config: Config) -> Optional["GraphSnapshot"]:
+        """
+        Query all graphs of the running engine.
+
+        Returns None if the engine did not answer one of the queries.
+        """
+        default_graph = _construct(
+            engine_manager, config, engine_manager.default_graph_construct_query())
+        names = _named_graphs(engine_manager, config)
+        if default_graph is None or names is None:
+            return None
+        named_graphs = {}
+        for name in names:
+            graph = _construct(engine_manager, config, _graph_query(name))
+            if graph is None:
+                return None
+            named_graphs[name] = graph
+        return cls(default_graph, named_graphs)
+
+    def fingerprint(self) -> str:
+        """Return a fingerprint of all graphs of the snapshot."""
+        return _combined_fingerprint(self._default_fingerprint, self._fingerprints)
+
+    def restore(self, engine_manager, config: Config) -> bool:
+        """
+        Rewrite every graph of the running engine that differs from the
+        snapshot, and drop graphs that are not in the snapshot.
+
+        Returns True if all updates succeeded. restored_fingerprint is then
+        the fingerprint of the graphs after the restore.
+        """
+        self.restored_fingerprint = None
+        current = GraphSnapshot.capture(engine_manager, config)
+        if current is None:
+            return False
+        updates = []
+        rewritten = set()
+        for name in sorted(set(current.named_graphs) - set(self.named_graphs)):
+            updates.append(f"DROP SILENT GRAPH <{name}>")
+        for name, graph in self.named_graphs.items():
+            if current._fingerprints.get(name) == self._fingerprints[name]:
+                continue
+            rewritten.add(name)
+            updates.append(f"CLEAR SILENT GRAPH <{name}>")
+            updates.extend(_insert_data(graph, name))
+        default_rewritten = current._default_fingerprint != self._default_fingerprint
+        if default_rewritten:
+            updates.append("CLEAR SILENT DEFAULT")
+            updates.extend(_insert_data(self.default_graph, None))
+        for update in updates:
+            status, _ = engine_manager.update(config, update)
+            if not 200 <= status < 300:
+                return False
+        if not updates:
+            self.restored_fingerprint = current.fingerprint()
+        else:
+            self.restored_fingerprint = self._fingerprint_after(
+                engine_manager, config, current, rewritten, default_rewritten)
+        return True
+
+    def _fingerprint_after(
+            self,
+            engine_manager,
+            config: Config,
+            current: "GraphSnapshot",
+            rewritten: Set[str],
+            default_rewritten: bool) -> Optional[str]:
+        """
+        Return the fingerprint of the graphs after a restore that rewrote
+        some of them: the untouched graphs keep their fingerprint in
+        current, the named graph list and the rewritten graphs are queried
+        again.
+        """
+        names = _named_graphs(engine_manager, config)
+        if names is None:
+            return None
+        fingerprints = {}
+        for name in names:
+            if name in current._fingerprints and name not in rewritten:
+                fingerprints[name] = current._fingerprints[name]
+                continue
+            graph = _construct(engine_manager, config, _graph_query(name))
+            if graph is None:
+                return None
+            fingerprints[name] = graph_fingerprint(graph)
+        default = current._default_fingerprint
+        if default_rewritten:
+            graph = _construct(
+                engine_manager, config, engine_manager.default_graph_construct_query())
+            if graph is None:
+                return None
+            default = graph_fingerprint(graph)
+        return _combined_fingerprint(default, fingerprints)
+
+
+class SnapshotReset:
+    """
+    Resets the graphs of an EngineManager in place from a GraphSnapshot.
+
+    Managers opt in by listing it before EngineManager in their bases. The
+    snapshot is captured right after setup, and reset_graphs restores it
+    over SPARQL Update. graph_state reuses the fingerprint of the last
+    capture or restore if nothing ran since.
+    """
+
+    # Graphs right after setup; reset_graphs restores them in place.
+    _initial_graphs: Optional[GraphSnapshot] = None
+    # Fingerprint of the graphs as the last capture or restore left them,
+    # until graph_state returns it.
+    _known_state: Optional[str] = None
+
+    def snapshot_initial_state(
+        self,
+        config: Config,
+        graph_paths: Tuple[Tuple[str, str], ...],
+    ):
+        self._initial_graphs = GraphSnapshot.capture(self, config)
+        if self._initial_graphs is not None:
+            self._known_state = self._initial_graphs.fingerprint()
+
+    def reset_graphs(
+        self,
+        config: Config,
+        graph_paths: Tuple[Tuple[str, str], ...],
+    ) -> bool:
+        """Restore the captured graphs over SPARQL Update.
+
+        On False the harness restarts the engine, from the index snapshot.
+        """
+        self._known_state = None
+        if self._initial_graphs is None or not self._initial_graphs.restore(self, config):
+            return False
+        self._known_state = self._initial_graphs.restored_fingerprint
+        return True
+
+    def graph_state(self, config: Config) -> Optional[str]:
+        state, self._known_state = self._known_state, None
+        if state is not None:
+            return state
+        return super().graph_state(config)
+
+
+def _insert_data(graph: rdflib.Graph, name: Optional[str]) -> List[str]:
+    """Return INSERT DATA updates that add the triples of graph to graph name."""
+    # Each INSERT DATA request gets fresh blank nodes, so all triples with
+    # blank nodes must go into the same request.
+    with_bnodes = []
+    without_bnodes = []
+    for s, p, o in graph:
+        line = f"{s.n3()} {p.n3()} {o.n3()} ."
+        if isinstance(s, rdflib.BNode) or isinstance(o, rdflib.BNode):
+            with_bnodes.append(line)
+        else:
+            without_bnodes.append(line)
+    blocks = ["\n".join(with_bnodes)] if with_bnodes else []
+    blocks += [
+        "\n".join(without_bnodes[start:start + INSERT_CHUNK_SIZE])
+        for start in range(0, len(without_bnodes), INSERT_CHUNK_SIZE)
+    ]
+    updates = []
+    for block in blocks:
+        if name is not None:
+            block = f"GRAPH <{name}> {{\n{block}\n}}"
+        updates.append(f"INSERT DATA {{\n{block}\n}}")
+    return updates
@@ -0,0 +1,129 @@
+"""Render the HTML of a result comparison only when it is written.
+
+Evaluating a test only needs its status. The comparators build their
+highlighted HTML (``expectedHtml``, ``gotHtml`` and the ``...Red`` variants)
+only if they are called with ``render=True``, which is slow on large results
+and wasted on the tests that pass. ``HtmlDiff`` keeps what a comparison needs
+instead: the raw expected and actual payloads and the comparator call, and
+``TestObject.to_dict`` renders it once the test's result is written. A
+passing test shows its payloads as they are. For the other tests, a
+comparator called with ``render=False`` returns an ``UnrenderedResult``: it
+keeps what the comparison left over (the unmatched rows, bindings or
+triples) and renders the highlighted HTML from that, without comparing
+again.
+
+The journal of a run gets the diff of a failing test unrendered too
+(``HtmlDiff.to_json``): the payloads, the comparison's status and the
+comparator with its arguments. A result taken from the journal with
+``--resume`` is rendered when the result file is written
+(``HtmlDiff.from_json``), by calling the comparator again with rendering.
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sparql_conformance.test_object import Status
+from sparql_conformance.util import escape
+
+# The four HTML fields: expected, got, expected red, got red.
+Html = Tuple[str, str, str, str]
+
+
+class UnrenderedResult(tuple):
+    """
+    The (status, error type, "", "", "", "") result of a comparison without
+    rendering, with the function that renders its four HTML fields.
+    """
+
+    render: Callable[[], Html]
+
+    def __new__(cls, status: str, error_type: str, render: Callable[[], Html]):
+        result = super().__new__(cls, (status, error_type, "", "", "", ""))
+        result.render = render
+        return result
+
+
+class DiffSection(NamedTuple):
+    """One compared pair of payloads, e.g. one graph of an update test."""
+
+    # Shown above the section if the diff has more than one, None otherwise.
+    label: Optional[str]
+    expected: str
+    actual: str
+    # The result of the comparison without rendering. Comparators fill in the
+    # HTML of errors (e.g. a format error) even without rendering, the other
+    # results are an UnrenderedResult.
+    result: tuple
+    # The name of the comparator and its arguments after the two payloads,
+    # to compare again with rendering after a resume (see from_json).
+    comparison: Optional[Tuple[str, tuple]] = None
+
+
+class HtmlDiff:
+    """The raw payloads of the comparisons of a test, rendered on demand."""
+
+    def __init__(self, sections: List[DiffSection]):
+        self.sections = sections
+
+    def _render_section(self, section: DiffSection) -> Html:
+        status, _, *html = section.result
+        if status == Status.PASSED:
+            return escape(section.expected), escape(section.actual), "", ""
+        if isinstance(section.result, UnrenderedResult):
+            return section.result.render()
+        return tuple(html)
+
+    def to_json(self) -> List[Dict[str, Any]]:
+        """Return the diff as JSON for the journal, without rendering it."""
+        sections = []
+        for section in self.sections:
+            status, error_type, *html = section.result
+            sections.append({
+                "label": section.label,
+                "expected": section.expected,
+                "actual": section.actual,
+                "status": status,
+                "errorType": error_type,
+                "html": None if isinstance(section.result, UnrenderedResult) else html,
+                "comparison": section.comparison,
+            })
+        return sections
+
+    @classmethod
+    def from_json(
+            cls,
+            sections: List[Dict[str, Any]],
+            comparators: Dict[str, Callable[..., tuple]]) -> "HtmlDiff":
+        """
+        Return the diff to_json returned. Unrendered sections are rendered by
+        calling comparators[name](expected, actual, *arguments, render=True).
+        """
+        def unrendered(section: Dict[str, Any]) -> tuple:
+            if section["html"] is not None:
+                return (section["status"], section["errorType"], *section["html"])
+            name, arguments = section["comparison"]
+            return UnrenderedResult(
+                section["status"], section["errorType"],
+                lambda: tuple(comparators[name](
+                    section["expected"], section["actual"], *arguments,
+                    render=True)[2:]))
+
+        return cls([
+            DiffSection(
+                section["label"], section["expected"], section["actual"],
+                unrendered(section), section["comparison"])
+            for section in sections
+        ])
+
+    def render(self) -> Html:
+        """Return the HTML fields of the test."""
+        rendered = [self._render_section(section) for section in self.sections]
+        if len(self.sections) == 1 and self.sections[0].label is None:
+            return rendered[0]
+        fields = []
+        for field in range(4):
+            parts = [
+                f"<b>{section.label}:</b><br>{html[field]}"
+                for section, html in zip(self.sections, rendered)
+            ]
+            fields.append("<br><br>".join(parts))
+        return tuple(fields)
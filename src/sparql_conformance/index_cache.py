@@ -0,0 +1,172 @@
+"""Content-addressed on-disk cache of engine indexes.
+
+Building the index for a graph group dominates the run time of engines like
+QLever, Blazegraph and Virtuoso, although the W3C data files almost never
+change between runs. ``IndexCache`` stores the index files an engine wrote
+for a graph group (see ``EngineManager.index_artifacts``) under a key that
+hashes everything the index depends on:
+
+- the engine manager class and ``EngineManager.engine_identity`` (binary or
+  container image),
+- the path, content and graph name of every graph file.
+
+Some managers stage data relative to the run: ``<>`` is rewritten to the
+working directory's URI and relative graph names are resolved against the
+server address. Only for such graph groups the working directory and the port
+are part of the key as well, so their indexes are not reused where they would
+differ.
+
+Entries are written to a temporary directory and renamed into place, so
+concurrent ``prebuild`` workers and test runs never see half-written entries.
+Files are cloned as reflinks where the file system supports it.
+File names containing the run id are stored with a placeholder and get the
+current run id on restore.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import List, Tuple
+
+from sparql_conformance.config import Config
+from sparql_conformance.engines.engine_manager import (
+    EngineManager,
+    has_uri_scheme,
+)
+from sparql_conformance.util import clone_path
+
+# Bump to invalidate all existing entries when the key or layout changes.
+CACHE_FORMAT = "1"
+_RUN_ID_PLACEHOLDER = "%RUN_ID%"
+_ENTRY_FILE = "entry.json"
+
+
+def _location_dependent(content: bytes, graph_name: str) -> bool:
+    """Return whether a graph file is staged relative to the run (see above)."""
+    return b"<>" in content or (
+        graph_name not in ("", "-", None) and not has_uri_scheme(graph_name))
+
+
+def location_dependent(graph_paths: Tuple[Tuple[str, str], ...]) -> bool:
+    """
+    Return whether the index for graph_paths depends on the working
+    directory and the port.
+
+    Raises:
+        OSError: If a graph file cannot be read.
+    """
+    for graph_path, graph_name in graph_paths:
+        with open(graph_path, "rb") as f:
+            if _location_dependent(f.read(), graph_name):
+                return True
+    return False
+
+
+class IndexCache:
+    """A directory of prebuilt engine indexes, one entry per cache key."""
+
+    def __init__(self, directory: str):
+        self.directory = os.path.abspath(directory)
+
+    def key(
+            self,
+            engine_manager: EngineManager,
+            config: Config,
+            graph_paths: Tuple[Tuple[str, str], ...]) -> str:
+        """
+        Return the cache key of the index engine_manager builds for graph_paths.
+
+        Raises:
+            OSError: If a graph file cannot be read.
+        """
+        digest = hashlib.sha256()
+
+        def add(value: str):
+            digest.update(value.encode("utf-8"))
+            digest.update(b"\0")
+
+        engine_class = type(engine_manager)
+        add(CACHE_FORMAT)
+        add(f"{engine_class.__module__}.{engine_class.__qualname__}")
+        add(engine_manager.engine_identity(config))
+        depends_on_location = False
+        for graph_path, graph_name in graph_paths:
+            with open(graph_path, "rb") as f:
+                content = f.read()
+            add(os.path.abspath(graph_path))
+            add(hashlib.sha256(content).hexdigest())
+            add(graph_name or "-")
+            if _location_dependent(content, graph_name):
+                depends_on_location = True
+        if depends_on_location:
+            add(os.getcwd())
+            add(str(config.port))
+        return digest.hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def contains(self, key: str) -> bool:
+        """Return whether a complete entry for key exists."""
+        return os.path.isfile(os.path.join(self._entry_dir(key), _ENTRY_FILE))
+
+    def store(
+            self,
+            key: str,
+            config: Config,
+            artifacts: List[str],
+            index_log: str) -> bool:
+        """
+        Copy the index artifacts from the working directory into the cache.
+
+        Returns False (and stores nothing) if an artifact does not exist.
+        """
+        if not artifacts or not all(os.path.exists(a) for a in artifacts):
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".tmp-", dir=self.directory)
+        try:
+            stored = []
+            for artifact in artifacts:
+                name = artifact.replace(config.run_id, _RUN_ID_PLACEHOLDER)
+                clone_path(artifact, os.path.join(staging, "files", name))
+                stored.append(name)
+            with open(os.path.join(staging, _ENTRY_FILE), "w",
+                      encoding="utf-8") as f:
+                json.dump({"artifacts": stored, "indexLog": index_log}, f)
+            try:
+                os.rename(staging, self._entry_dir(key))
+            except OSError:
+                # Another process stored the same key first.
+                if not self.contains(key):
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return True
+
+    def discard(self, key: str):
+        """Delete entry key, if it exists."""
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def restore(self, key: str, config: Config) -> str:
+        """
+        Copy the artifacts of entry key into the working directory.
+
+        Returns:
+            The index log recorded when the entry was stored.
+
+        Raises:
+            OSError: If the entry is missing or cannot be copied.
+        """
+        entry_dir = self._entry_dir(key)
+        with open(os.path.join(entry_dir, _ENTRY_FILE), encoding="utf-8") as f:
+            entry = json.load(f)
+        for name in entry["artifacts"]:
+            clone_path(
+                os.path.join(entry_dir, "files", name),
+                name.replace(_RUN_ID_PLACEHOLDER, config.run_id),
+            )
+        return entry.get("indexLog", "")
+
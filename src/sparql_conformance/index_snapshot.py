@@ -0,0 +1,92 @@
+"""Copy-on-write snapshots of an engine index for mutating test groups.
+
+Update, protocol and graph store tests modify the data, so the engine has to
+return to the initial graphs before every test. When an in-place reset is not
+available or did not restore the initial state, restarting the engine from
+scratch would build the index again for every test. Instead, the harness takes
+an ``IndexSnapshot`` of the index files (see ``EngineManager.index_artifacts``)
+right after the index of the group was built and before the server starts.
+A reset then stops the server, restores the snapshot and starts the server
+again, without indexing.
+
+Snapshot files are cloned as reflinks where the file system supports it,
+hard linked for engines that never modify their index files in place
+(``EngineManager.index_files_immutable``), and copied otherwise.
+"""
+
+import os
+import shutil
+from typing import List, Optional
+
+from sparql_conformance.config import Config
+from sparql_conformance.engines.engine_manager import EngineManager
+from sparql_conformance.util import clone_path
+
+
+def snapshot_directory(config: Config) -> str:
+    """
+    Return the snapshot directory of the run.
+
+    The leading dot keeps it out of the `rm -f <run_id>*` style cleanup of the
+    managers.
+    """
+    return os.path.abspath(f".{config.run_id}.index-snapshot")
+
+
+class IndexSnapshot:
+    """The index files of one graph group, stored next to the working files."""
+
+    def __init__(self, directory: str, artifacts: List[str], hardlink: bool):
+        self.directory = directory
+        self.artifacts = artifacts
+        self.hardlink = hardlink
+
+    @classmethod
+    def capture(
+            cls,
+            engine_manager: EngineManager,
+            config: Config) -> Optional["IndexSnapshot"]:
+        """
+        Snapshot the index files engine_manager has just built.
+
+        Returns None if the engine has no index artifacts or they cannot be
+        copied.
+        """
+        artifacts = engine_manager.index_artifacts(config)
+        if not artifacts or not all(os.path.exists(a) for a in artifacts):
+            return None
+        snapshot = cls(
+            snapshot_directory(config),
+            artifacts,
+            engine_manager.index_files_immutable(),
+        )
+        snapshot.discard()
+        try:
+            for artifact in artifacts:
+                clone_path(
+                    artifact,
+                    os.path.join(snapshot.directory, artifact),
+                    hardlink=snapshot.hardlink,
+                )
+        except OSError:
+            snapshot.discard()
+            return None
+        return snapshot
+
+    def restore(self):
+        """
+        Put the snapshot in place of the index files in the working directory.
+
+        Raises:
+            OSError: If a file cannot be restored.
+        """
+        for artifact in self.artifacts:
+            clone_path(
+                os.path.join(self.directory, artifact),
+                artifact,
+                hardlink=self.hardlink,
+            )
+
+    def discard(self):
+        """Delete the snapshot."""
+        shutil.rmtree(self.directory, ignore_errors=True)
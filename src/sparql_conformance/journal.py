@@ -0,0 +1,72 @@
+"""Append-only journal of finished tests, for resuming interrupted runs.
+
+The result file of a run is only written after the last suite finished, so an
+interrupted run (Ctrl-C, CI timeout, crashed engine) used to lose all results.
+While a run is in progress, every finished test is appended to
+``<results_dir>/<name>.journal.jsonl`` as one JSON line with the suite, a key
+identifying the test, and the test's result dict (``TestObject.to_dict``).
+The diff of a failing test is journaled unrendered and only rendered when
+the result file is written (see html_diff.py).
+
+``--resume`` reads the journal, takes the results of journaled tests from it
+and only runs the remaining tests. The journal is deleted once the result
+file of the complete run has been written.
+"""
+
+import json
+import os
+from typing import Dict
+
+from sparql_conformance.test_object import TestObject
+
+
+def journal_path(results_dir: str, name: str) -> str:
+    """Return the journal file of run `name`."""
+    return os.path.join(results_dir, f"{name}.journal.jsonl")
+
+
+def journal_key(test: TestObject) -> str:
+    """Return the key identifying a test of a suite in the journal."""
+    return f"{test.test} {test.name}"
+
+
+class Journal:
+    """The journal entries of one suite of a run."""
+
+    def __init__(self, path: str, suite: str):
+        self.path = path
+        self.suite = suite
+
+    def append(self, key: str, result: dict):
+        """Append the result dict of a finished test."""
+        line = json.dumps({"suite": self.suite, "key": key, "result": result})
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def entries(self) -> Dict[str, dict]:
+        """
+        Return the journaled results of this suite by key.
+
+        A line that was cut off when the run was killed is ignored.
+        """
+        entries = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get("suite") == self.suite:
+                        entries[entry["key"]] = entry["result"]
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def delete(self):
+        """Delete the journal file of the run."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,6 +1,9 @@
 import json
-from typing import List, Tuple
+from typing import Callable, Hashable, List, Optional, Tuple
 
+from sparql_conformance.solution_keys import (
+    BNODE, XSD_STRING, datatype_classes, literal_key, match_rows, same_bnode, same_datatype)
+from sparql_conformance.html_diff import UnrenderedResult
 from sparql_conformance.test_object import Status, ErrorMessage
 
 
@@ -27,7 +30,9 @@ def handle_bindings(
     Returns:
         str: An HTML-formatted string representing the bindings list with highlighted items.
     """
-    mark_red_copy = list(mark_red)
+    # Look bindings up by their JSON text instead of scanning the lists.
+    remaining = {json.dumps(b, sort_keys=True) for b in remaining_bindings}
+    red = {json.dumps(b, sort_keys=True) for b in mark_red}
     parts = ["["]
     for i, binding in enumerate(bindings):
         if i > 0:
@@ -35,8 +40,9 @@ def handle_bindings(
         parts.append("\n" + " " * (indent * (level + 1)))
 
         # Apply label if the binding matches any in the reference bindings
-        if binding in remaining_bindings:
-            if binding in mark_red_copy:
+        text = json.dumps(binding, sort_keys=True)
+        if text in remaining:
+            if text in red:
                 label = '<label class="red">'
             else:
                 label = '<label class="yellow">'
@@ -194,7 +200,8 @@ def json_elements_equal(
     Compares two JSON elements for equality.
 
     This method compares two JSON elements for equality. It checks for matching
-    keys and compares their values. It also accounts for datatype differences by comparing numerical values.
+    keys and compares their values. It also accounts for datatype differences by comparing numerical values,
+    treats language tags as case-insensitive and plain literals as equal to xsd:string literals.
     The comparison can include intended behavior based on the compare_with_intended_behaviour Bool.
 
     Parameters:
@@ -216,21 +223,20 @@ def json_elements_equal(
 
         if isinstance(field1, dict) and isinstance(field2, dict):
             for sub_key in set(field1.keys()) | set(field2.keys()):
+                if str(field1.get("type")) == "bnode" and str(
+                        field2.get("type")) == "bnode" and str(sub_key) == "value":
+                    # Also if the labels are the same: the two documents may
+                    # use one label for different nodes.
+                    if same_bnode(field1.get("value"), field2.get("value"), map_bnodes):
+                        continue
+                    return False
                 if field1.get(sub_key) != field2.get(sub_key):
-                    if str(
-                            field1.get("type")) == "bnode" and str(
-                            field2.get("type")) == "bnode" and str(sub_key) == "value":
-                        if field1.get("value") not in map_bnodes and field2.get(
-                                "value") not in map_bnodes:
-                            map_bnodes[field1.get(
-                                "value")] = field2.get("value")
-                            map_bnodes[field2.get(
-                                "value")] = field1.get("value")
-                            continue
-                        if map_bnodes.get(
-                                field1.get("value")) == field2.get("value") and map_bnodes.get(
-                                field2.get("value")) == field1.get("value"):
-                            continue
+                    if sub_key == "xml:lang" and isinstance(field1.get(sub_key), str) and isinstance(
+                            field2.get(sub_key), str) and field1.get(sub_key).lower() == field2.get(sub_key).lower():
+                        continue
+                    if sub_key == "datatype" and {
+                            field1.get(sub_key), field2.get(sub_key)} == {None, XSD_STRING}:
+                        continue
                     if str(field1.get("datatype")) in number_types and str(
                             field2.get("datatype")) in number_types and str(sub_key) == "value":
                         if float(
@@ -246,51 +252,97 @@ def json_elements_equal(
     return True
 
 
-def remove_once_found(
+def json_signature(
+        binding: dict,
+        datatype_class: Callable[[Optional[str]], Optional[str]],
+        number_types: list) -> Tuple[Hashable, bool]:
+    """
+    Builds the key of a solution of the "bindings" list for matching it by lookup.
+
+    Solutions that json_elements_equal considers equal have the same key. Blank
+    node labels are left out of the key.
+
+    Parameters:
+        binding (dict): The solution, mapping variable names to RDF terms.
+        datatype_class (Callable): Maps a datatype to the representative of its aliases.
+        number_types (list): List containing all datatypes that should be used as numbers.
+
+    Returns:
+        tuple (Hashable, bool): The key and whether the solution contains a blank node.
+    """
+    fields = []
+    has_bnode = False
+    for name, field in binding.items():
+        if not isinstance(field, dict):
+            fields.append((name, json.dumps(field, sort_keys=True)))
+            continue
+        other = {
+            key: value for key, value in field.items()
+            if key not in ("value", "datatype", "xml:lang")
+        }
+        is_bnode = str(field.get("type")) == "bnode"
+        has_bnode = has_bnode or is_bnode
+        fields.append((name, json.dumps(other, sort_keys=True), literal_key(
+            field.get("datatype"),
+            field.get("xml:lang"),
+            BNODE if is_bnode else field.get("value"),
+            datatype_class,
+            number_types)))
+    return frozenset(fields), has_bnode
+
+
+def remove_equal_bindings(
         list1: list,
         list2: list,
         compare_with_intended_behaviour: bool,
         alias: List[Tuple[str, str]],
         number_types: list,
-        map_bnodes: dict) -> list:
+        map_bnodes: dict) -> Tuple[list, list]:
     """
-    Compares two lists and returns the first list will all elements remove that are also in the second list.
+    Compares two lists of bindings and returns both lists without the bindings they have in common.
+
+    The bindings are paired with match_rows. Bindings without blank nodes are paired by their
+    json_signature, only bindings with blank nodes are compared with json_elements_equal,
+    under one blank node mapping.
 
     Parameters:
-        list1 (list): The first list to compare.
-        list2 (list): The second list to compare.
+        list1 (list): The bindings of the expected result.
+        list2 (list): The bindings of the actual result.
         compare_with_intended_behaviour (bool): Bool to determine whether to use intended behavior aliases in comparison.
         alias (List[Tuple[str, str]]): Dictionary with aliases for datatypes ex. int = integer .
         number_types (list): List containing all datatypes that should be used as numbers.
         map_bnodes (dict): Dictionary mapping the used bnodes.
 
     Returns:
-        list: Retuns list1 with removed elements.
+        Tuple[list, list]: The bindings of list1 and of list2 that were not paired.
     """
-    temp_list1 = list1[:]
-
-    for item2 in list2:
-        for i, item1 in enumerate(temp_list1):
-            if json_elements_equal(
-                    item1,
-                    item2,
-                    compare_with_intended_behaviour,
-                    alias,
-                    number_types,
-                    map_bnodes):
-                # Remove the first found match and break the loop to move to
-                # the next b2
-                temp_list1.pop(i)
-                break
-
-    return temp_list1
+    datatype_class = datatype_classes(alias) if compare_with_intended_behaviour else same_datatype
+    pairs = match_rows(
+        list1,
+        list2,
+        lambda binding: json_signature(binding, datatype_class, number_types),
+        lambda item1, item2, mapping: json_elements_equal(
+            item1,
+            item2,
+            compare_with_intended_behaviour,
+            alias,
+            number_types,
+            mapping),
+        map_bnodes)
+    found1 = {index1 for index1, _ in pairs}
+    found2 = {index2 for _, index2 in pairs}
+    return (
+        [item for i, item in enumerate(list1) if i not in found1],
+        [item for i, item in enumerate(list2) if i not in found2],
+    )
 
 
 def compare_json(
         expected_json: str,
         query_json: str,
         alias: List[Tuple[str, str]],
-        number_types: list) -> tuple:
+        number_types: list,
+        render: bool = True) -> tuple:
     """
     Compares two JSON objects and identifies differences in their "head" and "results" sections.
 
@@ -303,6 +355,8 @@ def compare_json(
         query_json (str): The query JSON content as a string.
         alias (List[Tuple[str, str]]): Dictionary with aliases for datatypes ex. int = integer .
         number_types (list): List containing all datatypes that should be used as numbers.
+        render (bool): If False, return empty strings for the HTML. A result that is not passed
+            is then an UnrenderedResult, which renders the HTML from the rows left unmatched.
 
     Returns:
         tuple: A tuple containing the status and error type.
@@ -343,10 +397,8 @@ def compare_json(
         bindings1 = expected["results"]["bindings"]
         bindings2 = query["results"]["bindings"]
 
-        unique_bindings1 = remove_once_found(
+        unique_bindings1, unique_bindings2 = remove_equal_bindings(
             bindings1, bindings2, False, alias, number_types, map_bnodes)
-        unique_bindings2 = remove_once_found(
-            bindings2, bindings1, False, alias, number_types, map_bnodes)
 
         expected["results"]["bindings"] = unique_bindings1
         query["results"]["bindings"] = unique_bindings2
@@ -359,21 +411,11 @@ def compare_json(
             status = Status.PASSED
             error_type = ""
         else:
-            unique_bindings1 = remove_once_found(
+            unique_bindings1, unique_bindings2 = remove_equal_bindings(
                 bindings1, bindings2, True, alias, number_types, map_bnodes)
-            unique_bindings2 = remove_once_found(
-                bindings2, bindings1, True, alias, number_types, map_bnodes)
             if len(unique_bindings1) == 0 and len(unique_bindings2) == 0:
                 status = Status.INTENDED
                 error_type = ErrorMessage.INTENDED_MSG
-        expected_string = generate_highlighted_string_json(
-            json.loads(expected_json), expected, unique_bindings1)
-        query_string = generate_highlighted_string_json(
-            json.loads(query_json), query, unique_bindings2)
-        expected_string_red = generate_highlighted_string_json(
-            expected, expected, unique_bindings1)
-        query_string_red = generate_highlighted_string_json(
-            query, query, unique_bindings2)
     else:
         bool1 = expected["boolean"]
         bool2 = query["boolean"]
@@ -382,12 +424,21 @@ def compare_json(
             del query["boolean"]
             status = Status.PASSED
             error_type = ""
-        expected_string = generate_highlighted_string_json(
-            json.loads(expected_json), expected, [])
-        query_string = generate_highlighted_string_json(
-            json.loads(query_json), query, [])
-        expected_string_red = generate_highlighted_string_json(
-            expected, expected, [])
-        query_string_red = generate_highlighted_string_json(query, query, [])
-
-    return status, error_type, expected_string, query_string, expected_string_red, query_string_red
+        unique_bindings1, unique_bindings2 = [], []
+
+    def render_html() -> tuple:
+        # Only what the comparison left in expected and query is highlighted.
+        return (
+            generate_highlighted_string_json(
+                json.loads(expected_json), expected, unique_bindings1),
+            generate_highlighted_string_json(
+                json.loads(query_json), query, unique_bindings2),
+            generate_highlighted_string_json(expected, expected, unique_bindings1),
+            generate_highlighted_string_json(query, query, unique_bindings2),
+        )
+
+    if not render:
+        if status == Status.PASSED:
+            return status, error_type, "", "", "", ""
+        return UnrenderedResult(status, error_type, render_html)
+    return (status, error_type, *render_html())
@@ -0,0 +1,107 @@
+"""File and process operations of the engine lifecycle, without a shell.
+
+Managers remove their index and log files after every graph group. Doing
+that with ``rm -rf <run_id>*`` through ``run_command`` starts a shell per
+group; ``remove_paths`` expands the same patterns with ``glob`` and deletes
+the matches in-process. Like the shell, ``*`` does not match a leading dot,
+so the ``.<run_id>.*`` directories of index snapshots and pipelined caches
+and the ``.<run_id>-workers`` directories of worker processes survive a
+cleanup. Cleanups that ran ``rm -f`` pass ``files_only=True`` and leave
+directories alone, as ``rm -f`` did.
+
+Servers a manager starts itself run in a session of their own
+(``start_process``). ``terminate_process_group`` stops exactly that process
+group by its PID. A ``pkill -f`` pattern instead also hits the servers of
+other runs on the same host, e.g. the workers of ``--jobs``.
+"""
+
+import glob
+import os
+import shutil
+import signal
+import subprocess
+from typing import List, Optional, Sequence
+
+# Seconds a process group gets to exit after SIGTERM before it is killed.
+TERMINATE_TIMEOUT = 10
+
+
+def remove_paths(*patterns: str, files_only: bool = False) -> List[str]:
+    """
+    Remove the files and directories matching the glob patterns.
+
+    Missing paths and paths that can not be removed are skipped, like
+    ``rm -rf`` would; with files_only, directories are skipped too, like
+    ``rm -f`` would. Returns the paths that were removed.
+    """
+    removed = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            is_directory = os.path.isdir(path) and not os.path.islink(path)
+            if is_directory and files_only:
+                continue
+            try:
+                if is_directory:
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                continue
+            removed.append(path)
+    return removed
+
+
+def start_process(
+        args: Sequence[str],
+        log_path: str,
+        cwd: Optional[str] = None) -> subprocess.Popen:
+    """
+    Start args in a new session, with stdout and stderr written to log_path.
+
+    The process leads its own process group, so terminate_process_group
+    also stops the processes it starts.
+    """
+    with open(log_path, "w") as log:
+        return subprocess.Popen(
+            list(args),
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            cwd=cwd,
+            start_new_session=True,
+        )
+
+
+def _signal_group(pid: int, sig: int) -> bool:
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def terminate_process_group(
+        process: subprocess.Popen,
+        timeout: float = TERMINATE_TIMEOUT) -> Optional[int]:
+    """
+    Stop a process started by start_process and every process in its group.
+
+    Sends SIGTERM to the group, and SIGKILL if the process has not exited
+    after timeout seconds. Returns the exit code of the process.
+    """
+    if not hasattr(os, "killpg"):
+        process.terminate()
+        try:
+            return process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            return process.wait()
+    if process.poll() is None:
+        _signal_group(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            pass
+    # Children that ignored SIGTERM, or a server that outlived its parent.
+    _signal_group(process.pid, signal.SIGKILL)
+    return process.wait()
@@ -1,11 +1,15 @@
 import argparse
+import functools
 import importlib.util
 import json
 import os
+import sys
 
 from sparql_conformance.config import Config
 from sparql_conformance.engines import get_engine_manager
 from sparql_conformance.engines.engine_manager import EngineManager
+from sparql_conformance.expectations import default_directory
+from sparql_conformance.graph_compare import DEFAULT_BUDGET
 from sparql_conformance.qlever_control import (
     QleverControlRequiredError,
     is_qlever_control_import_error,
@@ -13,9 +17,13 @@ from sparql_conformance.qlever_control import (
 )
 from sparql_conformance.runner import (
     assemble_suites,
+    merge_runs,
     parse_test_suites,
+    prebuild_suites,
     run_suites,
 )
+from sparql_conformance.sharding import parse_shard
+from sparql_conformance.timeouts import parse_timeout_policy
 
 try:
     from qlever.log import log
@@ -66,9 +74,67 @@ def looks_like_file_path(value: str) -> bool:
     )
 
 
-def main():
+def merge_main(argv):
+    """`sparql-conformance merge`: combine the result files of shards."""
     parser = argparse.ArgumentParser(
-        description="Run SPARQL conformance tests against a SPARQL engine.",
+        prog="sparql-conformance merge",
+        description=(
+            "Merge the result files of the shards of one run (--shard i/N) "
+            "into one result file."
+        ),
+    )
+    parser.add_argument(
+        "result_files",
+        nargs="+",
+        metavar="RESULTS_FILE",
+        help="The <name>.json.bz2 result file of every shard.",
+    )
+    parser.add_argument(
+        "--name",
+        required=True,
+        help="Name of the merged run: <results-dir>/<name>.json.bz2",
+    )
+    parser.add_argument(
+        "--results-dir",
+        default="./results",
+        dest="results_dir",
+        help="Directory for the merged JSON file (default: ./results).",
+    )
+    parser.add_argument(
+        "--report",
+        default="none",
+        choices=["none", "summary"],
+        help="Print the totals and failed tests of the merged run.",
+    )
+    args = parser.parse_args(argv)
+    for path in args.result_files:
+        if not os.path.isfile(path):
+            parser.error(f"Result file not found: {path}")
+    try:
+        merge_runs(args.result_files, args.name, args.results_dir, args.report)
+    except ValueError as error:
+        parser.exit(1, f"{error}\n")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] == "merge":
+        merge_main(argv[1:])
+        return
+    # `sparql-conformance prebuild ...` only fills the index cache; all other
+    # invocations run the test suites.
+    command = "test"
+    if argv and argv[0] == "prebuild":
+        command = argv.pop(0)
+    parser = argparse.ArgumentParser(
+        prog="sparql-conformance prebuild" if command == "prebuild" else None,
+        description=(
+            "Build the indexes of all test graphs into the index cache."
+            if command == "prebuild" else
+            "Run SPARQL conformance tests against a SPARQL engine.\n"
+            "Use `prebuild` as the first argument to only fill --index-cache,\n"
+            "`merge` to combine the result files of --shard runs."
+        ),
         formatter_class=argparse.RawTextHelpFormatter,
     )
     parser.add_argument(
@@ -83,8 +149,11 @@ def main():
     )
     parser.add_argument(
         "--name",
-        required=True,
-        help="Name for this run; used as the output filename: <results-dir>/<name>.json.bz2",
+        default=None,
+        help=(
+            "Name for this run; used as the output filename: "
+            "<results-dir>/<name>.json.bz2 (required for test)"
+        ),
     )
     parser.add_argument(
         "--results-dir",
@@ -183,7 +252,177 @@ def main():
         ),
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--jobs",
+        default=1,
+        type=int,
+        help=(
+            "Number of engine instances that run graph groups in parallel "
+            "(default: 1).\n"
+            "Worker i uses port <port>+i, run id <name>-i and its own working "
+            "directory."
+        ),
+    )
+
+    parser.add_argument(
+        "--durations-from",
+        default=None,
+        dest="durations_from",
+        metavar="RESULTS_FILE",
+        help=(
+            "Result file whose recorded graph group durations order the "
+            "groups of a --jobs run,\nlongest first (default: the previous "
+            "<results-dir>/<name>.json.bz2, if any)."
+        ),
+    )
+
+    parser.add_argument(
+        "--request-concurrency",
+        default=1,
+        type=int,
+        dest="request_concurrency",
+        metavar="N",
+        help=(
+            "Number of query and syntax test requests sent to the engine at "
+            "once (default: 1).\nOnly used for engines whose "
+            "EngineManager.supports_concurrent_requests returns True."
+        ),
+    )
+
+    parser.add_argument(
+        "--timeout",
+        default=None,
+        type=parse_timeout_policy,
+        metavar="SECONDS|JSON",
+        help=(
+            "Deadline of every query and update sent to the engine, in "
+            "seconds, or a JSON object\nwith per-category and per-test "
+            "overrides, e.g.\n"
+            "'{\"default\":60,\"categories\":{\"update\":120},\"tests\":{\"pp37\":300}}'.\n"
+            "A test that passes its deadline fails with a timeout, and the "
+            "engine is restarted\nfor the rest of its group. The \"setup\" "
+            "category bounds engine setup and resets\n(default: no "
+            "deadline)."
+        ),
+    )
+
+    parser.add_argument(
+        "--comparison-budget",
+        default=DEFAULT_BUDGET,
+        type=float,
+        dest="comparison_budget",
+        metavar="SECONDS",
+        help=(
+            "Time one comparison of an expected and an actual graph may take "
+            f"(default: {DEFAULT_BUDGET:g}).\nA test whose comparison takes "
+            "longer is not tested, with the error 'Comparison budget exceeded'."
+        ),
+    )
+
+    parser.add_argument(
+        "--compact-passing",
+        action="store_true",
+        default=False,
+        dest="compact_passing",
+        help=(
+            "Store only the SHA-256 hashes of the queries, results and logs "
+            "of passing tests\nin the result file, which makes it much smaller."
+        ),
+    )
+
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help=(
+            "Build the index of the next graph group in a background worker "
+            "(port <port>+1)\nwhile the current group runs. Ignored with "
+            "--jobs > 1; only used for engines\nthat implement "
+            "EngineManager.build_index."
+        ),
+    )
+
+    parser.add_argument(
+        "--index-cache",
+        default=None,
+        dest="index_cache",
+        metavar="DIR",
+        help=(
+            "Directory of the on-disk index cache. Indexes are looked up by a "
+            "hash of the graph files, graph names and engine build; on a hit "
+            "the index is restored and only the server is started.\n"
+            "Only used for engines that implement EngineManager.build_index."
+        ),
+    )
+
+    parser.add_argument(
+        "--expectation-cache",
+        default=default_directory(),
+        dest="expectation_cache",
+        metavar="DIR",
+        help=(
+            "Directory of the on-disk cache of parsed manifests, expected "
+            "results and staged\ngraph files, shared by all runs and engines "
+            "(default: %(default)s)."
+        ),
+    )
+
+    parser.add_argument(
+        "--hot-swap",
+        action="store_true",
+        dest="hot_swap",
+        help=(
+            "Keep the server running between query groups and swap the data "
+            "in place (EngineManager.load_dataset) instead of restarting it.\n"
+            "Engines that do not implement load_dataset are restarted as usual."
+        ),
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Continue an interrupted run with the same --name and "
+            "--results-dir:\ntests recorded in <results-dir>/<name>.journal.jsonl "
+            "are not run again."
+        ),
+    )
+
+    parser.add_argument(
+        "--shard",
+        default=None,
+        type=parse_shard,
+        metavar="i/N",
+        help=(
+            "Only run shard i of N (1 <= i <= N) of every suite, e.g. on one "
+            "of N CI machines.\nGraph groups are split deterministically and "
+            "balanced by test count;\ncombine the result files with "
+            "`sparql-conformance merge`."
+        ),
+    )
+
+    parser.add_argument(
+        "--changed-only",
+        default=None,
+        dest="changed_only",
+        metavar="RESULTS_FILE",
+        help=(
+            "Path to a previous <name>.json.bz2 run: only run tests whose "
+            "inputs or engine\nversion (EngineManager.version) changed since; "
+            "copy the other results from it."
+        ),
+    )
+
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.request_concurrency < 1:
+        parser.error("--request-concurrency must be at least 1")
+    if args.comparison_budget <= 0:
+        parser.error("--comparison-budget must be positive")
+    if command == "test" and not args.name:
+        parser.error("the following arguments are required: --name")
+    if command == "prebuild" and not args.index_cache:
+        parser.error("prebuild requires --index-cache")
 
     active_suites = assemble_suites(args.test_suites)
 
@@ -220,14 +459,51 @@ def main():
             index_binary=args.index_binary,
         )
 
+    if args.jobs > 1:
+        # Every worker process creates its own engine manager, so pass a
+        # picklable factory instead of the instance loaded above.
+        if os.path.isfile(args.engine):
+            make_engine_manager = functools.partial(
+                load_engine_from_file, args.engine)
+        else:
+            make_engine_manager = functools.partial(
+                get_engine_manager_by_name, args.engine)
+    else:
+        def make_engine_manager():
+            return engine_manager
+
+    if command == "prebuild":
+        if not prebuild_suites(
+                active_suites,
+                make_config,
+                make_engine_manager,
+                name=args.name or "prebuild",
+                index_cache=args.index_cache,
+                jobs=args.jobs):
+            parser.exit(1)
+        return
+
     run_suites(
         active_suites,
         make_config,
-        lambda: engine_manager,
+        make_engine_manager,
         name=args.name,
         results_dir=args.results_dir,
         report_mode=args.report,
         compare_to=args.compare_to,
+        jobs=args.jobs,
+        index_cache=args.index_cache,
+        hot_swap=args.hot_swap,
+        resume=args.resume,
+        changed_only=args.changed_only,
+        shard=args.shard,
+        request_concurrency=args.request_concurrency,
+        timeout_policy=args.timeout,
+        comparison_budget=args.comparison_budget,
+        compact_passing=args.compact_passing,
+        pipeline=args.pipeline,
+        durations_from=args.durations_from,
+        expectation_cache=args.expectation_cache,
     )
 
 
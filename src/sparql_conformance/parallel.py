@@ -0,0 +1,317 @@
+"""Run the graph groups of a test suite on a pool of engine instances.
+
+Every engine session (see ``TestSuite.sessions``) is independent: it starts
+from a fresh engine (cleanup -> setup), runs its tests and tears the engine
+down again. ``run_parallel`` hands the sessions of a ``TestSuite`` to a pool
+of worker processes. Each worker owns
+one engine instance with its own port, run_id and working directory, so the
+run_id-based cleanup of the managers (e.g. ``rm -f <run_id>*``) and their
+``./<run_id>.server-log.txt`` files do not collide.
+
+Finished tests are sent back to the parent and put in place of the original
+ones, so ``TestSuite.build_results_dict`` produces the same output as a
+sequential run. The parent also writes them to the journal.
+
+``prebuild_parallel`` uses the same pool to fill the index cache ahead of a
+run (see index_cache.py).
+
+``run_pipelined`` runs the sessions one after another, like ``TestSuite.run``,
+while a single worker builds the index of the next session into the index
+cache. The next session then only restores the index and starts the server,
+so indexing overlaps with querying even without more engine instances.
+Indexes that depend on the working directory and port (see index_cache.py)
+are not built ahead: the worker has its own, so the parent could not use
+them. The number of such sessions is logged.
+"""
+
+import copy
+import multiprocessing
+import multiprocessing.util
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from qlever.log import log
+except ImportError:
+    import logging
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    log = logging.getLogger(__name__)
+from sparql_conformance.config import Config
+from sparql_conformance.engines.engine_manager import EngineManager
+from sparql_conformance.expectations import cache_directory, use_directory
+from sparql_conformance.index_cache import IndexCache, location_dependent
+from sparql_conformance.test_object import TestObject
+
+# State of the current worker process, set up once by _init_worker.
+_worker = {}
+
+
+def worker_config(config: Config, index: int) -> Config:
+    """
+    Return a copy of the config for worker `index`, with its own port and run_id.
+
+    Worker 0 keeps the configured port; worker i uses port + i.
+    """
+    worker = copy.copy(config)
+    worker.port = str(int(config.port) + index)
+    worker.run_id = f"{config.run_id}-{index}"
+    return worker
+
+
+def worker_directory(config: Config, index: int) -> str:
+    """
+    Return the absolute working directory of worker `index`. The leading dot
+    keeps it out of the `<run_id>*` patterns of manager cleanups.
+    """
+    return os.path.abspath(os.path.join(f".{config.run_id}-workers", str(index)))
+
+
+def suite_options(suite) -> Dict[str, Any]:
+    """Return the TestSuite keyword options a worker's suite is created with."""
+    return {
+        "index_cache": suite.index_cache,
+        "hot_swap": suite.hot_swap,
+        "request_concurrency": suite.request_concurrency,
+        "timeout_policy": suite.timeout_policy,
+        "comparison_budget": suite.comparison_budget,
+        "compact_passing": suite.compact_passing,
+    }
+
+
+def _init_worker(
+        slots,
+        config: Config,
+        make_engine_manager: Callable[[], EngineManager],
+        name: str,
+        options: Dict[str, Any],
+        expectation_cache: Optional[str] = None):
+    """Claim a worker slot and set up the worker's engine and directory."""
+    from sparql_conformance.testsuite import TestSuite
+
+    use_directory(expectation_cache)
+    index = slots.get()
+    work_dir = worker_directory(config, index)
+    os.makedirs(work_dir, exist_ok=True)
+    os.chdir(work_dir)
+    _worker["suite"] = TestSuite(
+        name=name,
+        tests={},
+        test_count=0,
+        config=worker_config(config, index),
+        engine_manager=make_engine_manager(),
+        report_mode="none",
+        **options,
+    )
+    # Stop a server that hot-swap mode kept running when the worker exits.
+    multiprocessing.util.Finalize(None, _worker["suite"].close, exitpriority=10)
+
+
+def _make_executor(
+        suite,
+        jobs: int,
+        make_engine_manager,
+        first_index: int = 0) -> ProcessPoolExecutor:
+    """Create a pool of `jobs` workers, each with its own slot index."""
+    context = multiprocessing.get_context()
+    slots = context.Queue()
+    for index in range(first_index, first_index + jobs):
+        slots.put(index)
+    return ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(slots, suite.config, make_engine_manager, suite.name,
+                  suite_options(suite), cache_directory()),
+    )
+
+
+def _run_session(
+        graph_key: Tuple[Tuple[str, str], ...],
+        parts: List[Tuple[str, List[TestObject]]]
+) -> Tuple[List[Tuple[str, List[TestObject]]], Dict[str, float]]:
+    """
+    Run one engine session in the worker and return its finished tests and
+    its duration.
+    """
+    suite = _worker["suite"]
+    try:
+        suite.run_session(graph_key, parts)
+    except KeyboardInterrupt:
+        suite.engine_manager.cleanup(suite.config)
+        raise
+    return parts, suite.group_durations.pop(suite.session_identity(graph_key, parts))
+
+
+def _prebuild_index(graph_paths: Tuple[Tuple[str, str], ...]) -> bool:
+    """Build one index in the worker and store it in the index cache."""
+    suite = _worker["suite"]
+    try:
+        return suite.prebuild_index(graph_paths)
+    except KeyboardInterrupt:
+        suite.engine_manager.cleanup(suite.config)
+        raise
+
+
+def run_parallel(
+        suite,
+        jobs: int,
+        make_engine_manager: Callable[[], EngineManager]):
+    """
+    Run all engine sessions of `suite` on `jobs` isolated engine instances.
+
+    Parameters:
+        suite (TestSuite): The suite to run; its tests are replaced by the
+            finished tests returned from the workers.
+        jobs (int): Number of worker processes (and engine instances).
+        make_engine_manager: Picklable callable() -> EngineManager, invoked
+            once in every worker.
+    """
+    executor = _make_executor(suite, jobs, make_engine_manager)
+    try:
+        # Longest first, so no long session is left for the end (see
+        # scheduling.py); every idle worker takes the next session.
+        futures = {
+            executor.submit(_run_session, graph_key, parts): (graph_key, parts)
+            for graph_key, parts in suite.scheduled_sessions()
+        }
+        for future in as_completed(futures):
+            graph_key, parts = futures[future]
+            finished_parts, durations = future.result()
+            suite.group_durations[suite.session_identity(graph_key, parts)] = durations
+            for category, finished in finished_parts:
+                suite.put_finished_tests(category, graph_key, finished)
+                for test in finished:
+                    suite._report_test(test)
+        suite.skip_service_description_tests(suite.tests.get("service", {}))
+    except KeyboardInterrupt:
+        log.warning("Interrupted by user.")
+        suite.interrupted = True
+        executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        executor.shutdown(wait=True)
+
+
+def prebuild_parallel(
+        suite,
+        jobs: int,
+        make_engine_manager: Callable[[], EngineManager]) -> Tuple[int, int]:
+    """
+    Fill the index cache of `suite` using `jobs` isolated engine instances.
+
+    Returns:
+        (number of indexes available in the cache, number of failed builds)
+    """
+    executor = _make_executor(suite, jobs, make_engine_manager)
+    available = failed = 0
+    try:
+        futures = [
+            executor.submit(_prebuild_index, graph_paths)
+            for graph_paths in suite.index_graph_sets()
+        ]
+        for future in as_completed(futures):
+            if future.result():
+                available += 1
+            else:
+                failed += 1
+    except KeyboardInterrupt:
+        log.warning("Interrupted by user.")
+        executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        executor.shutdown(wait=True)
+    return available, failed
+
+
+def pipeline_cache_directory(config: Config) -> str:
+    """
+    Return the index cache run_pipelined uses if the run has none.
+
+    The leading dot keeps it out of the `rm -f <run_id>*` style cleanup of the
+    managers.
+    """
+    return os.path.abspath(f".{config.run_id}.pipeline-cache")
+
+
+def _prefetch_index(graph_paths: Tuple[Tuple[str, str], ...], key: str) -> bool:
+    """
+    Build one index in the worker, unless its cache key in the worker
+    differs from `key`, the one the parent will look up.
+    """
+    suite = _worker["suite"]
+    if suite._index_cache_key(graph_paths) != key:
+        # The index depends on the working directory or port (see
+        # IndexCache.key); the parent could not use it.
+        return False
+    return _prebuild_index(graph_paths)
+
+
+def run_pipelined(
+        suite,
+        make_engine_manager: Callable[[], EngineManager]):
+    """
+    Run all engine sessions of `suite` in order while one worker builds the
+    index of the next session.
+
+    The worker is slot 1 (port <port>+1, run id <run_id>-1, see
+    worker_config), so it does not collide with the engine of the running
+    session. Without --index-cache, a private cache in the working directory
+    is used and deleted afterwards. Engines without build_index run as with
+    TestSuite.run.
+    """
+    if not suite.engine_manager.supports_index_cache():
+        log.info(f"{type(suite.engine_manager).__name__} does not implement "
+                 "build_index; not building indexes ahead")
+        suite.run()
+        return
+    private_cache = suite.index_cache is None
+    if private_cache:
+        suite.index_cache = IndexCache(pipeline_cache_directory(suite.config))
+    sessions = suite.sessions()
+    graph_sets = [
+        suite.group_graph_paths(parts[0][0], graph_key)
+        for graph_key, parts in sessions
+    ]
+    keys = [suite._index_cache_key(graph_paths) for graph_paths in graph_sets]
+    # Sessions after the first whose index the worker builds ahead.
+    prefetched = set()
+    for i in range(1, len(sessions)):
+        if keys[i] is None:
+            continue
+        try:
+            if not location_dependent(graph_sets[i]):
+                prefetched.add(i)
+        except OSError:
+            pass
+    skipped = sum(key is not None for key in keys[1:]) - len(prefetched)
+    if skipped:
+        log.info(f"Not building {skipped} of {len(sessions) - 1} indexes ahead: "
+                 "they depend on the working directory and port of the run")
+    executor = _make_executor(suite, 1, make_engine_manager, first_index=1)
+    try:
+        prefetch = None
+        for i, (graph_key, parts) in enumerate(sessions):
+            if prefetch is not None:
+                # Started during the previous session; waiting for it is
+                # faster than building the index again.
+                prefetch.result()
+                prefetch = None
+            if i + 1 in prefetched:
+                prefetch = executor.submit(
+                    _prefetch_index, graph_sets[i + 1], keys[i + 1])
+            suite.run_session(graph_key, parts)
+            if private_cache and keys[i] is not None and keys[i] not in keys[i + 1:]:
+                suite.index_cache.discard(keys[i])
+        suite.close()
+        suite.skip_service_description_tests(suite.tests.get("service", {}))
+    except KeyboardInterrupt:
+        log.warning("Interrupted by user.")
+        suite.interrupted = True
+        suite.engine_manager.cleanup(suite.config)
+        suite.discard_index_snapshot()
+        executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        executor.shutdown(wait=True)
+        if private_cache:
+            shutil.rmtree(suite.index_cache.directory, ignore_errors=True)
+            suite.index_cache = None
@@ -221,34 +221,123 @@ def send_raw_http(
         connect_timeout: float = 5.0,
         idle_timeout: float = 10.0,
         total_timeout: float = 30.0) -> str:
+    """
+    Send a raw HTTP request and return the raw response.
+
+    The response is read until it is complete by its own framing (after the
+    headers of a HEAD, 1xx, 204 or 304 response, after Content-Length bytes or
+    after the last chunk), until the server closes the connection, or until
+    total_timeout seconds have passed. Interim 1xx responses stay part of the
+    returned text.
+    """
     body_bytes = request_body.encode(encoding)
     request_head = _set_content_length(request_head, len(body_bytes))
     request_head = _ensure_connection_close(request_head)
     request_bytes = request_head.encode('utf-8') + body_bytes
+    method = request_head.split(' ', 1)[0].upper()
     try:
         with socket.create_connection(
                 (server_address, port), timeout=connect_timeout) as sock:
             sock.settimeout(idle_timeout)
             sock.sendall(request_bytes)
-            response_chunks = []
-            start_time = time.monotonic()
+            response = bytearray()
+            deadline = time.monotonic() + total_timeout
             while True:
-                if time.monotonic() - start_time > total_timeout:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
                     break
+                sock.settimeout(min(idle_timeout, remaining))
                 try:
-                    chunk = sock.recv(4096)
+                    chunk = sock.recv(65536)
                 except socket.timeout:
                     continue
                 if not chunk:
                     break
-                response_chunks.append(chunk)
-            if not response_chunks:
+                response += chunk
+                end = _complete_response_length(response, method)
+                if end is not None:
+                    del response[end:]
+                    break
+            if not response:
                 return 'timed out waiting for response'
-            return b''.join(response_chunks).decode('utf-8')
+            return response.decode('utf-8')
     except Exception as e:
         return str(e)
 
 
+def _complete_response_length(response: bytes, method: str) -> Optional[int]:
+    """
+    Return the length of the complete HTTP response at the start of response,
+    or None if more of it is still to come or it ends when the connection is
+    closed.
+    """
+    start = 0
+    while True:
+        head_end = response.find(b'\r\n\r\n', start)
+        if head_end == -1:
+            return None
+        body_start = head_end + 4
+        lines = bytes(response[start:head_end]).decode('latin-1').split('\r\n')
+        match = re.match(r'HTTP/\S+\s+(\d{3})', lines[0])
+        if not match:
+            return None
+        status_code = int(match.group(1))
+        if 100 <= status_code < 200 and status_code != 101:
+            # An interim response; the final one follows.
+            start = body_start
+            continue
+        if (method == 'HEAD' or status_code < 200
+                or status_code in (204, 304)):
+            return body_start
+        headers: Dict[str, List[str]] = {}
+        for line in lines[1:]:
+            name, separator, value = line.partition(':')
+            if separator:
+                headers.setdefault(name.strip().lower(), []).append(value.strip())
+        codings = ','.join(headers.get('transfer-encoding', [])).lower()
+        if codings:
+            if codings.rsplit(',', 1)[-1].strip() == 'chunked':
+                return _chunked_body_end(response, body_start)
+            return None
+        if 'content-length' in headers:
+            try:
+                content_length = int(headers['content-length'][0])
+            except ValueError:
+                return None
+            end = body_start + content_length
+            return end if len(response) >= end else None
+        return None
+
+
+def _chunked_body_end(response: bytes, position: int) -> Optional[int]:
+    """
+    Return the end of the chunked body starting at position, after the last
+    chunk and the trailers, or None if it is not complete yet.
+    """
+    while True:
+        line_end = response.find(b'\r\n', position)
+        if line_end == -1:
+            return None
+        try:
+            chunk_size = int(bytes(response[position:line_end]).split(b';')[0], 16)
+        except ValueError:
+            return None
+        position = line_end + 2
+        if chunk_size == 0:
+            break
+        position += chunk_size + 2
+        if len(response) < position:
+            return None
+    # Trailer fields up to an empty line.
+    while True:
+        line_end = response.find(b'\r\n', position)
+        if line_end == -1:
+            return None
+        if line_end == position:
+            return position + 2
+        position = line_end + 2
+
+
 def _set_content_length(request_head: str, content_length: int) -> str:
     stripped_head = request_head
     if stripped_head.endswith('\r\n\r\n'):
@@ -296,7 +385,8 @@ def parse_chunked_body(response_body: str) -> str:
         # Parse chunk size (hexadecimal)
         chunk_size_str = response_body[i:rn_index]
         try:
-            chunk_size = int(chunk_size_str, 16)
+            # Ignore chunk extensions (";name=value").
+            chunk_size = int(chunk_size_str.split(';', 1)[0], 16)
         except ValueError:
             raise ValueError(f"Invalid chunk size: {chunk_size_str}")
 
@@ -2,7 +2,11 @@ from __future__ import annotations
 
 import json
 
+from sparql_conformance.expectations import default_directory
+from sparql_conformance.graph_compare import DEFAULT_BUDGET
 from sparql_conformance.runner import parse_test_suites
+from sparql_conformance.sharding import parse_shard
+from sparql_conformance.timeouts import parse_timeout_policy
 
 
 def qleverfile_args(all_args: dict[str, dict[str, tuple]]) -> None:
@@ -126,6 +130,136 @@ def qleverfile_args(all_args: dict[str, dict[str, tuple]]) -> None:
             "at the end."
         ),
     )
+    conformance["jobs"] = arg(
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "Number of engine instances that run graph groups in parallel "
+            "(default: 1). Worker i uses port <port>+i, run id <name>-i and "
+            "its own working directory."
+        ),
+    )
+    conformance["durations_from"] = arg(
+        "--durations-from",
+        type=str,
+        default=None,
+        help=(
+            "Result file whose recorded graph group durations order the "
+            "groups of a --jobs run, longest first (default: the previous "
+            "<results_dir>/<name>.json.bz2, if any)."
+        ),
+    )
+    conformance["request_concurrency"] = arg(
+        "--request-concurrency",
+        type=int,
+        default=1,
+        help=(
+            "Number of query and syntax test requests sent to the engine at "
+            "once (default: 1). Used for QLever and Oxigraph."
+        ),
+    )
+    conformance["timeout"] = arg(
+        "--timeout",
+        type=parse_timeout_policy,
+        default=None,
+        help=(
+            "Deadline of every query and update in seconds, or a JSON object "
+            'like {"default": 60, "categories": {"update": 120}, '
+            '"tests": {"pp37": 300}}. A test that passes its deadline fails '
+            "with a timeout and the engine is restarted (default: none)."
+        ),
+    )
+    conformance["comparison_budget"] = arg(
+        "--comparison-budget",
+        type=float,
+        default=DEFAULT_BUDGET,
+        help=(
+            "Seconds one comparison of an expected and an actual graph may "
+            "take. A test whose comparison takes longer is not tested "
+            f"(default: {DEFAULT_BUDGET:g})."
+        ),
+    )
+    conformance["compact_passing"] = arg(
+        "--compact-passing",
+        action="store_true",
+        default=False,
+        help=(
+            "Store only the SHA-256 hashes of the queries, results and logs "
+            "of passing tests in the result file."
+        ),
+    )
+    conformance["pipeline"] = arg(
+        "--pipeline",
+        action="store_true",
+        default=False,
+        help=(
+            "Build the index of the next graph group in a background worker "
+            "(port <port>+1) while the current group runs. Ignored with "
+            "--jobs > 1."
+        ),
+    )
+    conformance["hot_swap"] = arg(
+        "--hot-swap",
+        action="store_true",
+        default=False,
+        help=(
+            "Keep the server running between query groups and swap the data "
+            "in place instead of restarting it (Jena and GraphDB; other "
+            "engines are restarted as usual)."
+        ),
+    )
+    conformance["resume"] = arg(
+        "--resume",
+        action="store_true",
+        default=False,
+        help=(
+            "Continue an interrupted run with the same name: tests recorded "
+            "in the journal <results_dir>/<name>.journal.jsonl are not run "
+            "again."
+        ),
+    )
+    conformance["changed_only"] = arg(
+        "--changed-only",
+        type=str,
+        default=None,
+        help=(
+            "Path to a previous <name>.json.bz2 run: only run tests whose "
+            "inputs or engine version changed since, and copy the other "
+            "results from it."
+        ),
+    )
+    conformance["shard"] = arg(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        help=(
+            "Only run shard i/N (1 <= i <= N) of every suite, e.g. on one of "
+            "N CI machines. Combine the result files with the `merge` "
+            "command."
+        ),
+    )
+    conformance["expectation_cache"] = arg(
+        "--expectation-cache",
+        type=str,
+        default=default_directory(),
+        help=(
+            "Directory of the on-disk cache of parsed manifests, expected "
+            "results and staged graph files, shared by all runs and engines "
+            "(default: "
+            "~/.cache/sparql-conformance/expectations)."
+        ),
+    )
+    conformance["index_cache"] = arg(
+        "--index-cache",
+        type=str,
+        default=None,
+        help=(
+            "Directory of the on-disk index cache. Prebuilt indexes are "
+            "restored instead of rebuilt; fill it ahead of time with the "
+            "`prebuild` command."
+        ),
+    )
 
     # ------------------------------------------------------ per-engine image args
     from qvirtuoso.commands.setup_config import (
@@ -1,17 +1,67 @@
+import hashlib
 import rdflib
-from rdflib.compare import isomorphic
+from sparql_conformance.expectations import cached, graph_from_state, graph_state
+from sparql_conformance.graph_compare import (
+    DEFAULT_BUDGET, ComparisonBudgetExceeded, graphs_isomorphic)
+from sparql_conformance.html_diff import UnrenderedResult
 from sparql_conformance.test_object import Status, ErrorMessage
 import os
 import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+from sparql_conformance.staging import stage_file
 from sparql_conformance.util import escape
 
 
-def rdf_xml_to_turtle(file_path, public_id) -> str:
+def _rdf_xml_base(file_path, public_id) -> str:
+    # Without a public id, relative IRIs resolve against the file's location.
+    return str(public_id) if public_id else Path(file_path).resolve().as_uri()
+
+
+def _turtle_from_rdf_xml(content: bytes, base: str) -> str:
     graph = rdflib.Graph()
-    graph.parse(file_path, format="xml", publicID=public_id)
+    graph.parse(data=content, format="xml", publicID=base)
     return graph.serialize(format="turtle")
 
 
+def rdf_xml_to_turtle(file_path, public_id) -> str:
+    with open(file_path, "rb") as f:
+        content = f.read()
+    base = _rdf_xml_base(file_path, public_id)
+    return cached(
+        "rdf-xml-as-turtle", hashlib.sha256(content).hexdigest(), (base,),
+        lambda: _turtle_from_rdf_xml(content, base))
+
+
+def stage_rdf_xml_as_turtle(file_path, public_id, destination):
+    """Stage the RDF/XML file converted to Turtle at destination (see staging.py)."""
+    base = _rdf_xml_base(file_path, public_id)
+    with open(file_path, "rb") as f:
+        content = f.read()
+    stage_file(
+        str(destination), "rdf-xml-as-turtle", content, (base,),
+        lambda data: _turtle_from_rdf_xml(data, base).encode("utf-8"))
+
+
+def turtle_to_trig(turtle_data: str, graph_name: str, public_id: Optional[str] = None) -> str:
+    """Return the Turtle data as TriG, with all triples in the named graph."""
+    def convert() -> str:
+        graph = rdflib.Graph()
+        graph.parse(data=turtle_data, format="turtle", publicID=public_id)
+        dataset = rdflib.ConjunctiveGraph()
+        context = dataset.get_context(rdflib.URIRef(graph_name))
+        for triple in graph:
+            context.add(triple)
+        return str(dataset.serialize(format="trig"))
+
+    # Without a public id, rdflib resolves relative IRIs against the working
+    # directory.
+    params = (graph_name, public_id) if public_id else (
+        graph_name, "", Path.cwd().as_uri())
+    return cached("turtle-as-trig", turtle_data, params, convert)
+
+
 def remove_prefix(turtle_string: str) -> str:
     return "\n".join(
         line for line in turtle_string.split("\n")
@@ -20,6 +70,8 @@ def remove_prefix(turtle_string: str) -> str:
 
 
 def write_ttl_file(name: str, ttl_string: str):
+    # A staged file may be a read-only hard link into the staging store.
+    delete_ttl_file(name)
     with open(name, "w", encoding="utf-8") as f:
         f.write(ttl_string)
 
@@ -37,21 +89,23 @@ def replace_empty_base_iri(
 ):
     """
     Replace `<>` with `<replacement_uri>` in a TTL/TriG/N3 file.
-    Writes a temp file `_{prefix}_{src.name}` in workdir if replacement is needed.
+    Stages a read-only file `_{prefix}_{src.name}` in workdir if replacement
+    is needed (see staging.py).
     Returns (temp_filename, temp_path) or (None, None) if unchanged.
     """
-    from pathlib import Path
     src = Path(src)
     workdir = Path(workdir)
     if src.suffix not in (".ttl", ".trig", ".n3"):
         return None, None
-    raw = src.read_text(encoding="utf-8")
-    if "<>" not in raw:
+    raw = src.read_bytes()
+    if b"<>" not in raw:
         return None, None
-    processed = raw.replace("<>", f"<{replacement_uri}>")
     temp_name = f"_{prefix}_{src.name}"
     temp_path = workdir / temp_name
-    temp_path.write_text(processed, encoding="utf-8")
+    stage_file(
+        str(temp_path), "replace-empty-base-iri", raw, (replacement_uri,),
+        lambda content: content.decode("utf-8").replace(
+            "<>", f"<{replacement_uri}>").encode("utf-8"))
     return temp_name, temp_path
 
 
@@ -63,7 +117,14 @@ def copy_namespaces(source_graph, target_graph):
 def highlight_differences(turtle_data, diff):
     # Serialize the main graph to turtle (escaped for HTML rendering)
     serialized_turtle = escape(turtle_data.serialize(format="turtle"))
-    
+
+    # The serializer writes one block per subject, ending in " ." and a blank
+    # line.
+    # Each triple is only searched for in the block of its subject, so the
+    # cost grows with the size of the diff, not with diff x graph size.
+    # Triples whose subject does not start a block (e.g. blank nodes) are
+    # searched for in the whole text.
+    patterns_by_subject = defaultdict(list)
     for s, p, o in diff:
         s_prefixed = s.n3(namespace_manager=turtle_data.namespace_manager)
         p_prefixed = p.n3(namespace_manager=turtle_data.namespace_manager)
@@ -76,35 +137,89 @@ def highlight_differences(turtle_data, diff):
 
         # This matches the whole line of the triple.
         pattern = rf"{s_escaped}(?:[^.]*?)?{p_escaped}\s+(?:[^.]*?){o_escaped}[^.]*?\s+\.(?!</label>)"
+        # A literal with a block end in it spans two blocks.
+        subject = escape(s_prefixed) if " .\n\n" not in o_prefixed else None
+        patterns_by_subject[subject].append(pattern)
 
-        def replace_first_match(match):
-            return f'<label class="red">{match.group()}</label>'
+    def replace_first_match(match):
+        return f'<label class="red">{match.group()}</label>'
 
-        serialized_turtle = re.sub(
-            pattern,
-            replace_first_match,
-            serialized_turtle,
-            flags=re.DOTALL
-        )
+    def highlight(text, patterns):
+        for pattern in patterns:
+            text = re.sub(pattern, replace_first_match, text, flags=re.DOTALL)
+        return text
+
+    blocks = re.split(r"(?<= \.)\n\n", serialized_turtle)
+    highlighted = set()
+    for index, block in enumerate(blocks):
+        head = block.split(None, 1)
+        if head and head[0] in patterns_by_subject:
+            blocks[index] = highlight(block, patterns_by_subject[head[0]])
+            highlighted.add(head[0])
+    serialized_turtle = "\n\n".join(blocks)
+    for subject, patterns in patterns_by_subject.items():
+        if subject not in highlighted:
+            serialized_turtle = highlight(serialized_turtle, patterns)
 
     return serialized_turtle
 
-def compare_ttl(expected_ttl: str, query_ttl: str) -> tuple:
+# Prefixes some expected results use without declaring them.
+_FALLBACK_PREFIXES = '@prefix foaf: <http://xmlns.com/foaf/0.1/> .\n@prefix v: <http://www.w3.org/2006/vcard/ns#> .\n\n'
+
+
+def parse_expected_ttl(expected_ttl: str) -> tuple:
+    """
+    Parses an expected Turtle graph, with _FALLBACK_PREFIXES if it does not
+    parse without. The parse is cached and the graph shared, see
+    expectations.py.
+
+    Returns:
+        (rdflib.Graph, str): The graph and the Turtle that was parsed.
+    """
+    def parse():
+        graph = rdflib.Graph()
+        try:
+            graph.parse(data=expected_ttl, format="turtle")
+            return graph, False
+        except Exception:
+            graph = rdflib.Graph()
+            graph.parse(data=_FALLBACK_PREFIXES + expected_ttl, format="turtle")
+            return graph, True
+
+    graph, prefixed = cached(
+        "turtle", expected_ttl, (), parse,
+        lambda value: (graph_state(value[0]), value[1]),
+        lambda value: (graph_from_state(value[0]), value[1]),
+    )
+    if prefixed:
+        expected_ttl = _FALLBACK_PREFIXES + expected_ttl
+    return graph, expected_ttl
+
+
+def compare_ttl(
+        expected_ttl: str,
+        query_ttl: str,
+        budget: float = DEFAULT_BUDGET,
+        render: bool = True) -> tuple:
+    """
+    Compares two Turtle graphs up to blank node labels.
+
+    If the comparison takes longer than budget seconds, the graphs count as
+    not tested with ErrorMessage.COMPARISON_BUDGET_EXCEEDED. If render is
+    False, the HTML strings are empty, and the result of graphs that differ
+    is an UnrenderedResult that renders them from the parsed graphs.
+    """
     status = Status.FAILED
     error_type = ErrorMessage.RESULTS_NOT_THE_SAME
-    expected_graph = rdflib.Graph()
     query_graph = rdflib.Graph()
     try:
-        expected_graph.parse(data=expected_ttl, format="turtle")
-    except Exception:
-        expected_ttl = '@prefix foaf: <http://xmlns.com/foaf/0.1/> .\n@prefix v: <http://www.w3.org/2006/vcard/ns#> .\n\n' + expected_ttl
-        try:
-            expected_graph.parse(data=expected_ttl, format="turtle")
-        except Exception as e:
-            error_type = ErrorMessage.FORMAT_ERROR
-            escaped_expected = f'<label class="red">{escape(expected_ttl)}</label>'
-            return Status.NOT_TESTED, error_type, escaped_expected, escape(query_ttl), f'<label class="red">{e}</label>', escape(
-                query_ttl)
+        expected_graph, expected_ttl = parse_expected_ttl(expected_ttl)
+    except Exception as e:
+        expected_ttl = _FALLBACK_PREFIXES + expected_ttl
+        error_type = ErrorMessage.FORMAT_ERROR
+        escaped_expected = f'<label class="red">{escape(expected_ttl)}</label>'
+        return Status.NOT_TESTED, error_type, escaped_expected, escape(query_ttl), f'<label class="red">{e}</label>', escape(
+            query_ttl)
 
     try:
         query_graph.parse(data=query_ttl, format="turtle")
@@ -115,15 +230,19 @@ def compare_ttl(expected_ttl: str, query_ttl: str) -> tuple:
         return status, error_type, escape(
             expected_ttl), escaped_query, escaped_expected, f'<label class="red">{e}</label>'
 
-    is_isomorphic = isomorphic(expected_graph, query_graph)
+    try:
+        is_isomorphic = graphs_isomorphic(expected_graph, query_graph, budget)
+    except ComparisonBudgetExceeded:
+        message = f"Comparison did not finish within {budget:g} seconds."
+        return (Status.NOT_TESTED, ErrorMessage.COMPARISON_BUDGET_EXCEEDED,
+                escape(expected_ttl), escape(query_ttl),
+                f'<label class="red">{message}</label>', f'<label class="red">{message}</label>')
     if is_isomorphic:
-        status = Status.PASSED
-        error_type = ""
-        expected_string = escape(expected_ttl)
-        query_string = escape(query_ttl)
-        expected_string_red = ""
-        query_string_red = ""
-    else:
+        if not render:
+            return Status.PASSED, "", "", "", "", ""
+        return Status.PASSED, "", escape(expected_ttl), escape(query_ttl), "", ""
+
+    def render_html() -> tuple:
         triples_in_expected_not_in_query = expected_graph - query_graph
         triples_in_query_not_in_expected = query_graph - expected_graph
 
@@ -145,5 +264,8 @@ def compare_ttl(expected_ttl: str, query_ttl: str) -> tuple:
                     format="turtle")))
         expected_string_red = f'<label class="red">{no_prefix_escaped_expected}</label>'
         query_string_red = f'<label class="red">{no_prefix_escaped_query}</label>'
+        return expected_string, query_string, expected_string_red, query_string_red
 
-    return status, error_type, expected_string, query_string, expected_string_red, query_string_red
+    if not render:
+        return UnrenderedResult(status, error_type, render_html)
+    return (status, error_type, *render_html())
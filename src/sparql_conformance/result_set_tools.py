@@ -2,13 +2,15 @@
 
 from collections import Counter
 from dataclasses import dataclass
-import math
 import xml.etree.ElementTree as ET
 from typing import Callable, Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
 
 import rdflib
 from rdflib.plugins.sparql.parser import parseQuery
 
+from sparql_conformance.expectations import cached, cached_graph
+from sparql_conformance.solution_keys import datatype_classes, numeric_key
+
 
 SPARQL_RESULTS_NS = "http://www.w3.org/2005/sparql-results#"
 RESULT_SET = rdflib.Namespace(
@@ -140,17 +142,42 @@ def parse_expected_rdf(
     rdf_format: str,
     public_id: str | None = None,
 ) -> rdflib.Graph:
-    """Parse an RDF expectation using the format implied by its extension."""
+    """
+    Parse an RDF expectation using the format implied by its extension.
+
+    The parse is cached and the graph shared, so it must not be modified;
+    see expectations.py.
+    """
     formats = {"rdf": "xml", "ttl": "turtle"}
     if rdf_format not in formats:
         raise ValueError(f"Unsupported RDF expectation format: {rdf_format}")
-    graph = rdflib.Graph()
-    graph.parse(
-        data=rdf_string,
-        format=formats[rdf_format],
-        publicID=public_id,
+
+    def parse():
+        graph = rdflib.Graph()
+        graph.parse(
+            data=rdf_string,
+            format=formats[rdf_format],
+            publicID=public_id,
+        )
+        return graph
+
+    return cached_graph(
+        "rdf", rdf_string, (rdf_format, public_id or ""), parse)
+
+
+def expected_rdf_as_turtle(
+    rdf_string: str,
+    rdf_format: str,
+    public_id: str | None = None,
+) -> str:
+    """Return an RDF expectation serialized as Turtle (cached)."""
+    return cached(
+        "rdf-as-turtle",
+        rdf_string,
+        (rdf_format, public_id or ""),
+        lambda: parse_expected_rdf(
+            rdf_string, rdf_format, public_id).serialize(format="turtle"),
     )
-    return graph
 
 
 def is_result_set_graph(graph: rdflib.Graph) -> bool:
@@ -166,11 +193,32 @@ def expected_is_result_set(
     """Return whether a Turtle or RDF/XML expectation is an RDF result set."""
     if rdf_format not in ("rdf", "ttl"):
         return False
-    return is_result_set_graph(
-        parse_expected_rdf(rdf_string, rdf_format, public_id)
+    return cached(
+        "is-result-set",
+        rdf_string,
+        (rdf_format, public_id or ""),
+        lambda: is_result_set_graph(
+            parse_expected_rdf(rdf_string, rdf_format, public_id)),
     )
 
 
+def _parse_expected_result_set(
+    rdf_string: str,
+    rdf_format: str,
+    public_id: str | None = None,
+) -> Optional[_ResultSetValue]:
+    """Return the result set of an RDF expectation (cached), or None."""
+
+    def parse():
+        graph = parse_expected_rdf(rdf_string, rdf_format, public_id)
+        if not is_result_set_graph(graph):
+            return None
+        return _parse_result_set_graph(graph)
+
+    return cached(
+        "result-set", rdf_string, (rdf_format, public_id or ""), parse)
+
+
 def _expected_solution_index(
     graph: rdflib.Graph,
     solution: RdfTerm,
@@ -307,24 +355,7 @@ def _alias_term_key(
     number_types: Iterable[str],
 ) -> TermKey:
     """Build a key function that applies configured datatype aliases."""
-    parents: Dict[Optional[str], Optional[str]] = {}
-
-    def find(value: Optional[str]) -> Optional[str]:
-        parents.setdefault(value, value)
-        parent = parents[value]
-        if parent != value:
-            parents[value] = find(parent)
-        return parents[value]
-
-    def union(left: Optional[str], right: Optional[str]) -> None:
-        left_root = find(left)
-        right_root = find(right)
-        if left_root != right_root:
-            parents[right_root] = left_root
-
-    for left, right in alias:
-        union(left, right)
-
+    find = datatype_classes(alias)
     numeric_datatypes = frozenset(number_types)
 
     def term_key(value: RdfTerm) -> Hashable:
@@ -334,16 +365,7 @@ def _alias_term_key(
         canonical_datatype = find(datatype)
         lexical_value: Hashable = str(value)
         if datatype in numeric_datatypes:
-            try:
-                numeric_value = float(str(value))
-                if math.isnan(numeric_value):
-                    lexical_value = ("nan",)
-                elif math.isinf(numeric_value):
-                    lexical_value = ("infinity", numeric_value > 0)
-                else:
-                    lexical_value = numeric_value
-            except ValueError:
-                pass
+            lexical_value = numeric_key(lexical_value)
         return (
             "literal",
             canonical_datatype,
@@ -535,60 +557,61 @@ def compare_rdf_result_set(
     public_id: str | None = None,
     alias: Iterable[Tuple[Optional[str], Optional[str]]] = (),
     number_types: Iterable[str] = (),
+    render: bool = True,
 ) -> tuple:
-    """Compare an RDF result-set expectation with SPARQL Results XML."""
+    """
+    Compare an RDF result-set expectation with SPARQL Results XML.
+
+    If ``render`` is false, the HTML strings of the result are empty, and a
+    result that is not passed is an ``UnrenderedResult`` that renders them
+    from the parsed result sets.
+    """
+    from sparql_conformance.html_diff import UnrenderedResult
     from sparql_conformance.test_object import ErrorMessage, Status
     from sparql_conformance.util import escape
 
-    expected_graph = parse_expected_rdf(
+    expected = _parse_expected_result_set(
         expected_rdf,
         expected_format,
         public_id,
     )
-    if not is_result_set_graph(expected_graph):
+    if expected is None:
         raise ValueError("Expected RDF graph is not an rs:ResultSet.")
 
-    expected = _parse_result_set_graph(expected_graph)
     actual_graph = rdflib.Graph()
     actual_graph.parse(
         data=sparql_xml_to_result_set_ttl(actual_xml),
         format="turtle",
     )
     actual = _parse_result_set_graph(actual_graph, ordered=expected.ordered)
-    actual_turtle = _actual_result_turtle(actual_graph, expected.ordered)
     if _result_sets_equal(expected, actual):
-        return (
-            Status.PASSED,
-            "",
-            escape(expected_rdf),
-            escape(actual_turtle),
-            "",
-            "",
-        )
-
-    if alias and _result_sets_equal(
+        status, error_type, label = Status.PASSED, "", None
+    elif alias and _result_sets_equal(
         expected,
         actual,
         _alias_term_key(alias, number_types),
     ):
+        status, error_type, label = (
+            Status.INTENDED, ErrorMessage.INTENDED_MSG, "yellow")
+    else:
+        status, error_type, label = (
+            Status.FAILED, ErrorMessage.RESULTS_NOT_THE_SAME, "red")
+
+    def render_html() -> tuple:
+        actual_turtle = _actual_result_turtle(actual_graph, expected.ordered)
+        if label is None:
+            return escape(expected_rdf), escape(actual_turtle), "", ""
         expected_summary = escape(_describe_result_set(expected))
         actual_summary = escape(_describe_result_set(actual))
         return (
-            Status.INTENDED,
-            ErrorMessage.INTENDED_MSG,
             escape(expected_rdf),
             escape(actual_turtle),
-            f'<label class="yellow">{expected_summary}</label>',
-            f'<label class="yellow">{actual_summary}</label>',
+            f'<label class="{label}">{expected_summary}</label>',
+            f'<label class="{label}">{actual_summary}</label>',
         )
 
-    expected_summary = escape(_describe_result_set(expected))
-    actual_summary = escape(_describe_result_set(actual))
-    return (
-        Status.FAILED,
-        ErrorMessage.RESULTS_NOT_THE_SAME,
-        escape(expected_rdf),
-        escape(actual_turtle),
-        f'<label class="red">{expected_summary}</label>',
-        f'<label class="red">{actual_summary}</label>',
-    )
+    if not render:
+        if label is None:
+            return status, error_type, "", "", "", ""
+        return UnrenderedResult(status, error_type, render_html)
+    return (status, error_type, *render_html())
@@ -5,7 +5,18 @@ import json
 import os
 
 from sparql_conformance import console_report
+from sparql_conformance.expectations import use_directory
 from sparql_conformance.extract_tests import extract_tests
+from sparql_conformance.graph_compare import DEFAULT_BUDGET
+from sparql_conformance.index_cache import IndexCache
+from sparql_conformance.journal import Journal, journal_path
+from sparql_conformance.parallel import (
+    prebuild_parallel,
+    run_parallel,
+    run_pipelined,
+)
+from sparql_conformance.scheduling import read_history
+from sparql_conformance.sharding import merge_results
 from sparql_conformance.testsuite import TestSuite
 
 
@@ -55,8 +66,24 @@ def assemble_suites(test_suites):
     return list(test_suites.items())
 
 
+def _read_history(path):
+    """Load the result file with the recorded group durations, if usable."""
+    if not os.path.isfile(path):
+        return None
+    try:
+        return console_report.read_json_bz2(path)
+    except (OSError, EOFError, ValueError) as e:
+        print(f"Not using the group durations in {path}: {e}")
+        return None
+
+
 def run_suites(active_suites, make_config, make_engine_manager, name,
-               results_dir, report_mode, compare_to=None):
+               results_dir, report_mode, compare_to=None, jobs=1,
+               index_cache=None, hot_swap=False, resume=False,
+               changed_only=None, shard=None, request_concurrency=1,
+               timeout_policy=None, comparison_budget=DEFAULT_BUDGET,
+               compact_passing=False, pipeline=False, durations_from=None,
+               expectation_cache=None):
     """Run each suite and write one combined v2 result file.
 
     Parameters:
@@ -67,9 +94,40 @@ def run_suites(active_suites, make_config, make_engine_manager, name,
         results_dir: directory for the output file.
         report_mode: "none", "summary" or "line".
         compare_to: optional path to a previous run to diff against.
+        jobs: number of engine instances that run graph groups in parallel.
+            With jobs > 1, make_engine_manager must be picklable because
+            every worker process creates its own engine manager.
+        index_cache: optional directory of the on-disk index cache.
+        hot_swap: swap the data of a running server between read-only
+            sessions instead of restarting it (EngineManager.load_dataset).
+        resume: take the results of the tests in the journal
+            <results_dir>/<name>.journal.jsonl of an interrupted run with the
+            same name and only run the remaining tests.
+        changed_only: optional path to a previous result file; tests whose
+            fingerprint is unchanged since then are not run, their results
+            are copied from it.
+        shard: optional (i, N); only run shard i of N of every suite (see
+            sharding.py). The result file records the shard for merge_runs.
+        request_concurrency: number of requests of read-only tests sent to
+            an engine at once, if it supports concurrent requests.
+        timeout_policy: optional TimeoutPolicy; a test whose request passes
+            its deadline fails with a timeout and the engine is restarted.
+        comparison_budget: seconds one comparison of an expected and an
+            actual graph may take (see graph_compare.py).
+        compact_passing: store only the hashes of the payloads of passing
+            tests in the result file (see TestObject.to_dict).
+        pipeline: with jobs == 1, build the index of the next graph group in
+            a background worker while the current group runs.
+        durations_from: optional result file whose recorded group durations
+            order the groups of a parallel run (see scheduling.py); default:
+            the previous <results_dir>/<name>.json.bz2, if any.
+        expectation_cache: optional directory of the on-disk cache of parsed
+            manifests and expected results (see expectations.py); without
+            it, they are only cached in memory.
 
     Returns the v2 results dict that was written.
     """
+    use_directory(expectation_cache)
     suites_data = {}
     total_info = {
         "passed": 0,
@@ -79,11 +137,20 @@ def run_suites(active_suites, make_config, make_engine_manager, name,
         "notTested": 0,
     }
     last_suite = None
+    interrupted = False
+    path = journal_path(results_dir, name)
+    if not resume and os.path.exists(path):
+        os.remove(path)
+    history = _read_history(
+        durations_from or os.path.join(results_dir, f"{name}.json.bz2"))
+    baseline_suites = {}
+    if changed_only:
+        baseline_suites = console_report.read_json_bz2(changed_only).get("suites", {})
 
     for suite_key, suite_dir in active_suites:
         print(f"Running suite '{suite_key}' from {suite_dir}...")
         config = make_config(suite_dir)
-        tests, test_count = extract_tests(config)
+        tests, test_count = extract_tests(config, jobs=os.cpu_count() or 1)
         suite = TestSuite(
             name=name,
             tests=tests,
@@ -92,24 +159,60 @@ def run_suites(active_suites, make_config, make_engine_manager, name,
             engine_manager=make_engine_manager(),
             results_dir=results_dir,
             report_mode=report_mode,
+            index_cache=IndexCache(index_cache) if index_cache else None,
+            hot_swap=hot_swap,
+            journal=Journal(path, suite_key),
+            request_concurrency=request_concurrency,
+            timeout_policy=timeout_policy,
+            comparison_budget=comparison_budget,
+            compact_passing=compact_passing,
         )
-        suite.run()
+        suite.schedule(read_history(history, suite_key))
+        if shard:
+            suite.restrict_to_shard(*shard)
+        fingerprinted = suite.fingerprint_tests()
+        if resume:
+            print(f"Resuming: {suite.resume()} tests of suite '{suite_key}' "
+                  "taken from the journal.")
+        if changed_only and fingerprinted:
+            baseline_tests = baseline_suites.get(suite_key, {}).get("tests", {})
+            print(f"{suite.reuse_baseline(baseline_tests)} unchanged tests of "
+                  f"suite '{suite_key}' taken from {changed_only}.")
+        if jobs > 1:
+            run_parallel(suite, jobs, make_engine_manager)
+        elif pipeline:
+            run_pipelined(suite, make_engine_manager)
+        else:
+            suite.run()
         tests_dict, info_dict = suite.build_results_dict()
-        suites_data[suite_key] = {"tests": tests_dict, "info": info_dict}
+        suites_data[suite_key] = {
+            "tests": tests_dict,
+            "info": info_dict,
+            "groups": suite.group_durations,
+        }
         for key in total_info:
             total_info[key] += info_dict[key]
         last_suite = suite
+        if suite.interrupted:
+            interrupted = True
+            break
 
     output = {
         "version": 2,
         "suites": suites_data,
         "info": {"name": "info", **total_info},
     }
+    if shard:
+        output["shard"] = {"index": shard[0], "count": shard[1]}
 
     os.makedirs(results_dir, exist_ok=True)
     last_suite.compress_json_bz2(
         output, os.path.join(results_dir, f"{name}.json.bz2")
     )
+    if interrupted:
+        print(f"Run interrupted; continue it with --resume (journal: {path}).")
+    else:
+        last_suite.journal.delete()
     print("Finished!")
 
     if report_mode != "none":
@@ -123,3 +226,60 @@ def run_suites(active_suites, make_config, make_engine_manager, name,
         )
 
     return output
+
+
+def prebuild_suites(active_suites, make_config, make_engine_manager, name,
+                    index_cache, jobs=1):
+    """Build the indexes of every graph group into the index cache.
+
+    Parameters are as for run_suites; index_cache is the cache directory.
+
+    Returns True if every index is available in the cache afterwards.
+    """
+    all_available = True
+    for suite_key, suite_dir in active_suites:
+        print(f"Prebuilding indexes for suite '{suite_key}' from {suite_dir}...")
+        config = make_config(suite_dir)
+        tests, test_count = extract_tests(config, jobs=os.cpu_count() or 1)
+        suite = TestSuite(
+            name=name,
+            tests=tests,
+            test_count=test_count,
+            config=config,
+            engine_manager=make_engine_manager(),
+            index_cache=IndexCache(index_cache),
+        )
+        if not suite.engine_manager.supports_index_cache():
+            print(
+                f"{type(suite.engine_manager).__name__} does not support the "
+                "index cache (EngineManager.build_index); nothing to prebuild."
+            )
+            return False
+        if jobs > 1:
+            available, failed = prebuild_parallel(
+                suite, jobs, make_engine_manager)
+        else:
+            available, failed = suite.prebuild()
+        print(f"{available} indexes in the cache, {failed} failed.")
+        all_available = all_available and failed == 0
+    print("Finished!")
+    return all_available
+
+
+def merge_runs(result_files, name, results_dir, report_mode="none"):
+    """Merge the result files of the shards of one run into <name>.json.bz2.
+
+    Raises ValueError if the files are not the shards of one run.
+
+    Returns the merged v2 results dict that was written.
+    """
+    output = merge_results(
+        [console_report.read_json_bz2(path) for path in result_files])
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"{name}.json.bz2")
+    console_report.write_json_bz2(output, path)
+    print(f"Merged {len(result_files)} result files into {path}.")
+    if report_mode != "none":
+        console_report.print_summary(output["info"], output["suites"])
+        console_report.print_failures(output["suites"])
+    return output
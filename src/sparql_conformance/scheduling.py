@@ -0,0 +1,126 @@
+"""Order engine sessions by their expected duration.
+
+With ``--jobs N`` every idle worker takes the next session. In the insertion
+order of the manifests, a long session that comes last keeps one worker busy
+while the others are idle. ``TestSuite.schedule`` therefore orders the
+sessions longest first (LPT), which keeps the total run time close to the
+best possible for N workers.
+
+Every result file records, per suite, how long each session took in its
+``groups`` object, keyed by ``sharding.session_identity``::
+
+    "groups": {"query|data.ttl -": {"setup": 2.1, "tests": 0.8, "cleanup": 0.2,
+                                    "testCount": 12}}
+
+A later run reads these durations from ``--durations-from`` (by default the
+previous result file of the same name). Sessions without a recorded duration
+are estimated from the size of their graph files and their test count, scaled
+to the recorded sessions.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Estimate for sessions without history, in seconds: starting an engine, plus
+# indexing per MiB of data, plus answering one request.
+_BASE_SECONDS = 1.0
+_SECONDS_PER_MIB = 2.0
+_SECONDS_PER_TEST = 0.05
+
+PHASES = ("setup", "tests", "cleanup")
+
+
+class PhaseTimer:
+    """
+    Splits the wall-clock time of a session into phases. A nested phase
+    pauses the enclosing one, so no time is counted twice.
+    """
+
+    def __init__(self):
+        self.seconds = {phase: 0.0 for phase in PHASES}
+        self._stack: List[str] = []
+        self._since = 0.0
+
+    @contextmanager
+    def phase(self, name: str):
+        now = time.monotonic()
+        if self._stack:
+            self.seconds[self._stack[-1]] += now - self._since
+        self._stack.append(name)
+        self._since = now
+        try:
+            yield
+        finally:
+            now = time.monotonic()
+            self.seconds[self._stack.pop()] += now - self._since
+            self._since = now
+
+    def durations(self) -> Dict[str, float]:
+        """Return the seconds per phase, rounded to milliseconds."""
+        return {phase: round(seconds, 3) for phase, seconds in self.seconds.items()}
+
+
+def total_seconds(durations: dict) -> float:
+    """Return the duration of a session entry of the `groups` object."""
+    return sum(durations.get(phase, 0.0) for phase in PHASES)
+
+
+def heuristic_seconds(
+        graph_paths: Tuple[Tuple[str, str], ...],
+        test_count: int) -> float:
+    """Estimate the duration of a session nobody has timed yet."""
+    size = 0
+    for graph_path, _ in graph_paths:
+        try:
+            size += os.path.getsize(graph_path)
+        except OSError:
+            pass
+    return (_BASE_SECONDS + _SECONDS_PER_MIB * size / 2 ** 20
+            + _SECONDS_PER_TEST * test_count)
+
+
+def estimate_seconds(
+        sessions: List[Tuple[str, Tuple[Tuple[str, str], ...], int]],
+        history: Dict[str, dict]) -> List[float]:
+    """
+    Estimate the duration of (identity, graph_paths, test_count) sessions.
+
+    Recorded durations in history are used as they are. The heuristic
+    estimates of the other sessions are scaled by how far the heuristic was
+    off for the recorded ones, so both are in comparable units.
+    """
+    heuristics = [
+        heuristic_seconds(graph_paths, test_count)
+        for _, graph_paths, test_count in sessions
+    ]
+    recorded = [
+        total_seconds(history[identity]) if identity in history else None
+        for identity, _, _ in sessions
+    ]
+    known = [
+        (seconds, heuristic)
+        for seconds, heuristic in zip(recorded, heuristics)
+        if seconds is not None
+    ]
+    scale = 1.0
+    if known and sum(heuristic for _, heuristic in known) > 0:
+        scale = (sum(seconds for seconds, _ in known)
+                 / sum(heuristic for _, heuristic in known))
+    return [
+        seconds if seconds is not None else heuristic * scale
+        for seconds, heuristic in zip(recorded, heuristics)
+    ]
+
+
+def longest_first(estimates: List[float]) -> List[int]:
+    """Return the indices of estimates, longest first; ties keep their order."""
+    return sorted(range(len(estimates)), key=lambda i: -estimates[i])
+
+
+def read_history(results: Optional[dict], suite_key: str) -> Dict[str, dict]:
+    """Return the recorded session durations of suite_key in a result document."""
+    if not results:
+        return {}
+    return results.get("suites", {}).get(suite_key, {}).get("groups", {})
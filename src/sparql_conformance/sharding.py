@@ -0,0 +1,147 @@
+"""Split one conformance run across several machines and merge the results.
+
+``--shard i/N`` runs only the engine sessions (see ``TestSuite.sessions``) of
+shard i. Sessions are assigned to shards deterministically: heaviest (most
+tests) first, each to the shard with the fewest tests so far. Ties are broken
+by a machine-independent session identity (categories and graph file paths
+relative to the suite directory), so every node computes the same partition.
+
+Every shard writes a normal v2 result document with a ``shard`` field.
+``merge_results`` combines the shard documents into the document an unsharded
+run writes.
+"""
+
+import argparse
+import os
+from typing import Dict, List, Tuple
+
+from sparql_conformance.test_object import Status
+from sparql_conformance.util import escape
+
+_INFO_KEYS = ("passed", "tests", "failed", "passedFailed", "notTested")
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse "i/N" (1 <= i <= N) into (i, N)."""
+    index, _, count = value.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"must be of the form i/N, e.g. 1/4, not {value!r}") from None
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(
+            f"shard index must be between 1 and {count}, not {index}")
+    return index, count
+
+
+def session_identity(
+        graph_key: Tuple[Tuple[str, str], ...],
+        categories: List[str],
+        suite_dir: str) -> str:
+    """Return an identity of a session that is the same on every machine."""
+    paths = []
+    for graph_path, graph_name in graph_key:
+        relative = os.path.relpath(os.path.abspath(graph_path), suite_dir)
+        if relative.startswith(os.pardir):
+            # Harness data such as the empty fallback graph.
+            relative = os.path.basename(graph_path)
+        paths.append(f"{relative} {graph_name}")
+    return ",".join(categories) + "|" + "|".join(sorted(paths))
+
+
+def assign_shards(sessions: List[Tuple[str, int]], count: int) -> List[int]:
+    """
+    Assign (identity, weight) sessions to `count` shards.
+
+    Returns the shard (1-based) of every session, in the given order.
+    """
+    loads = [0] * count
+    shards = [0] * len(sessions)
+    order = sorted(
+        range(len(sessions)),
+        key=lambda i: (-sessions[i][1], sessions[i][0]),
+    )
+    for i in order:
+        shard = min(range(count), key=lambda s: (loads[s], s))
+        loads[shard] += sessions[i][1]
+        shards[i] = shard + 1
+    return shards
+
+
+def _count(tests: Dict[str, dict], tests_total: int) -> Dict[str, int]:
+    info = {key: 0 for key in _INFO_KEYS}
+    for test in tests.values():
+        match test.get("status"):
+            case Status.PASSED:
+                info["passed"] += 1
+            case Status.FAILED:
+                info["failed"] += 1
+            case Status.INTENDED:
+                info["passedFailed"] += 1
+    info["tests"] = tests_total
+    info["notTested"] = (
+        tests_total - info["passed"] - info["failed"] - info["passedFailed"])
+    return info
+
+
+def merge_results(documents: List[dict]) -> dict:
+    """
+    Combine the v2 result documents of the shards of one run.
+
+    Raises:
+        ValueError: If a document is not a v2 result, or the shards do not
+            belong together (different shard counts, a shard twice or missing).
+    """
+    shards = []
+    for document in documents:
+        if document.get("version") != 2:
+            raise ValueError("only version 2 result files can be merged")
+        if "shard" in document:
+            shards.append((document["shard"]["index"], document["shard"]["count"]))
+    if shards:
+        counts = {count for _, count in shards}
+        if len(counts) != 1 or len(shards) != len(documents):
+            raise ValueError("the result files are not shards of the same run")
+        count = counts.pop()
+        indices = sorted(index for index, _ in shards)
+        if indices != list(range(1, count + 1)):
+            missing = sorted(set(range(1, count + 1)) - set(indices))
+            raise ValueError(
+                f"expected shards 1 to {count} once each; "
+                f"missing {missing}, got {indices}")
+
+    suites = {}
+    totals = {}
+    groups = {}
+    for document in documents:
+        for suite_key, suite in document["suites"].items():
+            merged = suites.setdefault(suite_key, {})
+            totals[suite_key] = totals.get(suite_key, 0) + suite["info"]["tests"]
+            groups.setdefault(suite_key, {}).update(suite.get("groups", {}))
+            for name, test in suite["tests"].items():
+                if name in merged:
+                    # Same renaming as TestSuite.build_results_dict.
+                    i = 2
+                    while f"{name} {i}" in merged:
+                        i += 1
+                    name = f"{name} {i}"
+                    test = {**test, "name": escape(name)}
+                merged[name] = test
+
+    suites_data = {}
+    total_info = {key: 0 for key in _INFO_KEYS}
+    for suite_key, tests in suites.items():
+        info = _count(tests, totals[suite_key])
+        suites_data[suite_key] = {
+            "tests": tests,
+            "info": info,
+            "groups": groups[suite_key],
+        }
+        for key in _INFO_KEYS:
+            total_info[key] += info[key]
+    return {
+        "version": 2,
+        "suites": suites_data,
+        "info": {"name": "info", **total_info},
+    }
@@ -0,0 +1,248 @@
+"""Canonical keys for matching the solutions of two SPARQL result documents.
+
+Comparing every expected solution against every actual one is quadratic in
+the size of the result. Instead, the XML and JSON comparators reduce each
+solution to a hashable key in which values the comparators treat as equal
+coincide: numbers of the ``number_types`` by value, language tags without
+case, plain literals and ``xsd:string``, and, for the intended-behaviour pass,
+datatypes joined by the configured type aliases. Solutions without blank
+nodes are then matched by looking up their key, and only solutions with blank
+nodes are compared pairwise, against the solutions with the same key up to
+blank node labels. The search backtracks until it finds one blank node
+mapping under which all of them are paired, if there is one.
+"""
+
+import math
+from collections import defaultdict, deque
+from typing import (
+    Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, TypeVar)
+
+XSD_STRING = "http://www.w3.org/2001/XMLSchema#string"
+
+# Stands in for a blank node label in the key of a solution.
+BNODE = ("bnode",)
+
+# Steps the search for a complete blank node mapping may take before
+# match_rows keeps the pairing in document order.
+SEARCH_BUDGET = 100_000
+
+Row = TypeVar("Row")
+# Returns the key of a row and whether the row contains blank nodes.
+Signature = Callable[[Row], Tuple[Hashable, bool]]
+
+
+def datatype_classes(
+        alias: Iterable[Tuple[Optional[str], Optional[str]]]
+) -> Callable[[Optional[str]], Optional[str]]:
+    """
+    Return a function mapping a datatype to a representative of all datatypes
+    it is joined with by the alias pairs.
+    """
+    parents: Dict[Optional[str], Optional[str]] = {}
+
+    def find(value: Optional[str]) -> Optional[str]:
+        parents.setdefault(value, value)
+        parent = parents[value]
+        if parent != value:
+            parents[value] = find(parent)
+        return parents[value]
+
+    for left, right in alias:
+        left_root = find(left)
+        right_root = find(right)
+        if left_root != right_root:
+            parents[right_root] = left_root
+    return find
+
+
+def same_datatype(datatype: Optional[str]) -> Optional[str]:
+    """Datatype classes without aliases."""
+    return datatype
+
+
+def numeric_key(lexical: str) -> Hashable:
+    """Return the value of a numeric literal, or its lexical form if it has none."""
+    try:
+        value = float(lexical)
+    except (TypeError, ValueError):
+        return lexical
+    if math.isnan(value):
+        return ("nan",)
+    if math.isinf(value):
+        return ("infinity", value > 0)
+    return value
+
+
+def literal_key(
+        datatype: Optional[str],
+        language: Optional[str],
+        lexical: Optional[str],
+        datatype_class: Callable[[Optional[str]], Optional[str]],
+        number_types: Sequence[str]) -> Hashable:
+    """Return the key of a literal (or of any other node with these fields)."""
+    if datatype == XSD_STRING:
+        datatype = None
+    value = numeric_key(lexical) if datatype in number_types else lexical
+    return (
+        datatype_class(datatype),
+        language.lower() if language else None,
+        value,
+    )
+
+
+def same_bnode(label1: str, label2: str, mapping: dict) -> bool:
+    """
+    Return whether blank node label1 of the first document and label2 of the
+    second can be the same node under mapping, and record them if so.
+
+    The mapping keeps the labels of the two documents apart, so a document
+    may reuse the labels of the other one for other nodes.
+    """
+    mapped1 = mapping.get((1, label1))
+    mapped2 = mapping.get((2, label2))
+    if mapped1 is None and mapped2 is None:
+        mapping[(1, label1)] = label2
+        mapping[(2, label2)] = label1
+        return True
+    return mapped1 == label2 and mapped2 == label1
+
+
+class _Journal(dict):
+    """A blank node mapping that can undo the entries added since a mark."""
+
+    def __init__(self, mapping: dict):
+        super().__init__(mapping)
+        self.added: List[Hashable] = []
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self.added.append(key)
+        super().__setitem__(key, value)
+
+    def undo(self, mark: int):
+        while len(self.added) > mark:
+            del self[self.added.pop()]
+
+
+def _match_all(
+        rows1: List[Row],
+        rows2: List[Row],
+        items: List[Tuple[int, Hashable]],
+        candidates: Dict[Hashable, List[int]],
+        equal: Callable[[Row, Row, dict], bool],
+        mapping: _Journal,
+        budget: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Search for a pairing of every row of items with a row of rows2 under one
+    blank node mapping, backtracking over the candidates of a row when a
+    later row can not be paired.
+
+    Returns the pairs, with their mapping left in mapping, or None if there
+    is no such pairing or the search did not find one within budget steps.
+    """
+    used = set()
+    chosen: List[int] = []
+    # marks[i] is the size of the mapping before items[i] is paired, tried[i]
+    # the position of the next candidate of items[i].
+    marks = [len(mapping.added)]
+    tried = [0]
+    position = 0
+    while position < len(items):
+        index1, key = items[position]
+        bucket = candidates[key]
+        paired = False
+        while tried[position] < len(bucket):
+            index2 = bucket[tried[position]]
+            tried[position] += 1
+            budget -= 1
+            if budget < 0:
+                return None
+            if index2 in used:
+                continue
+            if equal(rows1[index1], rows2[index2], mapping):
+                used.add(index2)
+                chosen.append(index2)
+                marks.append(len(mapping.added))
+                tried.append(0)
+                position += 1
+                paired = True
+                break
+            mapping.undo(marks[position])
+        if paired:
+            continue
+        if position == 0:
+            return None
+        tried.pop()
+        marks.pop()
+        position -= 1
+        used.discard(chosen.pop())
+        mapping.undo(marks[position])
+    return [(index1, index2) for (index1, _), index2 in zip(items, chosen)]
+
+
+def match_rows(
+        rows1: List[Row],
+        rows2: List[Row],
+        signature: Signature,
+        equal: Callable[[Row, Row, dict], bool],
+        mapping: dict,
+        budget: int = SEARCH_BUDGET) -> List[Tuple[int, int]]:
+    """
+    Pair the rows of rows1 with equal rows of rows2.
+
+    Rows without blank nodes are paired by their key, in document order.
+    Rows with blank nodes are compared by calling equal(row1, row2, mapping)
+    on the rows of rows2 with the same key. equal may extend the blank node
+    mapping it gets; the entries it adds are only kept if the rows are
+    equal. Every row is first paired with the first equal row, as a pairwise
+    scan in document order would. If that leaves rows with blank nodes
+    unpaired, a search that backtracks over the candidates looks for one
+    mapping under which all of them are paired, so results that are the
+    same up to blank node labels are matched completely. The search gives
+    up after budget steps.
+
+    Returns:
+        List[Tuple[int, int]]: The (index in rows1, index in rows2) pairs.
+        mapping is updated with the blank node mapping of the pairs.
+    """
+    candidates: Dict[Hashable, List[int]] = defaultdict(list)
+    for index2, row2 in enumerate(rows2):
+        key, _ = signature(row2)
+        candidates[key].append(index2)
+    pairs = []
+    with_bnodes: List[Tuple[int, Hashable]] = []
+    unused = {key: deque(bucket) for key, bucket in candidates.items()}
+    for index1, row1 in enumerate(rows1):
+        key, has_bnode = signature(row1)
+        if has_bnode:
+            with_bnodes.append((index1, key))
+        elif unused.get(key):
+            pairs.append((index1, unused[key].popleft()))
+    if not with_bnodes:
+        return pairs
+
+    journal = _Journal(mapping)
+    greedy = []
+    for index1, key in with_bnodes:
+        bucket = unused.get(key)
+        if not bucket:
+            continue
+        for index2 in bucket:
+            mark = len(journal.added)
+            if equal(rows1[index1], rows2[index2], journal):
+                bucket.remove(index2)
+                greedy.append((index1, index2))
+                break
+            journal.undo(mark)
+    if len(greedy) < len(with_bnodes):
+        # Pairing in document order can take the partner a later row needs.
+        needed: Dict[Hashable, int] = defaultdict(int)
+        for _, key in with_bnodes:
+            needed[key] += 1
+        if all(count <= len(candidates.get(key, ())) for key, count in needed.items()):
+            search = _Journal(mapping)
+            found = _match_all(rows1, rows2, with_bnodes, candidates, equal, search, budget)
+            if found is not None:
+                journal, greedy = search, found
+    mapping.update(journal)
+    return pairs + greedy
@@ -0,0 +1,182 @@
+"""In-process SPARQL 1.1 Protocol client shared by the engine managers.
+
+The built-in managers used to send every query and update through a
+subprocess: qlever-control's ``QueryCommand``, which runs ``curl`` in a shell,
+and ``curl`` directly to load graphs. Starting a shell and ``curl`` adds tens
+of milliseconds to each of thousands of requests, and every request opens a
+new connection. ``SparqlClient`` sends them in-process instead:
+
+- over persistent HTTP/1.1 connections, pooled per engine (``client_for``
+  returns one client per base URL and credentials, which all managers and
+  request threads of the process share),
+- with the engine's access token or credentials,
+- negotiating gzip compressed responses,
+- and streaming graph files from disk instead of reading them into memory.
+
+Like the managers, requests return the HTTP status and the body, or status 1
+and the error message if the request could not be sent at all.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple, Union
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connections kept open per engine; at least the request concurrency.
+POOL_SIZE = 32
+
+Response = Tuple[int, str]
+Body = Union[str, bytes, Path]
+
+
+def _response_text(response: requests.Response) -> str:
+    # Decode as the engine declared, UTF-8 otherwise. requests would fall back
+    # to ISO-8859-1 for text/* results without a charset.
+    charset = None
+    for param in response.headers.get("Content-Type", "").split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "charset" and value:
+            charset = value.strip('"')
+    try:
+        return response.content.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return response.content.decode("utf-8", errors="replace")
+
+
+class SparqlClient:
+    """SPARQL queries, updates and graph uploads to one engine."""
+
+    def __init__(
+            self,
+            base_url: str,
+            access_token: Optional[str] = None,
+            auth: Optional[Tuple[str, str]] = None,
+            timeout: Optional[float] = None):
+        """
+        Parameters:
+            base_url (str): Root URL of the engine, e.g. localhost:7001; the
+                paths of the requests are relative to it. http:// is assumed
+                without a scheme.
+            access_token (str): Sent as a bearer token with updates and graph
+                uploads, if given.
+            auth (Tuple[str, str]): User and password for basic
+                authentication of all requests, if given.
+            timeout (float): Seconds to wait for the engine to respond, or
+                None to wait as long as it takes.
+        """
+        if "://" not in base_url:
+            base_url = f"http://{base_url}"
+        self.base_url = base_url.rstrip("/")
+        self.access_token = access_token
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.auth = auth
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path: str = "") -> str:
+        """Return the URL of path on the engine."""
+        if not path or "://" in path:
+            return path or self.base_url
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _authorized(self, headers: Dict[str, str]) -> Dict[str, str]:
+        if self.access_token:
+            headers["Authorization"] = f"Bearer {self.access_token}"
+        return headers
+
+    def _send(self, method: str, path: str, **kwargs) -> Response:
+        try:
+            with self.session.request(
+                    method, self.url(path), timeout=self.timeout,
+                    **kwargs) as response:
+                return response.status_code, _response_text(response)
+        except (requests.RequestException, OSError) as e:
+            return 1, str(e)
+
+    def query(self, query: str, accept: str, path: str = "") -> Response:
+        """POST a query (form-encoded) to path, accepting the given media type."""
+        return self._send(
+            "POST", path, data={"query": query}, headers={"Accept": accept})
+
+    def update(self, update: str, path: str = "") -> Response:
+        """POST an update (form-encoded) to path."""
+        return self._send(
+            "POST", path, data={"update": update},
+            headers=self._authorized({}))
+
+    def send_graph(
+            self,
+            method: str,
+            path: str,
+            body: Body,
+            content_type: str,
+            params: Optional[Mapping[str, Optional[str]]] = None) -> Response:
+        """
+        Send RDF data to a graph store or upload endpoint, e.g. PUT or POST.
+
+        Parameters:
+            method (str): The HTTP method.
+            path (str): The endpoint, relative to the base URL.
+            body (str | bytes | Path): The data, or a file streamed from disk.
+            content_type (str): The media type of the data.
+            params (Mapping[str, str]): Query parameters; a None value is sent
+                as a bare name, e.g. {"default": None} as ?default.
+
+        Returns:
+            Tuple[int, str]: The status and body of the response.
+        """
+        url = self.url(path)
+        if params:
+            url += "?" + "&".join(
+                quote(name, safe="") if value is None
+                else f"{quote(name, safe='')}={quote(value, safe='')}"
+                for name, value in params.items())
+        headers = self._authorized({"Content-Type": content_type})
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if not isinstance(body, Path):
+            return self._send(method, url, data=body, headers=headers)
+        try:
+            with open(body, "rb") as data:
+                return self._send(method, url, data=data, headers=headers)
+        except OSError as e:
+            return 1, str(e)
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
+
+_clients: Dict[tuple, SparqlClient] = {}
+_clients_lock = threading.Lock()
+_clients_pid = os.getpid()
+
+
+def client_for(
+        base_url: str,
+        access_token: Optional[str] = None,
+        auth: Optional[Tuple[str, str]] = None) -> SparqlClient:
+    """
+    Return the shared client of the engine at base_url with these credentials.
+
+    A worker process gets its own clients: connections of the parent process
+    are never reused after a fork.
+    """
+    global _clients_pid
+    key = (base_url, access_token, auth)
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = SparqlClient(
+                base_url, access_token=access_token, auth=auth)
+        return client
@@ -0,0 +1,100 @@
+"""Content-addressed store of the graph files managers stage for an engine.
+
+Every ``setup`` and ``reset_graphs`` stages the same data files in the
+working directory again: with ``<>`` rewritten to a base IRI
+(``replace_empty_base_iri``), converted from RDF/XML to Turtle
+(``stage_rdf_xml_as_turtle``) or as plain copies (``copy_graph_to_workdir``).
+``stage_file`` builds such a file once per source content, transformation and
+parameters, keeps it in a store and clones it to the destination: as a
+reflink where the file system supports it, else as a hard link, else as a
+copy. Stored files are read-only, so nothing can change them through a hard
+link; ``write_ttl_file`` replaces a staged file instead of writing into it.
+
+The store is the ``staged`` directory of the expectation cache
+(``--expectation-cache``), or a temporary directory of the process if that
+cache is kept in memory only. The conversions whose result managers read as
+a string (``rdf_xml_to_turtle``, ``turtle_to_trig``) are cached by the
+expectation cache itself, under the digest of their input, see ``rdf_tools``.
+"""
+
+import atexit
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+import threading
+from typing import Callable, Optional, Tuple
+
+from sparql_conformance import expectations
+from sparql_conformance.util import clone_path
+
+# Bump to invalidate all existing entries when the stored forms change.
+CACHE_FORMAT = "1"
+
+_temporary_directory: Optional[str] = None
+_temporary_directory_lock = threading.Lock()
+
+
+def staging_directory() -> str:
+    """Return the directory of the store."""
+    directory = expectations.cache_directory()
+    if directory is not None:
+        return os.path.join(directory, "staged")
+    global _temporary_directory
+    with _temporary_directory_lock:
+        if _temporary_directory is None:
+            _temporary_directory = tempfile.mkdtemp(
+                prefix="sparql-conformance-staged-")
+            atexit.register(shutil.rmtree, _temporary_directory, True)
+        return _temporary_directory
+
+
+def _key(kind: str, content: bytes, params: Tuple[str, ...]) -> str:
+    digest = hashlib.sha256()
+    for value in (CACHE_FORMAT, kind, *params):
+        digest.update(value.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(content)
+    return digest.hexdigest()
+
+
+def _store(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle, staging = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, "wb") as f:
+            f.write(data)
+        os.chmod(staging, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.replace(staging, path)
+    finally:
+        if os.path.exists(staging):
+            os.remove(staging)
+
+
+def stage_file(
+        destination: str,
+        kind: str,
+        content: bytes,
+        params: Tuple[str, ...],
+        build: Callable[[bytes], bytes]):
+    """
+    Place build(content) at destination, replacing an existing file there.
+
+    build is only called if the store has no file for kind, params and
+    content yet. If the store can not be written, the file is written to
+    destination directly.
+    """
+    key = _key(kind, content, params)
+    stored = os.path.join(staging_directory(), key[:2], key)
+    if not os.path.exists(stored):
+        data = build(content)
+        try:
+            _store(stored, data)
+        except OSError:
+            if os.path.lexists(destination):
+                os.remove(destination)
+            with open(destination, "wb") as f:
+                f.write(data)
+            return
+    clone_path(stored, destination, hardlink=True)
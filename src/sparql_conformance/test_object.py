@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 from dataclasses import dataclass
@@ -14,6 +15,7 @@ from sparql_conformance.result_set_tools import (
 from sparql_conformance.util import escape, local_name, read_file, uri_to_path
 
 if TYPE_CHECKING:
+    from sparql_conformance.html_diff import HtmlDiff
     from sparql_conformance.protocol_request import ProtocolRequest
 
 
@@ -98,6 +100,8 @@ class ErrorMessage(str, Enum):
     UNDEFINED_FUNCTION = 'Undefined function'
     FUNCTION_ARGUMENT_ERROR = 'Function argument error'
     TEST_SETUP_ERROR = 'Test setup error'
+    TIMEOUT = 'Timeout'
+    COMPARISON_BUDGET_EXCEEDED = 'Comparison budget exceeded'
 
     @classmethod
     def is_query_error(cls, error: str) -> bool:
@@ -116,6 +120,24 @@ class ErrorMessage(str, Enum):
             cls.UNDEFINED_FUNCTION,
         ]
 
+# The fields of a result dict that hold inputs, outputs and logs of a test;
+# --compact-passing replaces them by their hash for passing tests.
+PAYLOAD_FIELDS = (
+    'queryFile', 'executionQuery', 'graphFile', 'resultFile',
+    'expectedHtml', 'gotHtml', 'expectedHtmlRed', 'gotHtmlRed',
+    'indexLog', 'serverLog', 'queryResult', 'queryAnswer', 'queryLog',
+    'querySent', 'protocolSent', 'responseExtracted', 'response',
+    'config', 'indexFiles', 'resultFiles',
+)
+
+
+def payload_hash(value: str) -> str:
+    """Return "sha256:<hex digest>" of a payload; empty payloads stay empty."""
+    if not value:
+        return value
+    return 'sha256:' + hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
 def process_graph_data(graph_data: Union[None, str, Dict, List], target_dict: Dict[str, str]) -> None:
     """
     Process graph data and store results in the target dictionary.
@@ -273,6 +295,8 @@ class TestObject:
         self.got_html = ''
         self.expected_html_red = ''
         self.got_html_red = ''
+        # Renders the four HTML fields above when the result is written.
+        self.diff: Optional['HtmlDiff'] = None
         self.index_log = ''
         self.server_log = ''
         self.server_status = ''
@@ -285,18 +309,45 @@ class TestObject:
         self.response_extracted = ''
         self.response = ''
         self.response_not_matching = ''
+        # Hash of all inputs of the test, see fingerprint.py.
+        self.fingerprint = ''
 
     def __repr__(self) -> str:
         """Return string representation of the test object."""
         return f'<TestObject name={self.name}, type={self.type_name}, uri={self.test}>'
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert test object to dictionary format for serialization."""
+    def set_diff(self, diff: Optional['HtmlDiff']) -> None:
+        """Replace the HTML fields by the (unrendered) diff of an evaluation."""
+        self.expected_html = self.got_html = ''
+        self.expected_html_red = self.got_html_red = ''
+        self.diff = diff
+
+    def render_html(self) -> None:
+        """Render the HTML fields from the diff, if it has not been rendered yet."""
+        if self.diff is not None:
+            (self.expected_html, self.got_html,
+             self.expected_html_red, self.got_html_red) = self.diff.render()
+            self.diff = None
+
+    def to_dict(self, compact: bool = False, defer_diff: bool = False) -> Dict[str, Any]:
+        """
+        Convert test object to dictionary format for serialization.
+
+        If compact is true and the test passed, the payload fields only
+        contain the SHA-256 hash of their value. If defer_diff is true and
+        the test did not pass, its diff is not rendered: the HTML fields stay
+        empty and "diff" holds the unrendered diff (HtmlDiff.to_json).
+        """
+        diff = None
+        if defer_diff and self.diff is not None and self.status != Status.PASSED:
+            diff = self.diff.to_json()
+        else:
+            self.render_html()
         graph_html = '<b>default:</b> <br> <pre>' + escape(self.graph_file) + '</pre>'
         for name, graph in self.index_files.items():
             graph_html += f'<br><b>{name}:</b> <br> <pre>{escape(graph)}</pre>'
 
-        return {
+        result = {
             'test': escape(self.test),
             'typeName': escape(self.type_name),
             'name': escape(self.name),
@@ -348,5 +399,14 @@ class TestObject:
             'notMatching': escape(self.response_not_matching),
             'config': escape(json.dumps(self.config.to_dict(), indent=4)),
             'indexFiles': escape(json.dumps(self.index_files, indent=4)),
-            'resultFiles': escape(json.dumps(self.result_files, indent=4))
+            'resultFiles': escape(json.dumps(self.result_files, indent=4)),
+            'fingerprint': self.fingerprint,
         }
+        if diff is not None:
+            result['diff'] = diff
+        if compact and self.status == Status.PASSED:
+            for field in PAYLOAD_FIELDS:
+                result[field] = payload_hash(result[field])
+            for fixture in result['serviceData']:
+                fixture['content'] = payload_hash(fixture['content'])
+        return result
@@ -1,9 +1,9 @@
-import bz2
-import io
+import functools
 import json
 import os
 import re
-from typing import List, Dict, Tuple
+import threading
+from typing import Iterator, List, Dict, Optional, Tuple
 
 import rdflib
 
@@ -16,6 +16,7 @@ except ImportError:
     logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
     log = logging.getLogger(__name__)
 from sparql_conformance.config import Config
+from sparql_conformance.dispatch import dispatch
 # The concrete engine managers depend on qlever-control (qlever, qgraphdb,
 # ...); the core must stay importable without it.
 try:
@@ -23,6 +24,12 @@ try:
 except ImportError:
     GraphdbManager = None
 from sparql_conformance.engines.engine_manager import EngineManager
+from sparql_conformance.index_cache import IndexCache
+from sparql_conformance.index_snapshot import IndexSnapshot
+from sparql_conformance.fingerprint import fingerprint_test, run_context
+from sparql_conformance.graph_compare import DEFAULT_BUDGET
+from sparql_conformance.html_diff import DiffSection, HtmlDiff
+from sparql_conformance.journal import Journal, journal_key
 from sparql_conformance.mock_sparql_server import MockSPARQLServer
 from sparql_conformance.json_tools import compare_json
 from sparql_conformance.protocol_tools import (
@@ -33,13 +40,44 @@ from sparql_conformance.protocol_tools import (
 from sparql_conformance.rdf_tools import compare_ttl
 from sparql_conformance.result_set_tools import (
     compare_rdf_result_set,
-    parse_expected_rdf,
+    expected_rdf_as_turtle,
 )
+from sparql_conformance.scheduling import (
+    PhaseTimer,
+    estimate_seconds,
+    longest_first,
+)
+from sparql_conformance.sharding import assign_shards, session_identity
 from sparql_conformance.test_object import TestObject, Status, ErrorMessage
+from sparql_conformance.timeouts import (
+    TIMED_OUT, DeadlineExceeded, TimeoutPolicy, call_with_deadline, run_with_deadline,
+    stop_abandoned_call)
 from sparql_conformance.tsv_csv_tools import compare_sv
 from sparql_conformance.xml_tools import compare_xml
 
 
+# The comparators of result payloads by the names DiffSection.comparison
+# refers to them with.
+COMPARATORS = {
+    "rdf-result-set": compare_rdf_result_set,
+    "xml": compare_xml,
+    "json": compare_json,
+    "sv": compare_sv,
+    "ttl": compare_ttl,
+}
+
+
+def _timed(phase: str):
+    """Counts the time spent in a TestSuite method towards a session phase."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self._timer.phase(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
 def _augment_with_protocol_data(
         graph_path: Tuple[Tuple[str, str], ...],
 ) -> Tuple[Tuple[str, str], ...]:
@@ -88,12 +126,17 @@ def _get_mock_host(config) -> str:
     return '172.17.0.1'
 
 
+# Categories whose tests do not change the data; groups of these categories
+# with the same graph key share one engine session (see TestSuite.sessions).
+READ_ONLY_CATEGORIES = ("query", "format", "syntax")
+
+
 class TestSuite:
     """
     A class to represent a test suite for SPARQL using QLever.
     """
 
-    def __init__(self, name: str, tests: Dict[str, Dict[Tuple[Tuple[str, str], ...], List[TestObject]]], test_count, config: Config, engine_manager: EngineManager, results_dir: str = "./results", report_mode: str = "none"):
+    def __init__(self, name: str, tests: Dict[str, Dict[Tuple[Tuple[str, str], ...], List[TestObject]]], test_count, config: Config, engine_manager: EngineManager, results_dir: str = "./results", report_mode: str = "none", index_cache: Optional[IndexCache] = None, hot_swap: bool = False, journal: Optional[Journal] = None, request_concurrency: int = 1, timeout_policy: Optional[TimeoutPolicy] = None, comparison_budget: float = DEFAULT_BUDGET, compact_passing: bool = False):
         """
         Constructs all the necessary attributes for the TestSuite object.
 
@@ -101,6 +144,21 @@ class TestSuite:
             name (str): Name of the current run.
             report_mode (str): Console output verbosity; "line" prints a live
                 PASS/FAIL line per test, anything else stays quiet.
+            index_cache (IndexCache): Optional cache of prebuilt indexes, used
+                for engines that implement EngineManager.build_index.
+            hot_swap (bool): Keep the server running between read-only
+                sessions and swap the data with EngineManager.load_dataset.
+            journal (Journal): Optional journal every finished test is
+                appended to (see journal.py).
+            request_concurrency (int): Number of requests of read-only tests
+                sent to the engine at once, if it supports concurrent
+                requests (see dispatch.py).
+            timeout_policy (TimeoutPolicy): Deadlines of the requests sent to
+                the engine (see timeouts.py). Default: none.
+            comparison_budget (float): Seconds one comparison of an expected
+                and an actual graph may take (see graph_compare.py).
+            compact_passing (bool): Store only the hashes of the payloads of
+                passing tests in the results (see TestObject.to_dict).
         """
         self.name = name
         self.config = config
@@ -114,11 +172,146 @@ class TestSuite:
             self.config.GRAPHSTORE = self.engine_manager.graph_store_endpoint()
         self.results_dir = results_dir
         self.report_mode = report_mode
+        self.index_cache = index_cache
+        self.hot_swap = hot_swap
+        # Whether a server from a previous read-only session is still running
+        # and can take a new dataset (hot-swap mode only).
+        self._server_live = False
+        # Fingerprint of the graphs at the start of the current mutating group.
+        self._initial_state = None
+        # Index files of the current mutating group, for restarts without
+        # indexing.
+        self._index_snapshot: Optional[IndexSnapshot] = None
+        self.journal = journal
+        # Result dicts of the tests taken from the journal (resume) or from a
+        # baseline run (reuse_baseline), by journal key.
+        self._reused: Dict[str, dict] = {}
+        # Set when the run was interrupted by the user.
+        self.interrupted = False
+        self.request_concurrency = request_concurrency
+        self.timeout_policy = timeout_policy or TimeoutPolicy()
+        # Deadline of the engine setup and resets of the current group.
+        self._setup_seconds: Optional[float] = None
+        # Thread of a setup call that passed its deadline and may still run.
+        self._abandoned: Optional[threading.Thread] = None
+        self.comparison_budget = comparison_budget
+        self.compact_passing = compact_passing
+        # Durations of the sessions run so far, by session_identity (see
+        # scheduling.py), and the timer of the current session.
+        self.group_durations: Dict[str, dict] = {}
+        self._timer = PhaseTimer()
+        # Recorded durations of an earlier run, used by scheduled_sessions.
+        self._history: Dict[str, dict] = {}
 
     def _report_test(self, test: TestObject) -> None:
-        """Print a live per-test result line when in a verbose report mode."""
+        """
+        Print a live per-test result line when in a verbose report mode and
+        append the finished test to the journal.
+        """
         if self.report_mode in ("line", "diff"):
             console_report.test_line(test)
+        if self.journal is not None:
+            # The diff of a failing test is rendered when the result file is
+            # written, see html_diff.py.
+            self.journal.append(
+                journal_key(test), test.to_dict(self.compact_passing, defer_diff=True))
+
+    def resume(self) -> int:
+        """
+        Takes the results of all tests in the journal; sessions() then only
+        contains the remaining tests.
+
+        Returns the number of tests taken from the journal.
+        """
+        entries = self.journal.entries() if self.journal is not None else {}
+        return self._reuse_results(lambda key, test: entries.get(key))
+
+    def fingerprint_tests(self) -> bool:
+        """
+        Sets the fingerprint of every test (see fingerprint.py).
+
+        Returns False, and leaves the fingerprints empty, if the engine does
+        not report its version (EngineManager.version).
+        """
+        context = run_context(self.engine_manager, self.config, self.comparison_budget)
+        if context is None:
+            log.warning(
+                f"{type(self.engine_manager).__name__} does not report a version; "
+                "test fingerprints are not recorded")
+            return False
+        file_digests = {}
+        for category, graph_key, tests in self.groups():
+            graph_paths = self.group_graph_paths(category, graph_key)
+            for test in tests:
+                test.fingerprint = fingerprint_test(test, graph_paths, context, file_digests)
+        return True
+
+    def reuse_baseline(self, baseline_tests: Dict[str, dict]) -> int:
+        """
+        Takes the results of all tests whose fingerprint (see
+        fingerprint_tests) equals that of a test in baseline_tests, the
+        "tests" of this suite in an earlier result file.
+
+        Returns the number of tests taken from the baseline.
+        """
+        by_fingerprint = {
+            entry["fingerprint"]: entry for entry in baseline_tests.values()
+            if entry.get("fingerprint")
+            # A timeout or an exceeded comparison budget may not happen
+            # again; run such tests anew.
+            and entry.get("errorType") not in (
+                ErrorMessage.TIMEOUT, ErrorMessage.COMPARISON_BUDGET_EXCEEDED)
+        }
+        return self._reuse_results(
+            lambda key, test: by_fingerprint.get(test.fingerprint) if test.fingerprint else None)
+
+    def _reuse_results(self, find_result) -> int:
+        """
+        Takes the result dict find_result(key, test) returns for every test
+        without a result yet.
+
+        The tests of a graphstoreprotocol group build on each other, so such a
+        group runs again completely unless all of its tests have a result.
+
+        Returns the number of results taken.
+        """
+        taken = 0
+        for category in self.tests:
+            for tests in self.tests[category].values():
+                remaining = self._pending_tests(tests)
+                found = {}
+                for test in remaining:
+                    key = journal_key(test)
+                    result = find_result(key, test)
+                    if result is not None:
+                        found[key] = (test, result)
+                if category == "graphstoreprotocol" and len(found) < len(remaining):
+                    continue
+                for key, (test, result) in found.items():
+                    self._reused[key] = result
+                    test.status = Status(result["status"])
+                    test.error_type = result["errorType"]
+                    taken += 1
+        return taken
+
+    def _pending_tests(self, tests: List[TestObject]) -> List[TestObject]:
+        """Returns the tests of a group whose result was not taken over."""
+        return [test for test in tests if journal_key(test) not in self._reused]
+
+    def put_finished_tests(
+            self,
+            category: str,
+            graph_key: Tuple[Tuple[str, str], ...],
+            finished: List[TestObject]):
+        """
+        Puts tests that were run elsewhere (e.g. a worker process) in place of
+        the original tests of the group.
+        """
+        by_key = {journal_key(test): test for test in finished}
+        group = self.tests[category][graph_key]
+        self.tests[category][graph_key] = [
+            by_key.get(journal_key(test), test) for test in group
+        ]
 
     def evaluate_query(
             self,
@@ -132,42 +325,42 @@ class TestSuite:
         """
         status = Status.FAILED
         error_type = ErrorMessage.RESULTS_NOT_THE_SAME
-        expected_html = ""
-        test_html = ""
-        expected_red = ""
-        test_red = ""
+        diff = None
         raw_query_result = query_result
         try:
             response_format = response_format or result_format
+            comparison = None
             if test.expected_result_set:
-                status, error_type, expected_html, test_html, expected_red, test_red = compare_rdf_result_set(
-                    expected_string,
-                    query_result,
+                comparison = "rdf-result-set", (
                     result_format,
                     test.result_public_id,
                     self.config.alias,
                     self.config.number_types,
                 )
             elif result_format == "srx":
-                status, error_type, expected_html, test_html, expected_red, test_red = compare_xml(
-                    expected_string, query_result, self.config.alias, self.config.number_types)
+                comparison = "xml", (self.config.alias, self.config.number_types)
             elif result_format == "srj":
-                status, error_type, expected_html, test_html, expected_red, test_red = compare_json(
-                    expected_string, query_result, self.config.alias, self.config.number_types)
+                comparison = "json", (self.config.alias, self.config.number_types)
             elif result_format == "csv" or result_format == "tsv":
-                status, error_type, expected_html, test_html, expected_red, test_red = compare_sv(
-                    expected_string, query_result, result_format, self.config.alias)
+                comparison = "sv", (result_format, self.config.alias)
             elif result_format == "ttl":
-                status, error_type, expected_html, test_html, expected_red, test_red = compare_ttl(
-                    expected_string, query_result)
+                comparison = "ttl", (self.comparison_budget,)
             elif result_format == "rdf":
-                expected_turtle = parse_expected_rdf(
+                expected_string = expected_rdf_as_turtle(
                     expected_string,
                     result_format,
                     test.result_public_id,
-                ).serialize(format="turtle")
-                status, error_type, expected_html, test_html, expected_red, test_red = compare_ttl(
-                    expected_turtle, query_result)
+                )
+                comparison = "ttl", (self.comparison_budget,)
+            if comparison is not None:
+                # The HTML is rendered when the result is written, see
+                # html_diff.py.
+                name, arguments = comparison
+                result = COMPARATORS[name](
+                    expected_string, query_result, *arguments, render=False)
+                status, error_type = result[:2]
+                diff = HtmlDiff([DiffSection(
+                    None, expected_string, query_result, result, comparison)])
         except Exception as e:
             status = Status.FAILED
             error_type = ErrorMessage.FORMAT_ERROR
@@ -178,10 +371,7 @@ class TestSuite:
             )
 
         self.update_test_status(test, status, error_type)
-        setattr(test, "got_html", test_html)
-        setattr(test, "expected_html", expected_html)
-        setattr(test, "got_html_red", test_red)
-        setattr(test, "expected_html_red", expected_red)
+        test.set_diff(diff)
 
     def evaluate_update(
                 self,
@@ -203,12 +393,6 @@ class TestSuite:
             expected_graphs = list(expected_graphs)
             expected_graphs[0] = union_graph.serialize(format="turtle")
 
-        status = [Status.FAILED for _ in range(len(expected_graphs))]
-        error_type = [ErrorMessage.RESULTS_NOT_THE_SAME for _ in range(len(expected_graphs))]
-        expected_html = ["" for _ in range(len(expected_graphs))]
-        test_html = ["" for _ in range(len(expected_graphs))]
-        expected_red = ["" for _ in range(len(expected_graphs))]
-        test_red = ["" for _ in range(len(expected_graphs))]
         if len(expected_graphs) != len(graphs):
             # A malformed test (or engine response) must fail this test, not
             # abort the whole run.
@@ -221,33 +405,22 @@ class TestSuite:
                 f"graph(s), got {len(graphs)}.",
             )
             return
-        for i in range(len(expected_graphs)):
-            status[i], error_type[i], expected_html[i], test_html[i], expected_red[i], test_red[i] = compare_ttl(
-                    expected_graphs[i], graphs[i])
-            
-        for s, e in zip(status, error_type):
-            if s != Status.PASSED:
-                status[0] = s
-                error_type[0] = e
+        labels = ["default", *test.result_files]
+        sections = []
+        for label, expected_graph, graph in zip(labels, expected_graphs, graphs):
+            sections.append(DiffSection(
+                label, expected_graph, graph, compare_ttl(
+                    expected_graph, graph, self.comparison_budget, render=False),
+                ("ttl", (self.comparison_budget,))))
+
+        status, error_type = Status.PASSED, ""
+        for section in sections:
+            if section.result[0] != Status.PASSED:
+                status, error_type = section.result[:2]
                 break
-        
-        self.update_test_status(test, status[0], error_type[0])
-        t_html = f"<b>default:</b><br>{test_html[0]}"
-        e_html = f"<b>default:</b><br>{expected_html[0]}"
-        t_red = f"<b>default:</b><br>{test_red[0]}"
-        e_red = f"<b>default:</b><br>{expected_red[0]}"
-        i = 1
-        for key, value in test.result_files.items():
-            t_html += f"<br><br><b>{key}:</b><br>{test_html[i]}"
-            e_html += f"<br><br><b>{key}:</b><br>{expected_html[i]}"
-            t_red += f"<br><br><b>{key}:</b><br>{test_red[i]}"
-            e_red += f"<br><br><b>{key}:</b><br>{expected_red[i]}"
-            i += 1
-
-        setattr(test, "got_html", t_html)
-        setattr(test, "expected_html", e_html)
-        setattr(test, "got_html_red", t_red)
-        setattr(test, "expected_html_red", e_red)
+
+        self.update_test_status(test, status, error_type)
+        test.set_diff(HtmlDiff(sections))
 
     def log_for_all_tests(self, list_of_tests: list, attribute: str, log_message: str):
         """
@@ -287,27 +460,130 @@ class TestSuite:
                 "server_log",
                 util.truncate_log(util.remove_date_time_parts(server_log)))
 
+    def _index_cache_key(self, graph_paths: Tuple[Tuple[str, str], ...]) -> Optional[str]:
+        """Return the index cache key for graph_paths, or None if the cache is not used."""
+        if self.index_cache is None or not self.engine_manager.supports_index_cache():
+            return None
+        try:
+            return self.index_cache.key(self.engine_manager, self.config, graph_paths)
+        except OSError as e:
+            log.warning(f"Not using the index cache for {graph_paths}: {e}")
+            return None
+
+    @_timed("setup")
+    def setup_engine(
+            self,
+            graph_paths: Tuple[Tuple[str, str], ...],
+            snapshot_index: bool = False) -> Tuple[bool, bool, str, str]:
+        """
+        Sets up the engine for the given graphs, using the index cache if possible.
+
+        On a cache hit the stored index is restored and only the server is
+        started; on a miss the index is built and stored before the server
+        starts. Without a cache this is EngineManager.setup.
+
+        With snapshot_index, an IndexSnapshot of the index is taken before the
+        server starts (engines that implement build_index only).
+
+        Returns:
+            index_success, server_success, index_log, server_log
+        """
+        key = self._index_cache_key(graph_paths)
+        snapshot_index = snapshot_index and self.engine_manager.supports_index_cache()
+        if key is None and not snapshot_index:
+            return self.engine_manager.setup(self.config, graph_paths)
+        index_log = None
+        if key is not None and self.index_cache.contains(key):
+            try:
+                index_log = self.index_cache.restore(key, self.config)
+                log.info(f"Restored index {key[:12]} from the index cache")
+            except OSError as e:
+                log.warning(f"Restoring index {key[:12]} failed, rebuilding: {e}")
+                self._cleanup_engine()
+        if index_log is None:
+            index_success, index_log = self.engine_manager.build_index(self.config, graph_paths)
+            if not index_success:
+                return False, False, index_log, ""
+            if key is not None:
+                self.index_cache.store(
+                    key, self.config, self.engine_manager.index_artifacts(self.config), index_log)
+        if snapshot_index:
+            self._index_snapshot = IndexSnapshot.capture(self.engine_manager, self.config)
+            if self._index_snapshot is None:
+                log.warning(f"Could not take an index snapshot for {graph_paths}")
+        server_success, server_log = self.engine_manager.start_server(self.config, graph_paths)
+        return True, server_success, index_log, server_log
+
+    def restart_engine(self, graph_paths: Tuple[Tuple[str, str], ...]) -> bool:
+        """
+        Restarts the engine on the initial graphs of the current group.
+
+        With an index snapshot the server is only stopped and started again
+        on the restored index files; otherwise the engine is set up from
+        scratch.
+
+        Returns True if the engine is ready.
+        """
+        self._cleanup_engine()
+        try:
+            if self._index_snapshot is not None:
+                try:
+                    self._index_snapshot.restore()
+                except OSError as e:
+                    log.warning(f"Restoring the index snapshot failed, rebuilding: {e}")
+                    self._cleanup_engine()
+                else:
+                    server_success, _ = self._bounded(
+                        self.engine_manager.start_server, self.config, graph_paths)
+                    return server_success
+            index_success, server_success, _, _ = self._bounded(self.setup_engine, graph_paths)
+        except DeadlineExceeded as e:
+            log.warning(f"Restarting the engine for {graph_paths}: {e} Stopping the engine.")
+            self._cleanup_engine()
+            return False
+        return index_success and server_success
+
+    def discard_index_snapshot(self):
+        """Deletes the index snapshot of the previous group, if any."""
+        if self._index_snapshot is not None:
+            self._index_snapshot.discard()
+            self._index_snapshot = None
+
     def prepare_test_environment(
             self,
             graph_paths: Tuple[Tuple[str, str], ...],
-            list_of_tests: List[TestObject]) -> bool:
+            list_of_tests: List[TestObject],
+            snapshot_index: bool = False) -> bool:
         """
         Prepares the test environment for a given graph.
 
         Args:
             graph_paths: ex. default graph + named graph (('graph_path', '-'), ('graph_path2', 'graph_name2'))
             list_of_tests: [Test1, Test2, ...]
+            snapshot_index: Take an index snapshot for restarts between the
+                tests of a group that modifies the data.
 
         Returns:
             True if the environment is successfully prepared, False otherwise.
         """
-        self.engine_manager.cleanup(self.config)
-        index_success, server_success, index_log, server_log = self.engine_manager.setup(self.config, graph_paths)
+        self._server_live = False
+        self.discard_index_snapshot()
+        self._cleanup_engine()
+        self._setup_seconds = self.timeout_policy.setup_seconds(list_of_tests)
+        try:
+            index_success, server_success, index_log, server_log = self._bounded(
+                self.setup_engine, graph_paths, snapshot_index)
+        except DeadlineExceeded as e:
+            log.warning(f"Setting up the engine for {graph_paths}: {e} Stopping the engine.")
+            self._cleanup_engine()
+            self.update_graph_status(list_of_tests, Status.FAILED, ErrorMessage.TIMEOUT)
+            self.log_for_all_tests(list_of_tests, "index_log", str(e))
+            return False
         if not index_success:
-            self.engine_manager.cleanup(self.config)
+            self._cleanup_engine()
             self.update_graph_status(list_of_tests, Status.FAILED, ErrorMessage.INDEX_BUILD_ERROR)
         if not server_success:
-            self.engine_manager.cleanup(self.config)
+            self._cleanup_engine()
             self.update_graph_status(list_of_tests, Status.FAILED, ErrorMessage.SERVER_ERROR)
         if index_success and server_success and "Syntax" in list_of_tests[0].type_name:
             self.engine_manager.activate_syntax_test_mode(self.config)
@@ -322,6 +598,81 @@ class TestSuite:
         )
         return index_success and server_success
 
+    def _bounded(self, call, *args):
+        """
+        Returns call(*args), bounded by the setup deadline of the current
+        group (see timeouts.py). Raises DeadlineExceeded when it passes; the
+        next _cleanup_engine then waits for the call to return.
+        """
+        try:
+            return run_with_deadline(functools.partial(call, *args), self._setup_seconds)
+        except DeadlineExceeded as e:
+            self._abandoned = e.thread
+            raise
+
+    def capture_initial_state(
+            self,
+            graph_paths: Tuple[Tuple[str, str], ...],
+            list_of_tests: List[TestObject]) -> bool:
+        """
+        Records the initial graphs of a group whose tests modify the data,
+        right after the environment was prepared.
+
+        Returns False, and fails list_of_tests, if that passed the setup
+        deadline of the group.
+        """
+        try:
+            self._bounded(self.engine_manager.snapshot_initial_state, self.config, graph_paths)
+            self._initial_state = self._bounded(self.engine_manager.graph_state, self.config)
+        except DeadlineExceeded as e:
+            log.warning(f"Recording the initial graphs of {graph_paths}: {e} Stopping the engine.")
+            self._cleanup_engine()
+            self.update_graph_status(list_of_tests, Status.FAILED, ErrorMessage.TIMEOUT)
+            return False
+        return True
+
+    @_timed("setup")
+    def reset_test_environment(self, graph_paths: Tuple[Tuple[str, str], ...]) -> bool:
+        """
+        Resets the engine to the initial graphs before the next test of a group.
+
+        The engine resets itself (EngineManager.reset_graphs, usually in place);
+        if that fails or the resulting graph state differs from the one
+        recorded by capture_initial_state, or the reset passes the setup
+        deadline, the engine is restarted instead (restart_engine). Engines
+        without an in-place reset are restarted
+        from the index snapshot directly.
+
+        Returns True if the engine is ready for the next test.
+        """
+        if self._index_snapshot is not None and not self.engine_manager.resets_in_place():
+            return self.restart_engine(graph_paths)
+        try:
+            if self._bounded(self.engine_manager.reset_graphs, self.config, graph_paths):
+                if self._initial_state is None:
+                    return True
+                if self._bounded(self.engine_manager.graph_state, self.config) == self._initial_state:
+                    return True
+                log.warning(f"Resetting the graphs did not restore the initial state, restarting the engine for {graph_paths}")
+            else:
+                log.warning(f"Resetting the graphs failed, restarting the engine for {graph_paths}")
+        except DeadlineExceeded as e:
+            log.warning(f"Resetting the graphs for {graph_paths}: {e} Restarting the engine.")
+        return self.restart_engine(graph_paths)
+
+    @_timed("cleanup")
+    def _cleanup_engine(self):
+        """
+        Stops the engine and removes its files (EngineManager.cleanup).
+
+        After a setup call passed its deadline, also waits until that call has
+        returned and cleans up once more, so nothing it started survives.
+        """
+        self.engine_manager.cleanup(self.config)
+        if self._abandoned is not None:
+            thread, self._abandoned = self._abandoned, None
+            stop_abandoned_call(thread, lambda: self.engine_manager.cleanup(self.config))
+
     def process_failed_response(self, test, query_response: tuple):
         body = query_response[1]
         if "exception" in body:
@@ -367,47 +718,265 @@ class TestSuite:
         Executes query tests for each graph in the test suite.
         """
         for graph in graphs_list_of_tests:
-            log.info(f"Running query tests for graph / graphs: {graph}")
-            runnable_tests = []
-            for test in graphs_list_of_tests[graph]:
-                if test.setup_error:
-                    self.update_test_status(
-                        test,
-                        Status.NOT_TESTED,
-                        ErrorMessage.TEST_SETUP_ERROR,
-                    )
-                    setattr(test, "query_log", test.setup_error)
-                    self._report_test(test)
-                else:
-                    runnable_tests.append(test)
-            if not runnable_tests:
-                continue
-            if not self.prepare_test_environment(
-                    graph, runnable_tests):
-                continue
+            self.run_read_only_session(graph, [("query", graphs_list_of_tests[graph])])
 
-            for test in runnable_tests:
-                log.info(f"Running: {test.name}")
-                response_format = test.result_format
-                if test.expected_result_set:
-                    response_format = "srx"
-                elif test.result_format in ("rdf", "ttl"):
-                    response_format = "ttl"
-                query_result = self.engine_manager.query(
-                    self.config, test.execution_query, response_format)
-                if query_result[0] == 200:
-                    self.evaluate_query(
-                        test.result_file,
-                        query_result[1],
-                        test,
-                        test.result_format,
-                        response_format)
-                else:
-                    self.process_failed_response(test, query_result)
+    def run_read_only_session(
+            self,
+            graph_paths: Tuple[Tuple[str, str], ...],
+            parts: List[Tuple[str, List[TestObject]]]):
+        """
+        Executes the query, format and syntax tests of one graph in a single
+        engine session.
+
+        None of these categories changes the data, so the engine is set up once
+        for all of them. The parts run in the given order (see sessions());
+        syntax tests come last because activate_syntax_test_mode changes how
+        the server answers and positive update syntax tests modify the data.
+
+        Args:
+            graph_paths: The graph key shared by all parts.
+            parts: [(category, [Test1, Test2, ...]), ...]
+        """
+        log.info(f"Running {', '.join(c for c, _ in parts)} tests for graph / graphs: {graph_paths}")
+        runnable_parts = []
+        for category, tests in parts:
+            if category != "syntax":
+                tests = self._runnable_tests(tests)
+            if tests:
+                runnable_parts.append((category, tests))
+        session_tests = [test for _, tests in runnable_parts for test in tests]
+        if not session_tests:
+            return
+        if self._swap_dataset(graph_paths, session_tests):
+            syntax_mode = False
+        elif self.prepare_test_environment(graph_paths, session_tests):
+            # prepare_test_environment already activated the syntax test mode
+            # if the session starts with syntax tests.
+            syntax_mode = "Syntax" in session_tests[0].type_name
+        else:
+            return
+
+        for i, (category, tests) in enumerate(runnable_parts):
+            if category == "syntax":
+                if not syntax_mode:
+                    self.engine_manager.activate_syntax_test_mode(self.config)
+                    syntax_mode = True
+                engine_ready = self._execute_syntax_tests(tests, graph_paths)
+            else:
+                engine_ready = self._execute_query_tests(tests, graph_paths)
+            if not engine_ready:
+                for _, later_tests in runnable_parts[i + 1:]:
+                    self._fail_remaining_tests(later_tests, ErrorMessage.SERVER_ERROR)
+                break
+
+        self.refresh_server_log(session_tests)
+        if self.hot_swap and not syntax_mode:
+            # Keep the server for the next read-only session; the syntax test
+            # mode cannot be switched off again, so that server is restarted.
+            self._server_live = True
+        else:
+            self._cleanup_engine()
+
+    @_timed("setup")
+    def _swap_dataset(
+            self,
+            graph_paths: Tuple[Tuple[str, str], ...],
+            list_of_tests: List[TestObject]) -> bool:
+        """
+        Loads the graphs into the server kept running by the previous
+        read-only session (hot-swap mode).
+
+        Returns False if there is no such server or the engine cannot swap its
+        dataset; the caller then sets the engine up from scratch.
+        """
+        if not (self.hot_swap and self._server_live):
+            return False
+        self._server_live = False
+        self._setup_seconds = self.timeout_policy.setup_seconds(list_of_tests)
+        try:
+            loaded = self._bounded(self.engine_manager.load_dataset, self.config, graph_paths)
+        except DeadlineExceeded as e:
+            log.warning(f"Swapping the dataset for {graph_paths}: {e} Stopping the engine.")
+            self._cleanup_engine()
+            return False
+        if not loaded:
+            log.info(f"Swapping the dataset failed, restarting the engine for {graph_paths}")
+            return False
+        self.log_for_all_tests(list_of_tests, "index_log", "Dataset loaded into the running server (hot swap).")
+        self.log_for_all_tests(list_of_tests, "server_log", "")
+        return True
+
+    def close(self):
+        """
+        Stops a server that hot-swap mode kept running after the last session
+        and deletes the last index snapshot.
+        """
+        if self._server_live:
+            self._server_live = False
+            self._cleanup_engine()
+        self.discard_index_snapshot()
+
+    def _runnable_tests(self, tests: List[TestObject]) -> List[TestObject]:
+        """
+        Marks tests whose setup failed as not tested and returns the others.
+        """
+        runnable_tests = []
+        for test in tests:
+            if test.setup_error:
+                self.update_test_status(
+                    test,
+                    Status.NOT_TESTED,
+                    ErrorMessage.TEST_SETUP_ERROR,
+                )
+                setattr(test, "query_log", test.setup_error)
                 self._report_test(test)
+            else:
+                runnable_tests.append(test)
+        return runnable_tests
+
+    def _send_requests(self, requests: list) -> Iterator[Tuple[int, str]]:
+        """
+        Sends the given engine requests, concurrently if enabled and supported
+        by the engine, and returns a generator of the responses in the
+        order of the requests.
+        """
+        concurrency = 1
+        if self.engine_manager.supports_concurrent_requests():
+            concurrency = self.request_concurrency
+        if concurrency <= 1:
+            return dispatch(requests, 1)
+        return self._dispatch_concurrently(requests, concurrency)
+
+    def _dispatch_concurrently(self, requests: list, concurrency: int):
+        # The built-in managers mute the shared log around each request and
+        # restore the level they found; interleaved, the muted level can be
+        # the one that is restored last.
+        level = log.level
+        try:
+            yield from dispatch(requests, concurrency)
+        finally:
+            log.setLevel(level)
+
+    def _execute_query_tests(
+            self,
+            tests: List[TestObject],
+            graph_paths: Tuple[Tuple[str, str], ...]) -> bool:
+        """
+        Sends the queries of the given tests to the running engine and evaluates them.
+
+        Returns False if the engine could not be restarted after a timeout.
+        """
+        def response_format(test):
+            if test.expected_result_set:
+                return "srx"
+            if test.result_format in ("rdf", "ttl"):
+                return "ttl"
+            return test.result_format
+
+        def request(test):
+            return functools.partial(
+                self.engine_manager.query,
+                self.config,
+                test.execution_query,
+                response_format(test),
+            )
+
+        def evaluate(test, query_result):
+            if query_result[0] == 200:
+                self.evaluate_query(
+                    test.result_file,
+                    query_result[1],
+                    test,
+                    test.result_format,
+                    response_format(test))
+            else:
+                self.process_failed_response(test, query_result)
+
+        return self._execute_read_only_tests(
+            "query", tests, graph_paths, request, evaluate)
+
+    def _execute_read_only_tests(
+            self,
+            category: str,
+            tests: List[TestObject],
+            graph_paths: Tuple[Tuple[str, str], ...],
+            request,
+            evaluate) -> bool:
+        """
+        Sends request(test) of every test to the running engine and evaluates
+        the responses in test order with evaluate(test, response).
+
+        A request that passes its deadline (see timeouts.py) fails its test
+        with a timeout; the engine is killed and restarted on graph_paths for
+        the remaining tests.
+
+        Returns False if that restart failed; the remaining tests then fail
+        with a server error.
+        """
+        remaining = tests
+        while remaining:
+            responses = self._send_requests([
+                self._with_deadline(category, test, request(test))
+                for test in remaining
+            ])
+            timed_out = None
+            try:
+                for i, (test, response) in enumerate(zip(remaining, responses)):
+                    log.info(f"Running: {test.name}")
+                    if response[0] == TIMED_OUT:
+                        self._record_timeout(test, response)
+                        timed_out = i
+                    else:
+                        evaluate(test, response)
+                    self._report_test(test)
+                    if timed_out is not None:
+                        break
+            finally:
+                responses.close()
+            if timed_out is None:
+                return True
+            remaining = remaining[timed_out + 1:]
+            if remaining and not self._restart_after_timeout(
+                    graph_paths, category == "syntax"):
+                self._fail_remaining_tests(remaining, ErrorMessage.SERVER_ERROR)
+                return False
+        return True
 
-            self.refresh_server_log(runnable_tests)
-            self.engine_manager.cleanup(self.config)
+    def _with_deadline(self, category: str, test: TestObject, request):
+        """Returns request bounded by the timeout of the test (see timeouts.py)."""
+        return functools.partial(
+            call_with_deadline,
+            request,
+            self.timeout_policy.seconds(category, test),
+        )
+
+    def _record_timeout(self, test: TestObject, response: tuple):
+        """
+        Fails a test whose request passed its deadline and kills the engine,
+        which also ends the request still waiting for it.
+        """
+        log.warning(f"{test.name}: {response[1]} Stopping the engine.")
+        setattr(test, "query_log", response[1])
+        self.update_test_status(test, Status.FAILED, ErrorMessage.TIMEOUT)
+        self._cleanup_engine()
+
+    def _restart_after_timeout(
+            self,
+            graph_paths: Tuple[Tuple[str, str], ...],
+            syntax_mode: bool) -> bool:
+        """Restarts the engine killed by _record_timeout; returns True if it is ready."""
+        log.info(f"Restarting the engine for {graph_paths} after a timeout")
+        if not self.restart_engine(graph_paths):
+            return False
+        if syntax_mode:
+            self.engine_manager.activate_syntax_test_mode(self.config)
+        return True
+
+    def _fail_remaining_tests(self, tests: List[TestObject], error_type: str):
+        """Fails and reports tests that could not run."""
+        self.update_graph_status(tests, Status.FAILED, error_type)
+        for test in tests:
+            self._report_test(test)
 
     def run_update_tests(self, graphs_list_of_tests):
         """
@@ -415,44 +984,56 @@ class TestSuite:
         """
         for graph in graphs_list_of_tests:
             log.info(f"Running update tests for graph / graphs: {graph}")
-            if not self.prepare_test_environment(graph, graphs_list_of_tests[graph]):
+            if not self.prepare_test_environment(
+                    graph, graphs_list_of_tests[graph], snapshot_index=True):
+                continue
+            if not self.capture_initial_state(graph, graphs_list_of_tests[graph]):
                 continue
+            # Set when a timeout killed the engine (see _record_timeout).
+            killed = False
             for i, test in enumerate(graphs_list_of_tests[graph]):
                 log.info(f"Running: {test.name}")
                 if i > 0:
-                    if not self.engine_manager.reset_graphs(self.config, graph):
+                    if killed:
+                        ready = self.restart_engine(graph)
+                    else:
+                        ready = self.reset_test_environment(graph)
+                    if not ready:
                         self.update_graph_status(
                             graphs_list_of_tests[graph][i:],
                             Status.FAILED, ErrorMessage.SERVER_ERROR)
                         break
+                    killed = False
                 # Execute the update query.
-                query_update_result = self.engine_manager.update(self.config, test.query_file)
+                query_update_result = self._with_deadline(
+                    "update", test, functools.partial(
+                        self.engine_manager.update, self.config, test.query_file))()
 
                 # If the update query was successful, retrieve the current state of all graphs
                 # and check if the results match the expected results.
                 if 200 <= query_update_result[0] < 300:
-                    actual_state_of_graphs = []
-                    expected_state_of_graphs = []
-                    # Handle default graph that has no uri
-                    default_graph_query = self.engine_manager.default_graph_construct_query()
-                    construct_graph = self.engine_manager.query(
-                        self.config,
-                        default_graph_query,
-                        "ttl",
-                    )
-                    actual_state_of_graphs.append(construct_graph[1])
-                    expected_state_of_graphs.append(test.result_file)
-
-                    # Handle named graphs.
+                    # Handle default graph that has no uri, then the named graphs.
+                    state_queries = [self.engine_manager.default_graph_construct_query()]
+                    expected_state_of_graphs = [test.result_file]
                     if test.result_files:
                         for graph_label, expected_graph in test.result_files.items():
-                            construct_graph = self.engine_manager.query(
-                                self.config,
-                                f"CONSTRUCT {{?s ?p ?o}} WHERE {{ GRAPH <{graph_label}> {{?s ?p ?o}}}}",
-                                "ttl")
-                            actual_state_of_graphs.append(construct_graph[1])
+                            state_queries.append(
+                                f"CONSTRUCT {{?s ?p ?o}} WHERE {{ GRAPH <{graph_label}> {{?s ?p ?o}}}}")
                             expected_state_of_graphs.append(expected_graph)
+                    actual_state_of_graphs = []
+                    for state_query in state_queries:
+                        construct_graph = self._with_deadline(
+                            "update", test, functools.partial(
+                                self.engine_manager.query, self.config, state_query, "ttl"))()
+                        if construct_graph[0] == TIMED_OUT:
+                            query_update_result = construct_graph
+                            break
+                        actual_state_of_graphs.append(construct_graph[1])
 
+                if query_update_result[0] == TIMED_OUT:
+                    self._record_timeout(test, query_update_result)
+                    killed = True
+                elif 200 <= query_update_result[0] < 300:
                     # Evaluate state of graphs.
                     self.evaluate_update(expected_state_of_graphs, actual_state_of_graphs, test)
                 else:
@@ -460,51 +1041,63 @@ class TestSuite:
                 self._report_test(test)
 
             self.refresh_server_log(graphs_list_of_tests[graph])
-            self.engine_manager.cleanup(self.config)
+            self._cleanup_engine()
 
     def run_syntax_tests(self, graphs_list_of_tests: Dict[Tuple[Tuple[str, str], ...], List[TestObject]]):
         """
         Executes query tests for each graph in the test suite.
         """
         for graph_path in graphs_list_of_tests:
-            log.info(f"Running syntax tests for graph: {graph_path}")
-            if not self.prepare_test_environment(
-                    graph_path, graphs_list_of_tests[graph_path]):
-                continue
+            self.run_read_only_session(graph_path, [("syntax", graphs_list_of_tests[graph_path])])
 
-            for test in graphs_list_of_tests[graph_path]:
-                log.info(f"Running: {test.name}")
-                result_format = "srx"
-                if "construct" in test.name:
-                    result_format = "ttl"
-                if "Update" in test.type_name:
-                    query_result = self.engine_manager.update(
-                        self.config,
-                        test.query_file)
-                else:
-                    query_result = self.engine_manager.query(
-                        self.config,
-                        test.query_file,
-                        result_format)
+    def _execute_syntax_tests(
+            self,
+            tests: List[TestObject],
+            graph_paths: Tuple[Tuple[str, str], ...]) -> bool:
+        """
+        Sends the queries of the given syntax tests to the running engine and
+        checks whether they were accepted or rejected as expected.
 
-                if not (200 <= query_result[0] < 400):
-                    self.process_failed_response(test, query_result)
+        Returns False if the engine could not be restarted after a timeout.
+        """
+        # Positive update syntax tests change the data; they may run
+        # alongside the queries, but not alongside each other.
+        update_lock = threading.Lock()
+
+        def locked_update(query):
+            with update_lock:
+                return self.engine_manager.update(self.config, query)
+
+        def request(test):
+            if "Update" in test.type_name:
+                return functools.partial(locked_update, test.query_file)
+            result_format = "srx"
+            if "construct" in test.name:
+                result_format = "ttl"
+            return functools.partial(
+                self.engine_manager.query,
+                self.config,
+                test.query_file,
+                result_format)
+
+        def evaluate(test, query_result):
+            if not (200 <= query_result[0] < 400):
+                self.process_failed_response(test, query_result)
+            else:
+                setattr(test, "query_log", query_result[1])
+                self.update_test_status(test, Status.PASSED, "")
+            if test.type_name in ("NegativeSyntaxTest11", "NegativeUpdateSyntaxTest11",
+                                 "NegativeSyntaxTest", "NegativeUpdateSyntaxTest"):
+                if ErrorMessage.is_query_error(test.error_type):
+                    status = Status.PASSED
+                    error_type = ""
                 else:
-                    setattr(test, "query_log", query_result[1])
-                    self.update_test_status(test, Status.PASSED, "")
-                if test.type_name in ("NegativeSyntaxTest11", "NegativeUpdateSyntaxTest11",
-                                     "NegativeSyntaxTest", "NegativeUpdateSyntaxTest"):
-                    if ErrorMessage.is_query_error(test.error_type):
-                        status = Status.PASSED
-                        error_type = ""
-                    else:
-                        status = Status.FAILED
-                        error_type = ErrorMessage.EXPECTED_EXCEPTION
-                    self.update_test_status(test, status, error_type)
-                self._report_test(test)
+                    status = Status.FAILED
+                    error_type = ErrorMessage.EXPECTED_EXCEPTION
+                self.update_test_status(test, status, error_type)
 
-            self.refresh_server_log(graphs_list_of_tests[graph_path])
-            self.engine_manager.cleanup(self.config)
+        return self._execute_read_only_tests(
+            "syntax", tests, graph_paths, request, evaluate)
 
     def run_protocol_tests(self, graphs_list_of_tests: Dict[Tuple[Tuple[str, str], ...], List[TestObject]]):
         """
@@ -512,15 +1105,17 @@ class TestSuite:
         """
         for graph_path in graphs_list_of_tests:
             log.info(f"Running protocol tests for graph: {graph_path}")
-            # Work around for issue #25: add standard protocol test data files
-            graph_paths = _augment_with_protocol_data(graph_path)
+            graph_paths = self.group_graph_paths("protocol", graph_path)
             if not self.prepare_test_environment(
-                    graph_paths, graphs_list_of_tests[graph_path]):
+                    graph_paths, graphs_list_of_tests[graph_path],
+                    snapshot_index=True):
+                continue
+            if not self.capture_initial_state(graph_paths, graphs_list_of_tests[graph_path]):
                 continue
             for i, test in enumerate(graphs_list_of_tests[graph_path]):
                 log.info(f"Running: {test.name}")
                 if i > 0:
-                    if not self.engine_manager.reset_graphs(self.config, graph_paths):
+                    if not self.reset_test_environment(graph_paths):
                         self.update_graph_status(
                             graphs_list_of_tests[graph_path][i:],
                             Status.FAILED, ErrorMessage.SERVER_ERROR)
@@ -542,7 +1137,7 @@ class TestSuite:
                 setattr(test, "response", got_responses)
                 self._report_test(test)
             self.refresh_server_log(graphs_list_of_tests[graph_path])
-            self.engine_manager.cleanup(self.config)
+            self._cleanup_engine()
 
     def run_graphstore_protocol_tests(self, graphs_list_of_tests: Dict[Tuple[Tuple[str, str], ...], List[TestObject]]):
         """
@@ -581,7 +1176,7 @@ class TestSuite:
                 setattr(test, 'response', got_responses)
                 self._report_test(test)
             self.refresh_server_log(graphs_list_of_tests[graph_path])
-            self.engine_manager.cleanup(self.config)
+            self._cleanup_engine()
 
     def run_structured_graphstore_protocol_tests(self, graphs_list_of_tests: Dict[Tuple[Tuple[str, str], ...], List[TestObject]]):
         """
@@ -594,7 +1189,10 @@ class TestSuite:
         for graph_path in graphs_list_of_tests:
             log.info(f'Running structured graphstore protocol tests for graph: {graph_path}')
             if not self.prepare_test_environment(
-                    graph_path, graphs_list_of_tests[graph_path]):
+                    graph_path, graphs_list_of_tests[graph_path],
+                    snapshot_index=True):
+                continue
+            if not self.capture_initial_state(graph_path, graphs_list_of_tests[graph_path]):
                 continue
             supported_features = self.engine_manager.supported_graphstore_features()
             for i, test in enumerate(graphs_list_of_tests[graph_path]):
@@ -611,7 +1209,7 @@ class TestSuite:
                     self._report_test(test)
                     continue
                 if i > 0:
-                    if not self.engine_manager.reset_graphs(self.config, graph_path):
+                    if not self.reset_test_environment(graph_path):
                         self.update_graph_status(
                             graphs_list_of_tests[graph_path][i:],
                             Status.FAILED, ErrorMessage.SERVER_ERROR)
@@ -629,7 +1227,7 @@ class TestSuite:
                 setattr(test, 'response', got_responses)
                 self._report_test(test)
             self.refresh_server_log(graphs_list_of_tests[graph_path])
-            self.engine_manager.cleanup(self.config)
+            self._cleanup_engine()
 
     def run_federation_tests(self, graphs_list_of_tests: Dict[Tuple[Tuple[str, str], ...], List[TestObject]]):
         """
@@ -678,18 +1276,22 @@ class TestSuite:
                     response_format = "srx"
                 elif test.result_format in ("rdf", "ttl"):
                     response_format = "ttl"
-                query_result = self.engine_manager.query(
-                    self.config,
-                    query_text,
-                    response_format,
-                )
+                query_result = self._with_deadline(
+                    "federation", test, functools.partial(
+                        self.engine_manager.query,
+                        self.config,
+                        query_text,
+                        response_format,
+                    ))()
 
                 self.refresh_server_log([test])
 
                 mock.stop()
-                self.engine_manager.cleanup(self.config)
+                self._cleanup_engine()
 
-                if query_result[0] == 200:
+                if query_result[0] == TIMED_OUT:
+                    self._record_timeout(test, query_result)
+                elif query_result[0] == 200:
                     self.evaluate_query(
                         test.result_file,
                         query_result[1],
@@ -714,26 +1316,240 @@ class TestSuite:
             print(f"Listening on: {self.config.server_address}:{self.config.port} ...")
             print("\n" * 3)
             input("Press Enter to shutdown the server and continue...")
-            self.engine_manager.cleanup(self.config)
+            self._cleanup_engine()
+
+    def category_runners(self):
+        """
+        Returns (category, runner) pairs in the order run() executes them.
+        Each runner takes a {graph_key: [tests]} dict of that category.
+        """
+        return [
+            ("query", self.run_query_tests),
+            ("format", self.run_query_tests),
+            ("update", self.run_update_tests),
+            ("syntax", self.run_syntax_tests),
+            ("protocol", self.run_protocol_tests),
+            ("graphstoreprotocol", self.run_graphstore_protocol_tests),
+            ("graphstoreprotocol_structured",
+             self.run_structured_graphstore_protocol_tests),
+            ("federation", self.run_federation_tests),
+        ]
+
+    def groups(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], List[TestObject]]]:
+        """
+        Returns every (category, graph_key, tests) group of the suite in run order.
+
+        Each group is independent of the others: it starts from a fresh engine
+        and cleans up after itself, so groups may run in any order or in parallel.
+        """
+        return [
+            (category, graph_key, tests)
+            for category, _ in self.category_runners()
+            for graph_key, tests in self.tests.get(category, {}).items()
+        ]
+
+    def group_graph_paths(
+            self,
+            category: str,
+            graph_key: Tuple[Tuple[str, str], ...]) -> Tuple[Tuple[str, str], ...]:
+        """
+        Returns the graphs the engine is set up with for a group of the given category.
+        """
+        if category == "protocol":
+            # Work around for issue #25: add standard protocol test data files
+            return _augment_with_protocol_data(graph_key)
+        return graph_key
+
+    def prebuild(self) -> Tuple[int, int]:
+        """
+        Builds the indexes of all graph groups that are not yet in the index cache.
+
+        Returns:
+            (number of indexes available in the cache, number of failed builds)
+        """
+        available = failed = 0
+        for graph_paths in self.index_graph_sets():
+            if self.prebuild_index(graph_paths):
+                available += 1
+            else:
+                failed += 1
+        return available, failed
+
+    def index_graph_sets(self) -> List[Tuple[Tuple[str, str], ...]]:
+        """
+        Returns the distinct sets of graphs the suite sets the engine up with.
+        """
+        return list(dict.fromkeys(
+            self.group_graph_paths(category, graph_key)
+            for category, graph_key, _ in self.groups()
+        ))
+
+    def prebuild_index(self, graph_paths: Tuple[Tuple[str, str], ...]) -> bool:
+        """
+        Builds the index for graph_paths and stores it in the index cache.
+
+        Returns True if the index is in the cache afterwards.
+        """
+        key = self._index_cache_key(graph_paths)
+        if key is None:
+            return False
+        if self.index_cache.contains(key):
+            return True
+        log.info(f"Prebuilding index for graph / graphs: {graph_paths}")
+        self._cleanup_engine()
+        self._setup_seconds = self.timeout_policy.setup_seconds([])
+        try:
+            try:
+                success, index_log = self._bounded(
+                    self.engine_manager.build_index, self.config, graph_paths)
+            except DeadlineExceeded as e:
+                success, index_log = False, str(e)
+            if success:
+                success = self.index_cache.store(
+                    key, self.config, self.engine_manager.index_artifacts(self.config), index_log)
+            if not success:
+                log.error(f"Building the index failed for {graph_paths}:\n{index_log}")
+            return success
+        finally:
+            self._cleanup_engine()
+
+    def sessions(self) -> List[Tuple[Tuple[Tuple[str, str], ...], List[Tuple[str, List[TestObject]]]]]:
+        """
+        Returns the engine sessions of the suite in run order, as
+        (graph_key, [(category, tests), ...]) pairs.
+
+        All read-only groups (query, format, syntax) that share a graph key are
+        merged into one session, so e.g. the empty fallback graph is indexed
+        and served once instead of once per category. Every other group is a
+        session of its own. Like groups, sessions are independent of each other.
+        Tests whose results were taken over (resume, reuse_baseline) are left
+        out.
+        """
+        sessions = []
+        read_only = {}
+        for category, graph_key, tests in self.groups():
+            tests = self._pending_tests(tests)
+            if not tests:
+                continue
+            if category not in READ_ONLY_CATEGORIES:
+                sessions.append((graph_key, [(category, tests)]))
+                continue
+            if graph_key not in read_only:
+                read_only[graph_key] = []
+                sessions.append((graph_key, read_only[graph_key]))
+            read_only[graph_key].append((category, tests))
+        return sessions
+
+    def session_identity(
+            self,
+            graph_key: Tuple[Tuple[str, str], ...],
+            parts: List[Tuple[str, List[TestObject]]]) -> str:
+        """Returns the machine-independent name of a session (see sharding.py)."""
+        return session_identity(
+            graph_key,
+            [category for category, _ in parts],
+            self.config.path_to_test_suite,
+        )
+
+    def schedule(self, history: Dict[str, dict]):
+        """
+        Uses the session durations recorded by an earlier run (the "groups"
+        of this suite in its result file) for scheduled_sessions.
+        """
+        self._history = history
+
+    def scheduled_sessions(self) -> List[Tuple[Tuple[Tuple[str, str], ...], List[Tuple[str, List[TestObject]]]]]:
+        """
+        Returns sessions() ordered by expected duration, longest first (see
+        scheduling.py), for a pool of workers.
+        """
+        sessions = self.sessions()
+        estimates = estimate_seconds([
+            (
+                self.session_identity(graph_key, parts),
+                self.group_graph_paths(parts[0][0], graph_key),
+                sum(len(tests) for _, tests in parts),
+            )
+            for graph_key, parts in sessions
+        ], self._history)
+        return [sessions[i] for i in longest_first(estimates)]
+
+    def restrict_to_shard(self, index: int, count: int):
+        """
+        Keeps only the tests of the sessions of shard index (1..count); see
+        sharding.py. Tests that are in no session (Service Description tests
+        and tests of unknown types) belong to shard 1.
+        """
+        sessions = self.sessions()
+        shards = assign_shards([
+            (
+                self.session_identity(graph_key, parts),
+                sum(len(tests) for _, tests in parts),
+            )
+            for graph_key, parts in sessions
+        ], count)
+        in_sessions = sum(
+            len(tests) for _, parts in sessions for _, tests in parts)
+        kept = {}
+        for (graph_key, parts), shard in zip(sessions, shards):
+            if shard == index:
+                for category, tests in parts:
+                    kept.setdefault(category, {})[graph_key] = tests
+        kept_count = sum(
+            len(tests) for groups in kept.values() for tests in groups.values())
+        if index == 1:
+            kept["service"] = self.tests.get("service", {})
+            kept_count += self.test_count - in_sessions
+        self.tests = {
+            category: kept.get(category, {}) for category in self.tests
+        }
+        self.test_count = kept_count
+
+    def run_session(
+            self,
+            graph_key: Tuple[Tuple[str, str], ...],
+            parts: List[Tuple[str, List[TestObject]]]):
+        """
+        Runs one session returned by sessions() and records its duration in
+        group_durations.
+        """
+        self._timer = PhaseTimer()
+        with self._timer.phase("tests"):
+            if parts[0][0] in READ_ONLY_CATEGORIES:
+                self.run_read_only_session(graph_key, parts)
+            else:
+                for category, tests in parts:
+                    self.run_group(category, graph_key, tests)
+        self.group_durations[self.session_identity(graph_key, parts)] = {
+            **self._timer.durations(),
+            "testCount": sum(len(tests) for _, tests in parts),
+        }
+
+    def run_group(
+            self,
+            category: str,
+            graph_key: Tuple[Tuple[str, str], ...],
+            tests: List[TestObject]):
+        """
+        Runs the tests of a single graph group of the given category.
+        """
+        runner = dict(self.category_runners())[category]
+        runner({graph_key: tests})
 
     def run(self):
         """
         Main method to run all tests.
         """
         try:
-            self.run_query_tests(self.tests["query"])
-            self.run_query_tests(self.tests["format"])
-            self.run_update_tests(self.tests["update"])
-            self.run_syntax_tests(self.tests["syntax"])
-            self.run_protocol_tests(self.tests["protocol"])
-            self.run_graphstore_protocol_tests(self.tests["graphstoreprotocol"])
-            self.run_structured_graphstore_protocol_tests(
-                self.tests.get("graphstoreprotocol_structured", {}))
-            self.run_federation_tests(self.tests.get("federation", {}))
+            for graph_key, parts in self.sessions():
+                self.run_session(graph_key, parts)
+            self.close()
             self.skip_service_description_tests(self.tests.get("service", {}))
         except KeyboardInterrupt:
             log.warning("Interrupted by user.")
-            self.engine_manager.cleanup(self.config)
+            self.interrupted = True
+            self._cleanup_engine()
+            self.discard_index_snapshot()
 
     def skip_service_description_tests(self, graphs_list_of_tests):
         """
@@ -753,11 +1569,22 @@ class TestSuite:
                 )
 
     def compress_json_bz2(self, input_data, output_filename):
-        with bz2.BZ2File(output_filename, "w") as raw_file:
-            with io.TextIOWrapper(raw_file, encoding="utf-8") as zipfile:
-                json.dump(input_data, zipfile, indent=4)
+        console_report.write_json_bz2(input_data, output_filename)
         log.info("Done writing result file: " + output_filename)
 
+    def _result_dict(self, test: TestObject, key: str) -> dict:
+        """Returns the result dict of a test, or the one it was taken from."""
+        result = self._reused.get(key)
+        if result is None:
+            return test.to_dict(self.compact_passing)
+        result = {**result, "name": util.escape(test.name)}
+        diff = result.pop("diff", None)
+        if diff is not None:
+            (result["expectedHtml"], result["gotHtml"],
+             result["expectedHtmlRed"], result["gotHtmlRed"]) = HtmlDiff.from_json(
+                diff, COMPARATORS).render()
+        return result
+
     def build_results_dict(self) -> tuple[dict, dict]:
         """Returns (tests_data, info) for the suite without writing to disk."""
         data = {}
@@ -766,6 +1593,8 @@ class TestSuite:
         for test_format in self.tests:
             for graph in self.tests[test_format]:
                 for test in self.tests[test_format][graph]:
+                    # Before a duplicate name gets renamed below.
+                    key = journal_key(test)
                     match test.status:
                         case Status.PASSED:
                             passed += 1
@@ -782,10 +1611,10 @@ class TestSuite:
                                 continue
                             else:
                                 test.name = new_name
-                                data[new_name] = test.to_dict()
+                                data[new_name] = self._result_dict(test, key)
                                 break
                     else:
-                        data[test.name] = test.to_dict()
+                        data[test.name] = self._result_dict(test, key)
 
         info = {
             "passed": passed,
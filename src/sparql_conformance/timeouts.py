@@ -0,0 +1,189 @@
+"""Deadlines for the requests the harness sends to an engine.
+
+A pathological query (a runaway property path, a huge cartesian product) can
+keep ``EngineManager.query`` from returning at all. ``call_with_deadline``
+waits for every query and update only as long as the ``TimeoutPolicy`` allows.
+When a deadline passes, the test fails with ``ErrorMessage.TIMEOUT`` and the
+harness kills the engine (``EngineManager.cleanup``), which also ends the
+request still waiting for it, and restarts it for the remaining tests of the
+group.
+
+The calls that set the engine up and bring it back to a group's initial
+graphs (``setup``, ``build_index``, ``start_server``, ``load_dataset``,
+``snapshot_initial_state``, ``reset_graphs`` and ``graph_state``) run under
+the "setup" deadline of the group instead (``run_with_deadline``). A reset
+that passes it is replaced by a restart; a setup that passes it fails the
+group's tests with ``ErrorMessage.TIMEOUT``. Such a call still runs in its
+thread and could go on to start a server or write index files, so the
+harness stops the engine until the call has returned and then once more
+(``stop_abandoned_call``) before it sets the engine up again.
+
+The policy is given with ``--timeout``, either as seconds for every request
+or as a JSON object::
+
+    {"default": 60, "categories": {"update": 120}, "tests": {"pp37": 300}}
+
+Keys of "tests" are test or group names, as for ``--include``; a test's own
+entry wins over its group's, which wins over its category's, which wins over
+"default". The "setup" category, or an entry for the group in "tests",
+bounds the engine setup of a group. Without a policy, requests have no
+deadline.
+"""
+
+import argparse
+import json
+import threading
+from typing import Callable, Dict, Optional, Sequence, Tuple, TypeVar
+
+try:
+    from qlever.log import log
+except ImportError:
+    import logging
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    log = logging.getLogger(__name__)
+from sparql_conformance.test_object import TestObject
+
+# Status code of the response of a request that did not finish in time.
+TIMED_OUT = -1
+
+# Seconds to wait for a call that passed its deadline to return after the
+# engine was stopped, before stopping it again.
+ABANDONED_CALL_GRACE = 10
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised by run_with_deadline when the call did not return in time;
+    thread is the thread the call still runs in.
+    """
+
+    def __init__(self, message: str, thread: Optional[threading.Thread] = None):
+        super().__init__(message)
+        self.thread = thread
+
+
+class TimeoutPolicy:
+    """Seconds a request may take, by test, group, category or default."""
+
+    def __init__(
+            self,
+            default: Optional[float] = None,
+            categories: Optional[Dict[str, float]] = None,
+            tests: Optional[Dict[str, float]] = None):
+        self.default = default
+        self.categories = categories or {}
+        self.tests = tests or {}
+
+    def seconds(self, category: str, test: TestObject) -> Optional[float]:
+        """Return the deadline for a request of test, or None for no deadline."""
+        for name in (test.name, test.group):
+            if name in self.tests:
+                return self.tests[name]
+        return self.categories.get(category, self.default)
+
+    def setup_seconds(self, tests: Sequence[TestObject]) -> Optional[float]:
+        """Return the deadline for setting up or resetting the engine for tests."""
+        for test in tests:
+            if test.group in self.tests:
+                return self.tests[test.group]
+        return self.categories.get("setup", self.default)
+
+
+def _seconds(value, what: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise argparse.ArgumentTypeError(
+            f"{what} must be a positive number of seconds, not {value!r}")
+    return float(value)
+
+
+def parse_timeout_policy(value: str) -> TimeoutPolicy:
+    """Parse --timeout: seconds, or a JSON object as described above."""
+    try:
+        data = json.loads(value)
+    except json.JSONDecodeError as e:
+        raise argparse.ArgumentTypeError(
+            f"must be seconds or a JSON object: {e}") from None
+    if not isinstance(data, dict):
+        return TimeoutPolicy(default=_seconds(data, "the timeout"))
+    unknown = set(data) - {"default", "categories", "tests"}
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown keys {sorted(unknown)}; expected default, categories, tests")
+    default = data.get("default")
+    overrides = {}
+    for key in ("categories", "tests"):
+        entries = data.get(key, {})
+        if not isinstance(entries, dict):
+            raise argparse.ArgumentTypeError(f'"{key}" must be a JSON object')
+        overrides[key] = {
+            name: _seconds(seconds, f"the timeout of {name!r}")
+            for name, seconds in entries.items()
+        }
+    return TimeoutPolicy(
+        default=None if default is None else _seconds(default, "the default timeout"),
+        **overrides,
+    )
+
+
+def run_with_deadline(call: Callable[[], T], seconds: Optional[float]) -> T:
+    """
+    Call call and return its result, or raise DeadlineExceeded if it did not
+    return within seconds.
+
+    The call keeps running in a daemon thread after its deadline; the caller
+    is expected to stop the engine so it returns (see stop_abandoned_call).
+    """
+    if seconds is None:
+        return call()
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = call()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(
+        target=run, name="sparql-request-deadline", daemon=True)
+    thread.start()
+    thread.join(seconds)
+    if thread.is_alive():
+        raise DeadlineExceeded(f"No response within {seconds:g} seconds.", thread)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def stop_abandoned_call(
+        thread: threading.Thread,
+        stop: Callable[[], None],
+        grace: float = ABANDONED_CALL_GRACE):
+    """
+    Wait for the call of a DeadlineExceeded to return, calling stop (which
+    stops the engine) every grace seconds until it has, and once more after.
+
+    Whatever the call started before it returned, e.g. a server on the port
+    of the run, is stopped that way before the engine is set up again.
+    """
+    thread.join(grace)
+    while thread.is_alive():
+        log.warning(f"A call that passed its deadline is still running after "
+                    f"{grace:g} seconds; stopping the engine again.")
+        stop()
+        thread.join(grace)
+    stop()
+
+
+def call_with_deadline(
+        request: Callable[[], Tuple[int, str]],
+        seconds: Optional[float]) -> Tuple[int, str]:
+    """
+    Call request and return its response, or (TIMED_OUT, message) if it did
+    not return within seconds (see run_with_deadline).
+    """
+    try:
+        return run_with_deadline(request, seconds)
+    except DeadlineExceeded as e:
+        return TIMED_OUT, str(e)
@@ -1,8 +1,12 @@
-from typing import List, Tuple
+from collections import defaultdict, deque
+from typing import Callable, Hashable, Iterable, Iterator, List, Optional, Tuple
 
+from sparql_conformance.solution_keys import (
+    BNODE, datatype_classes, match_rows, numeric_key, same_bnode, same_datatype)
 from sparql_conformance.util import escape, is_number
 from io import StringIO
 import csv
+from sparql_conformance.html_diff import UnrenderedResult
 from sparql_conformance.test_object import Status, ErrorMessage
 
 def _build_column_mapping(expected_header: list, actual_header: list):
@@ -34,29 +38,25 @@ def _build_column_mapping(expected_header: list, actual_header: list):
     return mapping
 
 
-def _reorder_columns_to_expected(expected_array: list, actual_array: list):
+def _column_mapping(expected_header: list, actual_header: list):
     """
-    If the first rows (headers) of expected/actual are a permutation of each other,
-    reorder every row of the actual array to match the expected header order.
-    Otherwise, just return actual_array.
+    If the headers of expected/actual are a permutation of each other, return the
+    mapping of _build_column_mapping. Otherwise, return None.
     """
-    if not expected_array or not actual_array:
-        return actual_array
-
-    expected_header = expected_array[0]
-    actual_header = actual_array[0]
-
+    if expected_header is None or actual_header is None:
+        return None
     if sorted(expected_header) != sorted(actual_header):
-        return actual_array
-
-    mapping = _build_column_mapping(expected_header, actual_header)
-    if mapping is None:
-        return actual_array
+        return None
+    return _build_column_mapping(expected_header, actual_header)
 
-    def reorder_row(row):
-        return [row[i] if i < len(row) else "" for i in mapping]
 
-    return [reorder_row(r) for r in actual_array]
+def _reorder_rows(rows: Iterable[list], mapping) -> Iterator[list]:
+    """Reorder every row to the expected header order if mapping is not None."""
+    for row in rows:
+        if mapping is None:
+            yield row
+        else:
+            yield [row[i] if i < len(row) else "" for i in mapping]
 
 
 def write_csv_file(file_path: str, csv_rows: list):
@@ -101,7 +101,7 @@ def generate_highlighted_string_sv(
     Generates a string representation of an array, with specific rows highlighted.
 
     Parameters:
-        array (list): The array to be converted to a string.
+        array (Iterable[list]): The rows to be converted to a string.
         mark_red (list): The rows to be highlighted in red.
         remaining (list): The rows to be highlighted.
         result_type (str): The type of result (csv or tsv) to determine the separator.
@@ -110,19 +110,21 @@ def generate_highlighted_string_sv(
         str: A string representation of the array with highlighted rows.
     """
     separator = "," if result_type == "csv" else "\t"
+    remaining_rows = {tuple(row) for row in remaining}
+    red_rows = {tuple(row) for row in mark_red}
 
-    result_string = ""
+    parts = []
     for row in array:
-        if row in remaining:
-            if row in mark_red:
-                result_string += '<label class="red">'
+        if tuple(row) in remaining_rows:
+            if tuple(row) in red_rows:
+                parts.append('<label class="red">')
             else:
-                result_string += '<label class="yellow">'
-            result_string += escape(row_to_string(row, separator))
-            result_string += '</label>\n'
+                parts.append('<label class="yellow">')
+            parts.append(escape(row_to_string(row, separator)))
+            parts.append('</label>\n')
         else:
-            result_string += escape(row_to_string(row, separator)) + "\n"
-    return result_string
+            parts.append(escape(row_to_string(row, separator)) + "\n")
+    return "".join(parts)
 
 
 def compare_values(
@@ -149,14 +151,7 @@ def compare_values(
     # Blank nodes
     if len(value1) > 1 and len(
             value2) > 1 and value1[0] == "_" and value2[0] == "_":
-        if value1 not in map_bnodes and value2 not in map_bnodes:
-            map_bnodes[value1] = value2
-            map_bnodes[value2] = value1
-            return True
-        if map_bnodes.get(value1) == value2 and map_bnodes.get(
-                value2) == value1:
-            return True
-        return False
+        return same_bnode(value1, value2, map_bnodes)
     # In most cases the values are in the same representation
     if value1 == value2:
         return True
@@ -203,51 +198,109 @@ def compare_rows(
     return True
 
 
-def compare_array(
-        expected_result: list,
-        result: list,
-        result_copy: list,
-        expected_result_copy: list,
+def row_signature(
+        row: list,
+        value_class: Callable[[Optional[str]], Optional[str]]) -> Tuple[Hashable, bool]:
+    """
+    Builds the key of a row for matching it by lookup.
+
+    Rows that compare_rows considers equal have the same key. Blank node labels
+    are left out of the key.
+
+    Parameters:
+        row (list): The row.
+        value_class (Callable): Maps a value to the representative of its aliases.
+
+    Returns:
+        tuple (Hashable, bool): The key and whether the row contains a blank node.
+    """
+    values = []
+    has_bnode = False
+    for element in row:
+        value = element.split("^")[0]
+        if len(value) > 1 and value[0] == "_":
+            values.append(BNODE)
+            has_bnode = True
+        elif is_number(value):
+            values.append(("number", numeric_key(value)))
+        else:
+            values.append(("text", value_class(value)))
+    return tuple(values), has_bnode
+
+
+def remove_equal_rows(
+        expected_rows: Iterable[list],
+        actual_rows: Iterable[list],
         use_config: bool,
         alias: List[Tuple[str, str]],
-        map_bnodes: dict):
+        map_bnodes: dict) -> Tuple[List[int], List[list]]:
     """
-    Compares two arrays and removes equal rows from both arrays.
+    Pairs the actual rows with equal expected rows.
+
+    The expected rows are read once to index them by row_signature, then the actual
+    rows are streamed against this index. Only rows with blank nodes are kept and
+    paired with match_rows, which compares them with compare_rows under one blank
+    node mapping. Only the rows without a partner are returned.
 
     Parameters:
-        expected_result (list): The expected result array.
-        result (list): The actual result array.
-        result_copy (list): A copy of the actual result array for modification.
-        expected_result_copy (list): A copy of the expected result array for modification.
+        expected_rows (Iterable[list]): The rows of the expected result.
+        actual_rows (Iterable[list]): The rows of the actual result.
         use_config (bool): Flag to use configuration for additional comparison logic.
         alias (List[Tuple[str, str]]): Dictionary with aliases for datatypes ex. int = integer .
         map_bnodes (dict): Dictionary mapping the used bnodes.
+
+    Returns:
+        tuple (List[int], List[list]): The positions of the unpaired expected rows and the unpaired actual rows.
     """
-    for row1 in result:
-        equal = False
-        row2_delete = None
-        for row2 in expected_result:
-            if compare_rows(row1, row2, use_config, alias, map_bnodes):
-                equal = True
-                row2_delete = row2
-                break
-        if equal:
-            result_copy.remove(row1)
-            expected_result_copy.remove(row2_delete)
+    value_class = datatype_classes(alias) if use_config else same_datatype
+    candidates = defaultdict(deque)
+    expected_with_bnodes = []
+    for index, row in enumerate(expected_rows):
+        key, has_bnode = row_signature(row, value_class)
+        if has_bnode:
+            expected_with_bnodes.append((index, row))
+        else:
+            candidates[key].append(index)
+
+    remaining_actual = []
+    actual_with_bnodes = []
+    for position, row in enumerate(actual_rows):
+        key, has_bnode = row_signature(row, value_class)
+        if has_bnode:
+            actual_with_bnodes.append((position, row))
+        elif candidates.get(key):
+            candidates[key].popleft()
+        else:
+            remaining_actual.append((position, row))
+
+    pairs = match_rows(
+        [row for _, row in actual_with_bnodes],
+        [row for _, row in expected_with_bnodes],
+        lambda row: row_signature(row, value_class),
+        lambda actual, expected, mapping: compare_rows(
+            actual, expected, use_config, alias, mapping),
+        map_bnodes)
+    paired_actual = {actual for actual, _ in pairs}
+    paired_expected = {expected for _, expected in pairs}
+    remaining_actual += [
+        entry for i, entry in enumerate(actual_with_bnodes) if i not in paired_actual]
+    remaining_expected = [index for bucket in candidates.values() for index in bucket]
+    remaining_expected += [
+        index for i, (index, _) in enumerate(expected_with_bnodes) if i not in paired_expected]
+    return sorted(remaining_expected), [row for _, row in sorted(remaining_actual, key=lambda entry: entry[0])]
 
 
-def convert_csv_tsv_to_array(input_string: str, input_type: str):
+def iter_csv_tsv_rows(input_string: str, input_type: str) -> Iterator[list]:
     """
-    Converts a CSV/TSV string to an array of rows.
+    Reads the rows of a CSV/TSV string one at a time.
 
     Parameters:
         input_string (str): The CSV/TSV formatted string.
         input_type (str): The type of the input ('csv' or 'tsv').
 
     Returns:
-        An array representation of the input string.
+        Iterator[list]: The rows, without empty rows.
     """
-    rows = []
     delimiter = "," if input_type == "csv" else "\t"
     with StringIO(input_string) as io:
         reader = csv.reader(io, delimiter=delimiter)
@@ -255,15 +308,29 @@ def convert_csv_tsv_to_array(input_string: str, input_type: str):
             # Drop empty rows
             if not row or not any(cell.strip() for cell in row):
                 continue
-            rows.append(row)
-    return rows
+            yield row
+
+
+def convert_csv_tsv_to_array(input_string: str, input_type: str):
+    """
+    Converts a CSV/TSV string to an array of rows.
+
+    Parameters:
+        input_string (str): The CSV/TSV formatted string.
+        input_type (str): The type of the input ('csv' or 'tsv').
+
+    Returns:
+        An array representation of the input string.
+    """
+    return list(iter_csv_tsv_rows(input_string, input_type))
 
 
 def compare_sv(
         expected_string: str,
         query_result: str,
         result_format: str,
-        alias: List[Tuple[str, str]]):
+        alias: List[Tuple[str, str]],
+        render: bool = True):
     """
     Compares CSV/TSV formatted query result with the expected output.
 
@@ -272,6 +339,8 @@ def compare_sv(
         query_result (str): Actual CSV/TSV formatted string from the query.
         result_format (str): Format of the output ('csv' or 'tsv').
         alias (List[Tuple[str, str]]): Dictionary with aliases for datatypes ex. int = integer .
+        render (bool): If False, return empty strings for the HTML. A result that is not passed
+            is then an UnrenderedResult, which renders the HTML from the rows left unmatched.
 
     Returns:
         tuple(int, str, str, str, str, str): A tuple of test status and error message and expected html, query html, expected red, query red
@@ -280,58 +349,59 @@ def compare_sv(
     status = Status.FAILED
     error_type = ErrorMessage.RESULTS_NOT_THE_SAME
 
-    expected_array = convert_csv_tsv_to_array(expected_string, result_format)
-    actual_array = convert_csv_tsv_to_array(query_result, result_format)
+    # Normalize actual column order to match expected header
+    mapping = _column_mapping(
+        next(iter_csv_tsv_rows(expected_string, result_format), None),
+        next(iter_csv_tsv_rows(query_result, result_format), None))
+
+    def expected_rows():
+        return iter_csv_tsv_rows(expected_string, result_format)
 
-    # NEW: normalize actual column order to match expected header
-    actual_array = _reorder_columns_to_expected(expected_array, actual_array)
+    def actual_rows():
+        return _reorder_rows(iter_csv_tsv_rows(query_result, result_format), mapping)
 
-    actual_array_copy = actual_array.copy()
-    expected_array_copy = expected_array.copy()
+    # Only the rows without an equal partner are kept for the second pass and the html
+    remaining_indices, actual_array_copy = remove_equal_rows(
+        expected_rows(), actual_rows(), False, alias, map_bnodes)
+    remaining_indices = set(remaining_indices)
+    expected_array_copy = [
+        row for index, row in enumerate(expected_rows()) if index in remaining_indices]
     actual_array_mark_red = []
     expected_array_mark_red = []
 
-    compare_array(
-        expected_array,
-        actual_array,
-        actual_array_copy,
-        expected_array_copy,
-        False,
-        alias,
-        map_bnodes)
-
     if len(actual_array_copy) == 0 and len(expected_array_copy) == 0:
         status = Status.PASSED
         error_type = ""
     else:
-        actual_array_mark_red = actual_array_copy.copy()
-        expected_array_mark_red = expected_array_copy.copy()
-        compare_array(
-            expected_array_copy,
-            actual_array_copy,
-            actual_array_mark_red,
-            expected_array_mark_red,
-            True,
-            alias,
-            map_bnodes)
+        red_indices, actual_array_mark_red = remove_equal_rows(
+            expected_array_copy, actual_array_copy, True, alias, map_bnodes)
+        expected_array_mark_red = [expected_array_copy[index] for index in red_indices]
         if len(actual_array_mark_red) == 0 and len(
                 expected_array_mark_red) == 0:
             status = Status.INTENDED
             error_type = ErrorMessage.INTENDED_MSG
 
-    expected_html = generate_highlighted_string_sv(
-        expected_array,
-        expected_array_copy,
-        expected_array_mark_red,
-        result_format)
-    actual_html = generate_highlighted_string_sv(
-        actual_array, actual_array_copy, actual_array_mark_red, result_format)
-    expected_html_red = generate_highlighted_string_sv(
-        expected_array_copy,
-        expected_array_copy,
-        expected_array_mark_red,
-        result_format)
-    actual_html_red = generate_highlighted_string_sv(
-        actual_array_copy, actual_array_copy, actual_array_mark_red, result_format)
-
-    return status, error_type, expected_html, actual_html, expected_html_red, actual_html_red
+    def render_html() -> tuple:
+        # The full results are read again; only the unmatched rows were kept.
+        return (
+            generate_highlighted_string_sv(
+                expected_rows(),
+                expected_array_copy,
+                expected_array_mark_red,
+                result_format),
+            generate_highlighted_string_sv(
+                actual_rows(), actual_array_copy, actual_array_mark_red, result_format),
+            generate_highlighted_string_sv(
+                expected_array_copy,
+                expected_array_copy,
+                expected_array_mark_red,
+                result_format),
+            generate_highlighted_string_sv(
+                actual_array_copy, actual_array_copy, actual_array_mark_red, result_format),
+        )
+
+    if not render:
+        if status == Status.PASSED:
+            return status, error_type, "", "", "", ""
+        return UnrenderedResult(status, error_type, render_html)
+    return (status, error_type, *render_html())
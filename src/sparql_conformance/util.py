@@ -1,6 +1,7 @@
 import re
 import os
 import shutil
+import sys
 from argparse import Namespace
 from pathlib import Path
 from typing import Optional
@@ -13,8 +14,15 @@ except ImportError:
     import logging
     log = logging.getLogger(__name__)
     get_container_image_id = None
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 from sparql_conformance.config import Config
 
+# ioctl request that clones a file's data blocks (Linux, btrfs/XFS/...).
+_FICLONE = 0x40049409
+
 
 def make_args(config: Config, **overrides):
     base = dict(
@@ -194,6 +202,8 @@ def copy_graph_to_workdir(file_path: str, workdir: str) -> str:
     """
     Copy the file to the docker working directory and returns the new relative path.
 
+    The copy is a read-only clone of a staged file, see staging.py.
+
     Args:
         file_path (str): Path to the source file.
         workdir (str): Path to the working directory mounted in docker.
@@ -201,12 +211,90 @@ def copy_graph_to_workdir(file_path: str, workdir: str) -> str:
     Returns:
         str: Basename, usable inside the container.
     """
+    from sparql_conformance.staging import stage_file
+
     src = Path(file_path).resolve()
     dest = Path(workdir).resolve() / src.name
-    shutil.copy(src, dest)
+    if dest != src:
+        stage_file(str(dest), "copy", src.read_bytes(), (), lambda content: content)
     return src.name
 
 
+def clone_path(source: str, destination: str, hardlink: bool = False):
+    """
+    Copy a file or directory tree, sharing the data blocks where possible.
+
+    Every file is cloned as a reflink (copy-on-write) if the file system
+    supports it, else hard linked if `hardlink` is set, else copied. Hard
+    links are only safe for files that are never modified in place. An
+    existing destination is replaced.
+    """
+    def clone_file(src: str, dst: str):
+        if _reflink(src, dst):
+            return
+        if hardlink:
+            try:
+                os.link(src, dst)
+                return
+            except OSError:
+                pass
+        shutil.copy2(src, dst)
+
+    parent = os.path.dirname(destination)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    if os.path.isdir(destination) and not os.path.islink(destination):
+        shutil.rmtree(destination)
+    elif os.path.lexists(destination):
+        os.remove(destination)
+    if os.path.isdir(source):
+        shutil.copytree(source, destination, copy_function=clone_file)
+    else:
+        clone_file(source, destination)
+
+
+def _reflink(source: str, destination: str) -> bool:
+    """Clone source to the new file destination; False if not supported."""
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    except OSError:
+        if os.path.exists(destination):
+            os.remove(destination)
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+def engine_identity(config: Config, *binaries: str) -> str:
+    """
+    Identify the engine build used by config, for the index cache key.
+
+    For containers this is the image name plus its local image id. For native
+    runs it is the size and modification time of each of the given binaries
+    in the binaries directory (or on the PATH).
+    """
+    if config.system != "native":
+        image_id = ""
+        if config.image and get_container_image_id is not None:
+            image_id = get_container_image_id(config.system, config.image) or ""
+        return f"{config.system}:{config.image}:{image_id}"
+    parts = []
+    for binary in binaries:
+        path = os.path.join(config.path_to_binaries, binary)
+        if not os.path.exists(path):
+            path = shutil.which(binary) or path
+        try:
+            stat = os.stat(path)
+        except OSError:
+            parts.append(f"{binary}:missing")
+            continue
+        parts.append(f"{binary}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "native:" + ",".join(parts)
+
+
 def get_accept_header(result_format: str) -> str:
     format_headers = {
         "csv": "text/csv",
@@ -1,8 +1,12 @@
 import re
 import xml.etree.ElementTree as ET
 import xml.dom.minidom as md
-from typing import List, Tuple
+from collections import Counter
+from typing import Callable, Hashable, List, Optional, Tuple
 
+from sparql_conformance.solution_keys import (
+    BNODE, datatype_classes, literal_key, match_rows, same_bnode, same_datatype)
+from sparql_conformance.html_diff import UnrenderedResult
 from sparql_conformance.test_object import Status, ErrorMessage
 from sparql_conformance.util import escape
 
@@ -241,27 +245,11 @@ def xml_elements_equal(
                             str) and element1.tail.strip() != element2.tail.strip()):
             return False
 
+    if element1.tag == element2.tag == "{http://www.w3.org/2005/sparql-results#}bnode":
+        # Also if the labels are the same: the two documents may use one
+        # label for different nodes.
+        return same_bnode(element1.text, element2.text, map_bnodes)
     if element1.text != element2.text:
-        if element1.tag == "{http://www.w3.org/2005/sparql-results#}bnode":
-            if element1.text not in map_bnodes and element2.text not in map_bnodes:
-                map_bnodes[element1.text] = element2.text
-                map_bnodes[element2.text] = element1.text
-                return all(any(xml_elements_equal(
-                    c1,
-                    c2,
-                    compare_with_intended_behaviour,
-                    alias,
-                    number_types,
-                    map_bnodes) for c2 in element2) for c1 in element1)
-            elif map_bnodes.get(element1.text) == element2.text and map_bnodes.get(element2.text) == element1.text:
-                return all(any(xml_elements_equal(
-                    c1,
-                    c2,
-                    compare_with_intended_behaviour,
-                    alias,
-                    number_types,
-                    map_bnodes) for c2 in element2) for c1 in element1)
-            return False
         if (element1.text is None and element2.text.strip() == "") or (
                 element2.text is None and element1.text.strip() == ""):
             return all(any(xml_elements_equal(
@@ -301,6 +289,44 @@ def xml_elements_equal(
             map_bnodes) for c2 in element2) for c1 in element1)
 
 
+def xml_signature(
+        element: ET.Element,
+        datatype_class: Callable[[Optional[str]], Optional[str]],
+        number_types: list) -> Tuple[Hashable, bool]:
+    """
+    Builds the key of an XML element for matching it by lookup.
+
+    Elements that xml_elements_equal considers equal have the same key. Blank
+    node labels are left out of the key.
+
+    Parameters:
+        element (ET.Element): The XML element.
+        datatype_class (Callable): Maps a datatype to the representative of its aliases.
+        number_types (list): List containing all datatypes that should be used as numbers.
+
+    Returns:
+        tuple (Hashable, bool): The key and whether the element contains a blank node.
+    """
+    attributes = dict(element.attrib)
+    datatype = attributes.pop("datatype", None)
+    language = attributes.pop("{http://www.w3.org/XML/1998/namespace}lang", None)
+    has_bnode = element.tag == "{http://www.w3.org/2005/sparql-results#}bnode"
+    text = BNODE if has_bnode else (element.text or "").strip()
+    children = Counter()
+    for child in element:
+        child_key, child_has_bnode = xml_signature(child, datatype_class, number_types)
+        children[child_key] += 1
+        has_bnode = has_bnode or child_has_bnode
+    key = (
+        element.tag,
+        frozenset(attributes.items()),
+        literal_key(datatype, language, text, datatype_class, number_types),
+        (element.tail or "").strip(),
+        frozenset(children.items()),
+    )
+    return key, has_bnode
+
+
 def xml_remove_equal_elements(
         parent1: ET.Element,
         parent2: ET.Element,
@@ -311,8 +337,9 @@ def xml_remove_equal_elements(
     """
     Compares and removes equal child elements from two parent XML elements.
 
-    This method iterates over the children of two given parent XML elements and removes
-    matching children from both parents.
+    This method pairs the children of the two parents with match_rows and removes the
+    pairs. Children without blank nodes are paired by their xml_signature, only children
+    with blank nodes are compared with xml_elements_equal, under one blank node mapping.
 
     Parameters:
         parent1 (ET.Element): The first parent XML element.
@@ -322,25 +349,28 @@ def xml_remove_equal_elements(
         number_types (list): List containing all datatypes that should be used as numbers.
         map_bnodes (dict): Dictionary mapping the used bnodes.
     """
-    for child1 in list(parent1):
-        for child2 in list(parent2):
-            if xml_elements_equal(
-                    child1,
-                    child2,
-                    use_config,
-                    alias,
-                    number_types,
-                    map_bnodes):
-                parent1.remove(child1)
-                parent2.remove(child2)
-                break
+    datatype_class = datatype_classes(alias) if use_config else same_datatype
+    children1 = list(parent1)
+    children2 = list(parent2)
+    pairs = match_rows(
+        children1,
+        children2,
+        lambda element: xml_signature(element, datatype_class, number_types),
+        lambda child1, child2, mapping: xml_elements_equal(
+            child1, child2, use_config, alias, number_types, mapping),
+        map_bnodes)
+    matched1 = {index1 for index1, _ in pairs}
+    matched2 = {index2 for _, index2 in pairs}
+    parent1[:] = [child for i, child in enumerate(children1) if i not in matched1]
+    parent2[:] = [child for i, child in enumerate(children2) if i not in matched2]
 
 
 def compare_xml(
         expected_xml: str,
         query_xml: str,
         alias: List[Tuple[str, str]],
-        number_types: list) -> tuple:
+        number_types: list,
+        render: bool = True) -> tuple:
     """
     Compares two XML documents, identifies differences and generates HTML representations.
 
@@ -352,6 +382,8 @@ def compare_xml(
         query_xml (str): The query XML content as a string.
         alias (dict): Dictionary with aliases for datatypes ex. int = integer .
         number_types (list): List containing all datatypes that should be used as numbers.
+        render (bool): If False, return empty strings for the HTML. A result that is not passed
+            is then an UnrenderedResult, which renders the HTML from the rows left unmatched.
 
     Returns:
         tuple (str,str,str,str,str,str): A tuple containing the status, error type and the strings XML1, XML2, XML1 RED, XML2 RED
@@ -447,11 +479,10 @@ def compare_xml(
             alias,
             number_types,
             map_bnodes)
-    # Copy expected_tree
+    # Copy the trees: the rows left now are shown, the rows the
+    # intended-behaviour pass leaves are highlighted.
     expected_tree_string = ET.tostring(expected_tree.getroot())
     copied_expected_tree = ET.ElementTree(ET.fromstring(expected_tree_string))
-
-    # Copy query_tree
     query_tree_string = ET.tostring(query_tree.getroot())
     copied_query_tree = ET.ElementTree(ET.fromstring(query_tree_string))
     if (
@@ -480,6 +511,13 @@ def compare_xml(
             status = Status.PASSED
             error_type = ""
 
-    expected_string, query_string, expected_string_red, query_string_red = generate_html_for_xml(
-        expected_xml, query_xml, copied_expected_tree, copied_query_tree, expected_tree, query_tree, number_types)
-    return status, error_type, expected_string, query_string, expected_string_red, query_string_red
+    def render_html() -> tuple:
+        return generate_html_for_xml(
+            expected_xml, query_xml, copied_expected_tree, copied_query_tree,
+            expected_tree, query_tree, number_types)
+
+    if not render:
+        if status == Status.PASSED:
+            return status, error_type, "", "", "", ""
+        return UnrenderedResult(status, error_type, render_html)
+    return (status, error_type, *render_html())
@@ -0,0 +1,95 @@
+"""Fixtures for the tests that run the mini-suite with the rdflib reference engine."""
+
+from pathlib import Path
+
+import pytest
+
+from sparql_conformance.config import Config
+from sparql_conformance.extract_tests import extract_tests
+from sparql_conformance.runner import run_suites
+from sparql_conformance.testsuite import TestSuite
+
+MINI_SUITE = Path(__file__).parent / "fixtures" / "mini-suite"
+
+
+def _make_config(suite_dir, exclude=(), run_id=None):
+    options = {} if run_id is None else {"run_id": run_id}
+    return Config(
+        image=None,
+        system="native",
+        port="7001",
+        graph_store="sparql",
+        testsuite_dir=str(suite_dir),
+        type_alias=[],
+        binaries_directory="",
+        exclude=list(exclude),
+        include=None,
+        **options,
+    )
+
+
+@pytest.fixture
+def mini_suite():
+    """The directory of the mini-suite."""
+    return MINI_SUITE
+
+
+@pytest.fixture
+def make_config():
+    """make_config(suite_dir, exclude=(), run_id=None) -> Config of a native run."""
+    return _make_config
+
+
+@pytest.fixture
+def make_suite():
+    """
+    make_suite(engine_manager, suite_dir=MINI_SUITE, name="mini", exclude=(),
+    run_id=None, **options) -> TestSuite with the extracted tests, without
+    reports; options are passed on to TestSuite.
+    """
+    def make(engine_manager, suite_dir=MINI_SUITE, name="mini", exclude=(),
+             run_id=None, **options):
+        config = _make_config(suite_dir, exclude, run_id)
+        tests, test_count = extract_tests(config)
+        return TestSuite(
+            name=name,
+            tests=tests,
+            test_count=test_count,
+            config=config,
+            engine_manager=engine_manager,
+            report_mode="none",
+            **options,
+        )
+    return make
+
+
+@pytest.fixture
+def run(tmp_path):
+    """
+    run(manager, name, suite_dir=MINI_SUITE, **options) -> the output of
+    run_suites for the suite "mini" with results in tmp_path/results;
+    options are passed on to run_suites.
+    """
+    def run(manager, name, suite_dir=MINI_SUITE, **options):
+        return run_suites(
+            [("mini", str(suite_dir))],
+            _make_config,
+            lambda: manager,
+            name=name,
+            results_dir=str(tmp_path / "results"),
+            report_mode="none",
+            **options,
+        )
+    return run
+
+
+@pytest.fixture
+def statuses():
+    """statuses(suite_or_output) -> {test name: status} of a TestSuite or a run output."""
+    def statuses(result):
+        if isinstance(result, TestSuite):
+            tests, _ = result.build_results_dict()
+        else:
+            tests = result["suites"]["mini"]["tests"]
+        return {name: entry["status"] for name, entry in tests.items()}
+    return statuses
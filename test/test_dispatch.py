@@ -0,0 +1,65 @@
+"""Test concurrent requests within a graph group (--request-concurrency)."""
+
+import threading
+import time
+
+from sparql_conformance.dispatch import dispatch
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+
+
+class ConcurrentManager(RdflibEngineManager):
+    """Tracks how many requests are in flight at once."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def supports_concurrent_requests(self):
+        return True
+
+    def query(self, config, query, result_format):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.05)
+        # rdflib's query parser is not thread-safe.
+        with self._lock:
+            self.in_flight -= 1
+            return super().query(config, query, result_format)
+
+
+def test_concurrent_requests_give_the_sequential_results(
+        tmp_path, monkeypatch, run, statuses):
+    monkeypatch.chdir(tmp_path)
+    sequential_manager = ConcurrentManager()
+    sequential = run(sequential_manager, "sequential", request_concurrency=1)
+    concurrent_manager = ConcurrentManager()
+    concurrent = run(concurrent_manager, "concurrent", request_concurrency=4)
+
+    assert sequential_manager.max_in_flight == 1
+    assert concurrent_manager.max_in_flight > 1
+    assert list(concurrent["suites"]["mini"]["tests"]) == list(
+        sequential["suites"]["mini"]["tests"])
+    assert statuses(concurrent) == statuses(sequential)
+    assert concurrent["info"] == sequential["info"]
+
+
+def test_unsupported_engine_gets_one_request_at_a_time(tmp_path, monkeypatch, run):
+    monkeypatch.chdir(tmp_path)
+    manager = ConcurrentManager()
+    manager.supports_concurrent_requests = lambda: False
+    run(manager, "unsupported", request_concurrency=4)
+    assert manager.max_in_flight == 1
+
+
+def test_dispatch_yields_responses_in_request_order():
+    def request(i):
+        def call():
+            time.sleep(0.01 * (5 - i))
+            return 200, str(i)
+        return call
+
+    responses = list(dispatch([request(i) for i in range(5)], 3))
+    assert responses == [(200, str(i)) for i in range(5)]
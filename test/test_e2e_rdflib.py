@@ -2,6 +2,7 @@
 using the in-process rdflib reference engine (no docker, no binaries)."""
 
 import bz2
+import hashlib
 import json
 from pathlib import Path
 
@@ -207,3 +208,85 @@ def test_relative_graph_data_uses_its_resolved_file_iri(tmp_path, monkeypatch):
     suite.run()
     statuses, _ = statuses_by_name(suite)
     assert statuses["graph-iri"] == Status.PASSED
+
+
+def find_test(suite, name):
+    return next(
+        test
+        for graphs in suite.tests.values()
+        for tests in graphs.values()
+        for test in tests
+        if test.name == name
+    )
+
+
+def test_passing_tests_show_their_payloads_without_highlighting(run_results):
+    select = find_test(run_results, "select-basic")
+    assert select.diff is not None
+    entry = select.to_dict()
+    assert select.diff is None
+    assert entry["gotHtml"] and "<label" not in entry["gotHtml"]
+    assert entry["expectedHtmlRed"] == entry["gotHtmlRed"] == ""
+
+    update = run_results.build_results_dict()[0]["update-insert"]
+    assert update["expectedHtml"].startswith("<b>default:</b><br>")
+
+
+def test_failing_tests_are_highlighted_when_written(run_results):
+    test = find_test(run_results, "select-basic")
+    expected = (Path(FIXTURE_SUITE) / "select-basic.srx").read_text(encoding="utf-8")
+    wrong = expected.replace("<literal>x</literal>", "<literal>y</literal>")
+    test.expected_result_set = False
+    run_results.evaluate_query(expected, wrong, test, "srx")
+
+    assert test.status == Status.FAILED
+    assert test.got_html == ""
+    entry = test.to_dict()
+    assert '<label class="red">' in entry["gotHtml"]
+    assert "y" in entry["gotHtmlRed"]
+
+
+def test_failing_results_render_without_comparing_again(monkeypatch):
+    from sparql_conformance import rdf_tools, tsv_csv_tools
+    from sparql_conformance.html_diff import UnrenderedResult
+    from sparql_conformance.json_tools import compare_json
+    from sparql_conformance.xml_tools import compare_xml
+
+    srx = (Path(FIXTURE_SUITE) / "select-basic.srx").read_text(encoding="utf-8")
+    srj = json.dumps({"head": {"vars": ["s"]}, "results": {"bindings": [
+        {"s": {"type": "literal", "value": "x"}}]}})
+    comparisons = [
+        (compare_xml, (srx, srx.replace(">x<", ">y<"), [], [])),
+        (compare_json, (srj, srj.replace('"x"', '"y"'), [], [])),
+        (tsv_csv_tools.compare_sv, ("s\nx\n", "s\ny\n", "csv", [])),
+        (rdf_tools.compare_ttl, ("<http://e/s> <http://e/p> 1 .", "<http://e/s> <http://e/p> 2 .")),
+    ]
+    for compare, args in comparisons:
+        rendered = compare(*args)
+        result = compare(*args, render=False)
+        assert isinstance(result, UnrenderedResult)
+        assert result[:2] == rendered[:2] and result[2:] == ("", "", "", "")
+        # Rendering uses what the comparison left, not another comparison.
+        monkeypatch.setattr(rdf_tools, "graphs_isomorphic", None)
+        monkeypatch.setattr(tsv_csv_tools, "remove_equal_rows", None)
+        assert result.render() == rendered[2:]
+        monkeypatch.undo()
+
+def test_compact_mode_stores_hashes_of_passing_tests(run_results):
+    compact_entry = run_results.build_results_dict()[0]["select-basic"]
+    run_results.compact_passing = True
+    compact = run_results.build_results_dict()[0]
+    run_results.compact_passing = False
+    full = run_results.build_results_dict()[0]
+
+    entry = compact["select-basic"]
+    assert entry["status"] == Status.PASSED
+    assert entry["name"] == "select-basic"
+    assert entry["queryFile"] == "sha256:" + hashlib.sha256(
+        full["select-basic"]["queryFile"].encode("utf-8")).hexdigest()
+    assert entry["gotHtml"].startswith("sha256:")
+    assert entry["expectedHtmlRed"] == ""
+    assert compact_entry == full["select-basic"]
+    # Tests that did not pass keep everything.
+    assert compact["service-description"] == full["service-description"]
+    assert len(json.dumps(compact)) < len(json.dumps(full))
@@ -0,0 +1,87 @@
+"""The on-disk cache of parsed expected results."""
+
+import os
+
+import pytest
+import rdflib
+
+from sparql_conformance import expectations
+from sparql_conformance.expectations import ExpectationCache, graph_from_state, graph_state
+from sparql_conformance.rdf_tools import compare_ttl
+from sparql_conformance.result_set_tools import expected_is_result_set
+from sparql_conformance.test_object import Status
+
+TURTLE = """@prefix ex: <http://example.org/> .
+ex:s ex:p "a", 1, [ ex:q "b"@en ] .
+"""
+
+
+@pytest.fixture()
+def cache_dir(tmp_path):
+    directory = str(tmp_path / "expectations")
+    expectations.use_directory(directory)
+    yield directory
+    expectations.use_directory(None)
+
+
+def fail_to_build():
+    raise AssertionError("parsed again")
+
+
+def test_entries_are_shared_across_caches_on_disk(tmp_path):
+    directory = str(tmp_path / "cache")
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"parsed": True}
+
+    assert ExpectationCache(directory).get("kind", "content", ("x",), build) == {"parsed": True}
+    assert ExpectationCache(directory).get("kind", "content", ("x",), fail_to_build) == {"parsed": True}
+    assert len(builds) == 1
+    # Another content or parse parameter is another entry.
+    ExpectationCache(directory).get("kind", "content", ("y",), build)
+    ExpectationCache(directory).get("kind", "other", ("x",), build)
+    assert len(builds) == 3
+
+
+def test_unreadable_entries_are_parsed_again(tmp_path):
+    directory = str(tmp_path / "cache")
+    cache = ExpectationCache(directory)
+    cache.get("kind", "content", (), lambda: 1)
+    (path,) = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(directory) for name in names
+    ]
+    with open(path, "wb") as f:
+        f.write(b"not a pickle")
+    assert ExpectationCache(directory).get("kind", "content", (), lambda: 2) == 2
+
+
+def test_graph_state_round_trip():
+    graph = rdflib.Graph()
+    graph.parse(data=TURTLE, format="turtle")
+    restored = graph_from_state(graph_state(graph))
+    assert set(restored) == set(graph)
+    assert dict(restored.namespaces())["ex"] == rdflib.URIRef("http://example.org/")
+
+
+def test_comparisons_use_the_cached_expectation(cache_dir, monkeypatch):
+    assert compare_ttl(TURTLE, TURTLE)[0] == Status.PASSED
+    assert not expected_is_result_set(TURTLE, "ttl")
+
+    # A new process only finds the entries on disk.
+    expectations.use_directory(None)
+    expectations.use_directory(cache_dir)
+    real_parse = rdflib.Graph.parse
+    parsed = []
+
+    def recording_parse(graph, *args, **kwargs):
+        parsed.append(kwargs.get("data"))
+        return real_parse(graph, *args, **kwargs)
+
+    monkeypatch.setattr(rdflib.Graph, "parse", recording_parse)
+    assert compare_ttl(TURTLE, TURTLE)[0] == Status.PASSED
+    assert not expected_is_result_set(TURTLE, "ttl")
+    # Only the actual result was parsed.
+    assert parsed == [TURTLE]
@@ -1,9 +1,12 @@
 """Tests for manifest parsing and test grouping (extract_tests)."""
 
+import shutil
 from pathlib import Path
 
 import pytest
 
+import sparql_conformance.extract_tests as extract_module
+from sparql_conformance import expectations
 from sparql_conformance.config import Config
 from sparql_conformance.extract_tests import extract_tests
 
@@ -106,3 +109,105 @@ def test_exclude_filter():
 def test_group_filter_matches_directory_name():
     _, count = extract_tests(make_config(include=["mini-suite"]))
     assert count == 8
+
+
+def test_manifests_are_parsed_once_per_content(tmp_path, monkeypatch):
+    suite_dir = tmp_path / "suite"
+    shutil.copytree(FIXTURE_SUITE, suite_dir)
+    config = make_config()
+    config.path_to_test_suite = str(suite_dir)
+    expectations.use_directory(str(tmp_path / "cache"))
+    try:
+        extract_tests(config)
+        # Another process with the same cache directory.
+        expectations.use_directory(None)
+        expectations.use_directory(str(tmp_path / "cache"))
+        parsed = []
+        real_parse_manifest = extract_module.parse_manifest
+
+        def recording_parse_manifest(path):
+            parsed.append(path)
+            return real_parse_manifest(path)
+
+        monkeypatch.setattr(extract_module, "parse_manifest", recording_parse_manifest)
+        config.include = ["select-basic"]
+        graph_index, count = extract_tests(config)
+        assert parsed == []
+        assert count == 1
+        assert all_tests(graph_index)[0].query_file
+
+        manifest = suite_dir / "manifest.ttl"
+        manifest.write_text(
+            manifest.read_text(encoding="utf-8").replace(
+                '"select-basic"', '"select-renamed"'),
+            encoding="utf-8",
+        )
+        config.include = ["select-renamed"]
+        _, count = extract_tests(config)
+        assert parsed == [str(manifest)]
+        assert count == 1
+    finally:
+        expectations.use_directory(None)
+
+
+def test_parallel_loading_keeps_the_manifest_order(tmp_path):
+    for group in ("first", "second", "third"):
+        shutil.copytree(FIXTURE_SUITE, tmp_path / group)
+    (tmp_path / "manifest-all.ttl").write_text(
+        """@prefix mf: <http://www.w3.org/2001/sw/DataAccess/tests/test-manifest#> .
+        <> a mf:Manifest ; mf:include (
+            <second/manifest.ttl> <first/manifest.ttl> <third/manifest.ttl>
+        ) .
+        """,
+        encoding="utf-8",
+    )
+    config = make_config(exclude=["syntax-bad"])
+    config.path_to_test_suite = str(tmp_path)
+
+    sequential, count = extract_tests(config)
+    parallel, parallel_count = extract_tests(config, jobs=2)
+
+    assert parallel_count == count == 21
+
+    def describe(graph_index):
+        return {
+            category: [(test.group, test.name) for test in all_tests({category: groups})]
+            for category, groups in graph_index.items()
+        }
+
+    assert describe(parallel) == describe(sequential)
+    assert [test.group for test in all_tests(parallel)][:3] == ["second"] * 3
+    assert all(test.config is config for test in all_tests(parallel))
+
+
+def test_cached_manifests_are_loaded_without_a_pool(tmp_path, monkeypatch):
+    for group in ("first", "second"):
+        shutil.copytree(FIXTURE_SUITE, tmp_path / group)
+    (tmp_path / "manifest-all.ttl").write_text(
+        """@prefix mf: <http://www.w3.org/2001/sw/DataAccess/tests/test-manifest#> .
+        <> a mf:Manifest ; mf:include ( <first/manifest.ttl> <second/manifest.ttl> ) .
+        """,
+        encoding="utf-8",
+    )
+    config = make_config()
+    config.path_to_test_suite = str(tmp_path)
+    expectations.use_directory(str(tmp_path / "cache"))
+    try:
+        pools = []
+        real_load_in_parallel = extract_module._load_manifests_in_parallel
+
+        def recording_load_in_parallel(*args):
+            pools.append(args[0])
+            return real_load_in_parallel(*args)
+
+        monkeypatch.setattr(
+            extract_module, "_load_manifests_in_parallel", recording_load_in_parallel)
+        _, cold_count = extract_tests(config, jobs=2)
+        assert len(pools) == 1
+
+        config.include = ["select-basic"]
+        _, count = extract_tests(config, jobs=2)
+        assert len(pools) == 1
+        assert cold_count == 16 and count == 2
+    finally:
+        expectations.use_directory(None)
@@ -0,0 +1,108 @@
+"""Test fingerprints and --changed-only with the rdflib reference engine."""
+
+import shutil
+
+from sparql_conformance import console_report, fingerprint
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+
+
+class CountingManager(RdflibEngineManager):
+    def __init__(self, version="rdflib test"):
+        super().__init__()
+        self.queries = []
+        self._version = version
+
+    def version(self, config):
+        return self._version
+
+    def query(self, config, query, result_format):
+        self.queries.append(query)
+        return super().query(config, query, result_format)
+
+
+def suite_tests(output):
+    return output["suites"]["mini"]["tests"]
+
+
+def test_changed_only_reruns_only_tests_with_changed_inputs(
+        tmp_path, monkeypatch, mini_suite, run, statuses):
+    monkeypatch.chdir(tmp_path)
+    suite_dir = tmp_path / "suite"
+    shutil.copytree(mini_suite, suite_dir)
+    baseline = run(CountingManager(), "baseline", suite_dir)
+    assert all(
+        entry["fingerprint"] for entry in suite_tests(baseline).values()
+        if entry["status"] != "Not tested"
+    )
+
+    with open(suite_dir / "select-int.rq", "a", encoding="utf-8") as f:
+        f.write("\n# changed\n")
+    manager = CountingManager()
+    output = run(manager, "changed", suite_dir,
+                 changed_only=str(tmp_path / "results" / "baseline.json.bz2"))
+
+    assert len(manager.queries) == 1
+    assert manager.queries[0].endswith("# changed\n")
+    assert statuses(output) == statuses(baseline)
+    assert output["info"] == baseline["info"]
+
+
+def test_new_engine_version_reruns_everything(tmp_path, monkeypatch, run):
+    monkeypatch.chdir(tmp_path)
+    baseline_manager = CountingManager()
+    run(baseline_manager, "baseline")
+
+    manager = CountingManager(version="rdflib test 2")
+    run(manager, "changed",
+        changed_only=str(tmp_path / "results" / "baseline.json.bz2"))
+    assert len(manager.queries) == len(baseline_manager.queries)
+
+
+def test_unknown_engine_version_records_no_fingerprints(tmp_path, monkeypatch, run):
+    monkeypatch.chdir(tmp_path)
+    output = run(CountingManager(version=""), "unknown")
+    assert not any(entry["fingerprint"] for entry in suite_tests(output).values())
+
+
+def test_changed_comparison_source_reruns_everything(tmp_path, monkeypatch, run):
+    monkeypatch.chdir(tmp_path)
+    baseline_manager = CountingManager()
+    run(baseline_manager, "baseline")
+
+    monkeypatch.setattr(fingerprint, "_result_source", lambda: "patched comparator")
+    manager = CountingManager()
+    run(manager, "changed",
+        changed_only=str(tmp_path / "results" / "baseline.json.bz2"))
+    assert len(manager.queries) == len(baseline_manager.queries)
+
+
+def test_run_context_depends_on_number_types(make_config, mini_suite):
+    config = make_config(mini_suite)
+    context = fingerprint.run_context(CountingManager(), config)
+    config.number_types = config.number_types[:1]
+    assert fingerprint.run_context(CountingManager(), config) != context
+
+
+def test_run_context_depends_on_the_comparison_budget(make_config, mini_suite):
+    config = make_config(mini_suite)
+    context = fingerprint.run_context(CountingManager(), config)
+    assert fingerprint.run_context(CountingManager(), config, 60) == context
+    assert fingerprint.run_context(CountingManager(), config, 5) != context
+
+
+def test_changed_only_reruns_tests_that_exceeded_the_comparison_budget(
+        tmp_path, monkeypatch, run):
+    monkeypatch.chdir(tmp_path)
+    run(CountingManager(), "baseline")
+    path = str(tmp_path / "results" / "baseline.json.bz2")
+    baseline = console_report.read_json_bz2(path)
+    entry = suite_tests(baseline)["construct-basic"]
+    entry["status"], entry["errorType"] = "Not tested", "Comparison budget exceeded"
+    console_report.write_json_bz2(baseline, path)
+
+    manager = CountingManager()
+    output = run(manager, "changed", changed_only=path)
+
+    assert len(manager.queries) == 1
+    assert "CONSTRUCT" in manager.queries[0].upper()
+    assert suite_tests(output)["construct-basic"]["status"] == "Passed"
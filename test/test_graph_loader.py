@@ -0,0 +1,125 @@
+"""Uploading the graphs of a group in one request or one request per graph."""
+
+import os
+
+import rdflib
+
+from sparql_conformance import expectations
+from sparql_conformance.graph_loader import (
+    NQUADS, NTRIPLES, GraphSource, _read_quads, read_quads, upload_graphs)
+
+TURTLE = """@prefix ex: <http://example.org/> .
+ex:s ex:p "01"^^<http://www.w3.org/2001/XMLSchema#integer>, <relative> .
+ex:s ex:q [ ex:r "b" ] .
+"""
+
+RDF_XML = """<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:ex="http://example.org/">
+  <rdf:Description rdf:about="x"><ex:p>v</ex:p></rdf:Description>
+</rdf:RDF>
+"""
+
+
+def write_sources(tmp_path):
+    (tmp_path / "data.ttl").write_text(TURTLE, encoding="utf-8")
+    (tmp_path / "data.rdf").write_text(RDF_XML, encoding="utf-8")
+    return [
+        GraphSource(str(tmp_path / "data.ttl"), None, "http://base/"),
+        GraphSource(str(tmp_path / "data.ttl"), "http://example.org/g", "http://example.org/g/"),
+        GraphSource(str(tmp_path / "data.rdf"), "http://example.org/g", "http://example.org/g/"),
+    ]
+
+
+def fail_to_send(*args):
+    raise AssertionError("unexpected request")
+
+
+def test_graphs_are_uploaded_as_one_nquads_request(tmp_path):
+    sent = []
+
+    def send_dataset(body, content_type):
+        sent.append((body, content_type))
+        return 204, ""
+
+    success, log = upload_graphs(write_sources(tmp_path), fail_to_send, send_dataset)
+
+    assert success
+    ((body, content_type),) = sent
+    assert content_type == NQUADS
+    dataset = rdflib.Dataset()
+    dataset.parse(data=body, format="nquads")
+    default = dataset.graph(rdflib.graph.DATASET_DEFAULT_GRAPH_ID)
+    named = dataset.graph(rdflib.URIRef("http://example.org/g"))
+    assert len(default) == 4
+    assert len(named) == 5
+    assert (None, None, rdflib.URIRef("http://base/relative")) in default
+    assert (rdflib.URIRef("http://example.org/g/x"), None, None) in named
+    # Literals keep their lexical form, blank nodes of the two files differ.
+    assert b'"01"^^<http://www.w3.org/2001/XMLSchema#integer>' in body
+    assert blank_nodes(default).isdisjoint(blank_nodes(named))
+    default_line, named_line = log.splitlines()
+    assert default_line.startswith("LOAD graph=- triples=4 bytes=")
+    assert named_line.startswith("LOAD graph=http://example.org/g triples=5 bytes=")
+    assert named_line.endswith(" status=204")
+
+
+def blank_nodes(graph):
+    return {node for node in graph.all_nodes() if isinstance(node, rdflib.BNode)}
+
+
+def test_graphs_are_uploaded_per_graph_without_quads_support(tmp_path):
+    sent = {}
+
+    def send_graph(graph, body, content_type):
+        assert content_type == NTRIPLES
+        sent[graph] = rdflib.Graph().parse(data=body, format="nt")
+        return (500, "no such graph") if graph else (201, "")
+
+    success, log = upload_graphs(write_sources(tmp_path), send_graph)
+
+    assert not success
+    assert len(sent[None]) == 4
+    assert len(sent["http://example.org/g"]) == 5
+    assert "status=201" in log.splitlines()[0]
+    assert log.splitlines()[1].endswith("status=500")
+    assert log.splitlines()[2] == "no such graph"
+
+
+def test_unreadable_files_fail_without_a_request(tmp_path):
+    (tmp_path / "broken.ttl").write_text("ex:s ex:p .", encoding="utf-8")
+    source = GraphSource(str(tmp_path / "broken.ttl"), None, "http://base/")
+
+    success, log = upload_graphs([source], fail_to_send, fail_to_send)
+
+    assert not success
+    assert log.startswith("LOAD_FAIL")
+
+
+def test_lexical_forms_survive_the_disk_cache(tmp_path, monkeypatch):
+    path = tmp_path / "data.ttl"
+    path.write_text(TURTLE, encoding="utf-8")
+    source = GraphSource(str(path), None, "http://base/")
+    for _ in range(2):
+        # Another process with the same cache directory.
+        monkeypatch.setattr(
+            expectations, "_cache", expectations.ExpectationCache(str(tmp_path / "cache")))
+        _read_quads.cache_clear()
+        objects = {str(o) for _, _, o, _ in read_quads(source)}
+        assert "01" in objects
+        assert rdflib.NORMALIZE_LITERALS is True
+    assert str(rdflib.Literal("01", datatype=rdflib.XSD.integer)) == "1"
+
+
+def test_read_quads_rereads_changed_files_and_keeps_them_out_of_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(expectations, "_cache", expectations.ExpectationCache())
+    path = tmp_path / "data.ttl"
+    path.write_text("<http://ex/s> <http://ex/p> 1 .\n", encoding="utf-8")
+    source = GraphSource(str(path), None, "http://base/")
+    assert read_quads(source) is read_quads(source)
+
+    path.write_text("<http://ex/s> <http://ex/p> 22 .\n", encoding="utf-8")
+    os.utime(path, ns=(0, 0))
+
+    assert [str(o) for _, _, o, _ in read_quads(source)] == ["22"]
+    assert not expectations._cache._memory
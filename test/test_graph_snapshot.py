@@ -0,0 +1,125 @@
+"""In-place graph resets (GraphSnapshot, TestSuite.reset_test_environment)."""
+
+import rdflib
+
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+from sparql_conformance.graph_snapshot import GraphSnapshot, SnapshotReset
+from sparql_conformance.testsuite import TestSuite
+
+
+class UpdateRecordingManager(RdflibEngineManager):
+    def __init__(self):
+        super().__init__()
+        self.updates = []
+        self.setups = 0
+
+    def setup(self, config, graph_paths):
+        self.setups += 1
+        return super().setup(config, graph_paths)
+
+    def update(self, config, query):
+        self.updates.append(query)
+        return super().update(config, query)
+
+
+def write_graphs(tmp_path):
+    default = tmp_path / "default.ttl"
+    default.write_text(
+        "<http://ex/a> <http://ex/p> [ <http://ex/q> 1 ] .\n", encoding="utf-8")
+    named = tmp_path / "named.ttl"
+    named.write_text("<http://ex/b> <http://ex/p> <http://ex/c> .\n", encoding="utf-8")
+    return ((str(default), "-"), (str(named), "http://ex/g1"))
+
+
+def test_restore_rewrites_only_changed_graphs(tmp_path, make_config):
+    config = make_config(".")
+    manager = UpdateRecordingManager()
+    manager.setup(config, write_graphs(tmp_path))
+    snapshot = GraphSnapshot.capture(manager, config)
+    initial = snapshot.fingerprint()
+
+    manager.update(config, "INSERT DATA { <http://ex/x> <http://ex/p> 2 }")
+    assert manager.graph_state(config) != initial
+    manager.updates.clear()
+
+    assert snapshot.restore(manager, config)
+
+    assert manager.graph_state(config) == initial
+    assert manager.updates[0] == "CLEAR SILENT DEFAULT"
+    assert not any("http://ex/g1" in update for update in manager.updates)
+
+
+def test_restore_drops_graphs_created_after_the_snapshot(tmp_path, make_config):
+    config = make_config(".")
+    manager = UpdateRecordingManager()
+    manager.setup(config, write_graphs(tmp_path))
+    snapshot = GraphSnapshot.capture(manager, config)
+
+    # The rdflib engine only updates the default graph; add the graph a test
+    # would have created directly.
+    manager._dataset.graph(rdflib.URIRef("http://ex/new")).add(
+        (rdflib.URIRef("http://ex/x"), rdflib.URIRef("http://ex/p"), rdflib.Literal(3)))
+
+    assert snapshot.restore(manager, config)
+    assert manager.updates == ["DROP SILENT GRAPH <http://ex/new>"]
+
+
+def test_failed_in_place_reset_falls_back_to_a_restart(tmp_path, monkeypatch, make_config):
+    monkeypatch.chdir(tmp_path)
+
+    class NoOpResetManager(UpdateRecordingManager):
+        def reset_graphs(self, config, graph_paths):
+            return True
+
+    manager = NoOpResetManager()
+    graph_paths = write_graphs(tmp_path)
+    suite = TestSuite(
+        name="reset",
+        tests={},
+        test_count=0,
+        config=make_config("."),
+        engine_manager=manager,
+    )
+    suite.setup_engine(graph_paths)
+    assert suite.capture_initial_state(graph_paths, [])
+    assert suite.reset_test_environment(graph_paths)
+    assert manager.setups == 1
+
+    manager.update(suite.config, "INSERT DATA { <http://ex/x> <http://ex/p> 2 }")
+    assert suite.reset_test_environment(graph_paths)
+    assert manager.setups == 2
+    assert manager.graph_state(suite.config) == suite._initial_state
+
+
+class SnapshotResetManager(SnapshotReset, UpdateRecordingManager):
+    def __init__(self):
+        super().__init__()
+        self.queries = []
+
+    def query(self, config, query, result_format):
+        self.queries.append(query)
+        return super().query(config, query, result_format)
+
+
+def test_snapshot_reset_checks_only_the_rewritten_graphs(tmp_path, make_config):
+    config = make_config(".")
+    manager = SnapshotResetManager()
+    manager.setup(config, write_graphs(tmp_path))
+    manager.snapshot_initial_state(config, ())
+    manager.queries.clear()
+    initial = manager.graph_state(config)
+    assert manager.queries == []
+    assert initial == GraphSnapshot.capture(manager, config).fingerprint()
+
+    manager.update(config, "INSERT DATA { <http://ex/x> <http://ex/p> 2 }")
+    manager.queries.clear()
+    assert manager.resets_in_place()
+    assert manager.reset_graphs(config, ())
+    assert manager.graph_state(config) == initial
+    # One capture of all three graphs, then the named graph list and the
+    # rewritten default graph again; the untouched g1 is not queried again.
+    assert len(manager.queries) == 5
+    assert sum("http://ex/g1" in query for query in manager.queries) == 1
+    # Without a reset in between the state is queried again.
+    manager.update(config, "INSERT DATA { <http://ex/x> <http://ex/p> 3 }")
+    assert manager.graph_state(config) != initial
@@ -0,0 +1,88 @@
+"""Hot-swap mode (--hot-swap) with the rdflib reference engine."""
+
+import pytest
+
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+
+# Without the update test the query and syntax sessions run back to back.
+WITHOUT_UPDATES = ["update-insert"]
+
+
+class EventRecordingManager(RdflibEngineManager):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def setup(self, config, graph_paths):
+        self.events.append("setup")
+        return super().setup(config, graph_paths)
+
+    def cleanup(self, config):
+        self.events.append("cleanup")
+        super().cleanup(config)
+
+    def load_dataset(self, config, graph_paths):
+        self.events.append("load")
+        return super().load_dataset(config, graph_paths)
+
+    def activate_syntax_test_mode(self, config):
+        self.events.append("syntax-mode")
+
+
+class NoSwapManager(EventRecordingManager):
+    def load_dataset(self, config, graph_paths):
+        self.events.append("load")
+        return False
+
+
+def test_hot_swap_loads_the_next_dataset_into_the_running_server(
+        tmp_path, monkeypatch, make_suite, statuses):
+    monkeypatch.chdir(tmp_path)
+    restarting = make_suite(EventRecordingManager(), exclude=WITHOUT_UPDATES, hot_swap=False)
+    restarting.run()
+
+    manager = EventRecordingManager()
+    suite = make_suite(manager, exclude=WITHOUT_UPDATES, hot_swap=True)
+    suite.run()
+
+    assert manager.events.count("setup") == 1
+    assert manager.events.count("load") == 1
+    # The syntax session activates the syntax mode on the swapped server, and
+    # that server is stopped afterwards.
+    assert manager.events[-3:] == ["load", "syntax-mode", "cleanup"]
+    assert manager._dataset is None
+    assert statuses(suite) == statuses(restarting)
+
+
+def test_hot_swap_falls_back_to_a_restart(tmp_path, monkeypatch, make_suite, statuses):
+    monkeypatch.chdir(tmp_path)
+    manager = NoSwapManager()
+    suite = make_suite(manager, exclude=WITHOUT_UPDATES, hot_swap=True)
+    suite.run()
+
+    restarting_manager = EventRecordingManager()
+    restarting = make_suite(restarting_manager, exclude=WITHOUT_UPDATES, hot_swap=False)
+    restarting.run()
+    assert manager.events.count("load") == 1
+    assert manager.events.count("setup") == restarting_manager.events.count("setup")
+    assert statuses(suite) == statuses(restarting)
+
+
+def test_blazegraph_swaps_the_dataset_with_drop_all(tmp_path):
+    pytest.importorskip("qblazegraph")
+    from sparql_conformance.engines.blazegraph_manager import BlazegraphManager
+
+    requests = []
+    manager = BlazegraphManager()
+    manager.update = lambda config, query: requests.append(query) or (200, "")
+    manager._load_graphs_over_http = lambda config, graph_paths: (
+        requests.append(graph_paths) or (True, ""))
+    graph_paths = ((str(tmp_path / "data.ttl"), "-"),)
+
+    manager._quads_mode = manager._requires_quads_mode(graph_paths)
+    assert manager.load_dataset(None, graph_paths)
+    assert requests == ["DROP ALL", graph_paths]
+
+    # A journal in the other mode can not take the graphs.
+    manager._quads_mode = not manager._quads_mode
+    assert not manager.load_dataset(None, graph_paths)
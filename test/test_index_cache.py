@@ -0,0 +1,170 @@
+"""On-disk index cache (--index-cache, prebuild) with the rdflib reference engine."""
+
+import os
+from pathlib import Path
+
+import rdflib
+
+from sparql_conformance.config import Config
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+from sparql_conformance.extract_tests import extract_tests
+from sparql_conformance.index_cache import IndexCache
+from sparql_conformance.parallel import prebuild_parallel
+from sparql_conformance.testsuite import TestSuite
+
+FIXTURE_SUITE = str(Path(__file__).parent / "fixtures" / "mini-suite")
+
+
+class IndexedRdflibManager(RdflibEngineManager):
+    """Builds an N-Quads "index" file that start_server loads."""
+
+    def __init__(self):
+        super().__init__()
+        self.builds = 0
+
+    def _index_file(self, config):
+        return f"{config.run_id}.index.nq"
+
+    def setup(self, config, graph_paths):
+        index_success, index_log = self.build_index(config, graph_paths)
+        if not index_success:
+            return False, False, index_log, ""
+        server_success, server_log = self.start_server(config, graph_paths)
+        return True, server_success, index_log, server_log
+
+    def build_index(self, config, graph_paths):
+        self.builds += 1
+        ok, _, index_log, _ = super().setup(config, graph_paths)
+        if ok:
+            self._dataset.serialize(self._index_file(config), format="nquads")
+        self._dataset = None
+        return ok, f"built {len(graph_paths)} graphs"
+
+    def start_server(self, config, graph_paths):
+        self._dataset = rdflib.Dataset()
+        self._dataset.parse(self._index_file(config), format="nquads")
+        return True, ""
+
+    def index_artifacts(self, config):
+        return [self._index_file(config)]
+
+    def cleanup(self, config):
+        super().cleanup(config)
+        if os.path.exists(self._index_file(config)):
+            os.remove(self._index_file(config))
+
+
+def make_config():
+    return Config(
+        image=None,
+        system="native",
+        port="7001",
+        graph_store="sparql",
+        testsuite_dir=FIXTURE_SUITE,
+        type_alias=[],
+        binaries_directory="",
+        exclude=[],
+        include=None,
+        run_id="cache",
+    )
+
+
+def make_suite(engine_manager, index_cache=None):
+    config = make_config()
+    tests, test_count = extract_tests(config)
+    return TestSuite(
+        name="cache",
+        tests=tests,
+        test_count=test_count,
+        config=config,
+        engine_manager=engine_manager,
+        report_mode="none",
+        index_cache=index_cache,
+    )
+
+
+def statuses(suite):
+    data, _ = suite.build_results_dict()
+    return {name: entry["status"] for name, entry in data.items()}
+
+
+def test_key_depends_on_contents_names_and_engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = tmp_path / "data.ttl"
+    data.write_text("<http://a> <http://b> <http://c> .\n", encoding="utf-8")
+    cache = IndexCache(str(tmp_path / "cache"))
+    config = make_config()
+    manager = IndexedRdflibManager()
+    key = cache.key(manager, config, ((str(data), "-"),))
+
+    assert key == cache.key(IndexedRdflibManager(), config, ((str(data), "-"),))
+    assert key != cache.key(manager, config, ((str(data), "http://g"),))
+    assert key != cache.key(RdflibEngineManager(), config, ((str(data), "-"),))
+    other_port = make_config()
+    other_port.port = "7002"
+    assert key == cache.key(manager, other_port, ((str(data), "-"),))
+
+    data.write_text("<http://a> <http://b> <http://d> .\n", encoding="utf-8")
+    assert key != cache.key(manager, config, ((str(data), "-"),))
+
+
+def test_key_of_location_dependent_data_includes_port_and_directory(
+        tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = tmp_path / "data.ttl"
+    data.write_text("<> <http://b> <http://c> .\n", encoding="utf-8")
+    cache = IndexCache(str(tmp_path / "cache"))
+    manager = IndexedRdflibManager()
+    config = make_config()
+    key = cache.key(manager, config, ((str(data), "-"),))
+
+    other_port = make_config()
+    other_port.port = "7002"
+    assert key != cache.key(manager, other_port, ((str(data), "-"),))
+    (tmp_path / "elsewhere").mkdir()
+    monkeypatch.chdir(tmp_path / "elsewhere")
+    assert key != cache.key(manager, config, ((str(data), "-"),))
+
+
+def test_second_run_restores_indexes_instead_of_building(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    plain = make_suite(IndexedRdflibManager())
+    plain.run()
+    statuses_without_cache = statuses(plain)
+
+    cache = IndexCache(str(tmp_path / "cache"))
+    first_manager = IndexedRdflibManager()
+    first = make_suite(first_manager, cache)
+    first.run()
+    expected = statuses(first)
+    assert first_manager.builds == len(first.index_graph_sets())
+
+    second_manager = IndexedRdflibManager()
+    second = make_suite(second_manager, cache)
+    second.run()
+
+    assert second_manager.builds == 0
+    assert statuses(second) == expected == statuses_without_cache
+    assert not (tmp_path / "cache.index.nq").exists()
+
+
+def test_prebuild_fills_the_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = IndexCache(str(tmp_path / "cache"))
+    suite = make_suite(IndexedRdflibManager(), cache)
+
+    available, failed = prebuild_parallel(suite, 2, IndexedRdflibManager)
+
+    assert (available, failed) == (len(suite.index_graph_sets()), 0)
+    manager = IndexedRdflibManager()
+    make_suite(manager, cache).run()
+    assert manager.builds == 0
+
+
+def test_prebuild_skips_engines_without_build_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = IndexCache(str(tmp_path / "cache"))
+    suite = make_suite(RdflibEngineManager(), cache)
+
+    assert suite.prebuild() == (0, len(suite.index_graph_sets()))
+    assert not (tmp_path / "cache").exists()
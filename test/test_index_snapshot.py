@@ -0,0 +1,129 @@
+"""Index snapshots for resets in mutating groups, with the rdflib reference engine."""
+
+import copy
+import os
+
+import pytest
+import rdflib
+
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+from sparql_conformance.extract_tests import extract_tests
+from sparql_conformance.index_snapshot import snapshot_directory
+from sparql_conformance.test_object import Status
+from sparql_conformance.testsuite import TestSuite
+from sparql_conformance.util import clone_path
+
+
+class IndexedManager(RdflibEngineManager):
+    """Builds an N-Quads "index" file that start_server loads."""
+
+    def __init__(self):
+        super().__init__()
+        self.builds = 0
+        self.starts = 0
+
+    def _index_file(self, config):
+        return f"{config.run_id}.index.nq"
+
+    def setup(self, config, graph_paths):
+        index_success, index_log = self.build_index(config, graph_paths)
+        if not index_success:
+            return False, False, index_log, ""
+        server_success, server_log = self.start_server(config, graph_paths)
+        return True, server_success, index_log, server_log
+
+    def build_index(self, config, graph_paths):
+        self.builds += 1
+        ok, _, _, _ = super().setup(config, graph_paths)
+        if ok:
+            self._dataset.serialize(self._index_file(config), format="nquads")
+        self._dataset = None
+        return ok, ""
+
+    def start_server(self, config, graph_paths):
+        self.starts += 1
+        self._dataset = rdflib.Dataset()
+        self._dataset.parse(self._index_file(config), format="nquads")
+        return True, ""
+
+    def index_artifacts(self, config):
+        return [self._index_file(config)]
+
+    def cleanup(self, config):
+        super().cleanup(config)
+        if os.path.exists(self._index_file(config)):
+            os.remove(self._index_file(config))
+
+
+class FailingResetManager(IndexedManager):
+    def reset_graphs(self, config, graph_paths):
+        return False
+
+
+@pytest.fixture
+def make_update_suite(make_config, mini_suite):
+    """A suite with `copies` runs of the mini-suite's update test in one group."""
+    def make(engine_manager, copies=3):
+        config = make_config(mini_suite, run_id="snap")
+        tests, _ = extract_tests(config)
+        (graph_key, [update_test]), = tests["update"].items()
+        group = [copy.deepcopy(update_test) for _ in range(copies)]
+        return TestSuite(
+            name="snap",
+            tests={"update": {graph_key: group}},
+            test_count=copies,
+            config=config,
+            engine_manager=engine_manager,
+            report_mode="none",
+        )
+    return make
+
+
+def test_resets_restart_from_the_snapshot_without_indexing(tmp_path, monkeypatch, make_update_suite):
+    monkeypatch.chdir(tmp_path)
+    manager = IndexedManager()
+    suite = make_update_suite(manager)
+    suite.run()
+
+    (group,) = suite.tests["update"].values()
+    assert [test.status for test in group] == [Status.PASSED] * 3
+    assert manager.builds == 1
+    assert manager.starts == 3
+    assert not os.path.exists(snapshot_directory(suite.config))
+
+
+def test_failed_in_place_reset_restarts_from_the_snapshot(tmp_path, monkeypatch, make_update_suite):
+    monkeypatch.chdir(tmp_path)
+    manager = FailingResetManager()
+    suite = make_update_suite(manager)
+    suite.run()
+
+    (group,) = suite.tests["update"].values()
+    assert [test.status for test in group] == [Status.PASSED] * 3
+    assert manager.builds == 1
+    assert manager.starts == 3
+
+
+def test_clone_path_copies_files_and_directories(tmp_path):
+    source = tmp_path / "index"
+    (source / "sub").mkdir(parents=True)
+    (source / "sub" / "data").write_text("original", encoding="utf-8")
+    destination = tmp_path / "snapshot" / "index"
+    destination.mkdir(parents=True)
+    (destination / "stale").write_text("stale", encoding="utf-8")
+
+    clone_path(str(source), str(destination))
+    (destination / "sub" / "data").write_text("changed", encoding="utf-8")
+
+    assert not (destination / "stale").exists()
+    assert (source / "sub" / "data").read_text(encoding="utf-8") == "original"
+
+
+def test_clone_path_may_hard_link_immutable_files(tmp_path):
+    source = tmp_path / "index.bin"
+    source.write_bytes(b"index")
+    destination = tmp_path / "snapshot" / "index.bin"
+
+    clone_path(str(source), str(destination), hardlink=True)
+
+    assert destination.read_bytes() == b"index"
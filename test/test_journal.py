@@ -0,0 +1,87 @@
+"""Resuming interrupted runs from the test journal (--resume)."""
+
+from pathlib import Path
+
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+from sparql_conformance.journal import Journal, journal_path
+
+
+class InterruptingManager(RdflibEngineManager):
+    """Raises KeyboardInterrupt (like Ctrl-C) on the given query."""
+
+    def __init__(self, interrupt_at):
+        super().__init__()
+        self.queries = 0
+        self.interrupt_at = interrupt_at
+
+    def query(self, config, query, result_format):
+        self.queries += 1
+        if self.queries == self.interrupt_at:
+            raise KeyboardInterrupt
+        return super().query(config, query, result_format)
+
+
+def test_resume_runs_only_the_tests_missing_from_the_journal(
+        tmp_path, monkeypatch, run, statuses):
+    monkeypatch.chdir(tmp_path)
+    full_manager = InterruptingManager(interrupt_at=None)
+    expected = run(full_manager, "journal")
+    path = journal_path(str(tmp_path / "results"), "journal")
+    assert not Path(path).exists()
+
+    run(InterruptingManager(interrupt_at=3), "journal")
+    journaled = Journal(path, "mini").entries()
+    assert 0 < len(journaled) < len(statuses(expected))
+
+    resumed_manager = InterruptingManager(interrupt_at=None)
+    resumed = run(resumed_manager, "journal", resume=True)
+
+    assert statuses(resumed) == statuses(expected)
+    assert resumed["info"] == expected["info"]
+    assert resumed_manager.queries < full_manager.queries
+    assert not Path(path).exists()
+
+
+class WrongAnswerManager(InterruptingManager):
+    """Answers select-basic with another literal, so that it fails."""
+
+    def query(self, config, query, result_format):
+        status, body = super().query(config, query, result_format)
+        if "s1" in query:
+            body = body.replace(">x<", ">wrong<").replace('"x"', '"wrong"')
+        return status, body
+
+
+HTML_FIELDS = ("expectedHtml", "gotHtml", "expectedHtmlRed", "gotHtmlRed")
+
+
+def test_failing_tests_are_journaled_unrendered_and_rendered_on_resume(
+        tmp_path, monkeypatch, run):
+    monkeypatch.chdir(tmp_path)
+    expected = run(WrongAnswerManager(interrupt_at=None), "journal")
+    failed = expected["suites"]["mini"]["tests"]["select-basic"]
+    assert failed["status"] == "Failed"
+    assert failed["gotHtmlRed"]
+
+    run(WrongAnswerManager(interrupt_at=3), "journal")
+    path = journal_path(str(tmp_path / "results"), "journal")
+    journaled = Journal(path, "mini").entries()
+    (entry,) = [entry for entry in journaled.values() if entry["name"] == "select-basic"]
+    assert entry["diff"]
+    assert not any(entry[field] for field in HTML_FIELDS)
+
+    resumed = run(WrongAnswerManager(interrupt_at=None), "journal", resume=True)
+    result = resumed["suites"]["mini"]["tests"]["select-basic"]
+    assert "diff" not in result
+    assert {field: result[field] for field in HTML_FIELDS} == {
+        field: failed[field] for field in HTML_FIELDS}
+
+
+def test_journal_ignores_a_cut_off_last_line(tmp_path):
+    journal = Journal(str(tmp_path / "run.journal.jsonl"), "mini")
+    journal.append("a", {"status": "Passed"})
+    Journal(journal.path, "other").append("a", {"status": "Failed"})
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"suite": "mini", "key": "b", "res')
+
+    assert journal.entries() == {"a": {"status": "Passed"}}
@@ -0,0 +1,76 @@
+"""In-process cleanup of engine files and process-group termination."""
+
+import os
+import sys
+import time
+
+import pytest
+
+from sparql_conformance.lifecycle import remove_paths, start_process, terminate_process_group
+
+# Starts a child that ignores SIGTERM, writes its PID and waits.
+SPAWNING_SERVER = """
+import subprocess, sys, time
+child = subprocess.Popen([sys.executable, "-c",
+    "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(60)"])
+open(sys.argv[1], "w").write(str(child.pid))
+print("ready", flush=True)
+time.sleep(60)
+"""
+
+
+def test_remove_paths_expands_patterns_like_the_shell(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "run.index-log.txt").write_text("log")
+    (tmp_path / "run_index").mkdir()
+    (tmp_path / "run_index" / "data").write_text("index")
+    (tmp_path / ".run.index-snapshot").mkdir()
+    (tmp_path / "other.server-log.txt").write_text("log")
+
+    removed = remove_paths("run*", "missing.txt")
+
+    assert removed == ["run.index-log.txt", "run_index"]
+    assert sorted(os.listdir(tmp_path)) == [".run.index-snapshot", "other.server-log.txt"]
+
+
+def test_remove_paths_files_only_keeps_directories(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "run.index-log.txt").write_text("log")
+    (tmp_path / "run-workers").mkdir()
+
+    assert remove_paths("run*", files_only=True) == ["run.index-log.txt"]
+    assert os.listdir(tmp_path) == ["run-workers"]
+
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # A zombie of the test process counts as stopped.
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except OSError:
+        return True
+
+
+@pytest.mark.skipif(not hasattr(os, "killpg"), reason="needs process groups")
+def test_terminate_process_group_stops_the_children(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    log = tmp_path / "server-log.txt"
+    process = start_process(
+        [sys.executable, "-c", SPAWNING_SERVER, str(pid_file)], str(log))
+    deadline = time.monotonic() + 10
+    while "ready" not in log.read_text() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    child = int(pid_file.read_text())
+    assert os.getpgid(child) == process.pid != os.getpgid(0)
+
+    terminate_process_group(process, timeout=1)
+
+    assert process.poll() is not None
+    deadline = time.monotonic() + 5
+    while alive(child) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not alive(child)
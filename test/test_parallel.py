@@ -0,0 +1,55 @@
+"""Parallel graph-group execution (--jobs) with the rdflib reference engine."""
+
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+from sparql_conformance.parallel import run_parallel, worker_config
+
+
+class PortRecordingManager(RdflibEngineManager):
+    """Writes the port and run_id of every setup into the working directory."""
+
+    def setup(self, config, graph_paths):
+        with open("setups.txt", "a", encoding="utf-8") as f:
+            f.write(f"{config.port} {config.run_id}\n")
+        return super().setup(config, graph_paths)
+
+
+def test_worker_config_isolates_port_and_run_id(make_suite):
+    config = make_suite(RdflibEngineManager(), name="par", run_id="par").config
+    worker = worker_config(config, 3)
+    assert worker.port == "7004"
+    assert worker.run_id == "par-3"
+    assert config.port == "7001"
+    assert config.run_id == "par"
+
+
+def test_parallel_run_matches_sequential_run(tmp_path, monkeypatch, make_suite):
+    monkeypatch.chdir(tmp_path)
+    sequential = make_suite(RdflibEngineManager(), name="par", run_id="par")
+    sequential.run()
+    expected_data, expected_info = sequential.build_results_dict()
+
+    parallel = make_suite(RdflibEngineManager(), name="par", run_id="par")
+    run_parallel(parallel, 2, PortRecordingManager)
+    data, info = parallel.build_results_dict()
+
+    assert info == expected_info
+    assert list(data) == list(expected_data)
+    assert {name: entry["status"] for name, entry in data.items()} == {
+        name: entry["status"] for name, entry in expected_data.items()
+    }
+
+
+def test_parallel_workers_use_their_own_port_and_directory(
+        tmp_path, monkeypatch, make_suite):
+    monkeypatch.chdir(tmp_path)
+    suite = make_suite(RdflibEngineManager(), name="par", run_id="par")
+    run_parallel(suite, 2, PortRecordingManager)
+
+    setups = []
+    for log_file in (tmp_path / ".par-workers").glob("*/setups.txt"):
+        index = log_file.parent.name
+        for line in log_file.read_text(encoding="utf-8").splitlines():
+            assert line == f"{7001 + int(index)} par-{index}"
+            setups.append(line)
+    assert len(setups) == len(suite.sessions())
+    assert not (tmp_path / "setups.txt").exists()
@@ -0,0 +1,122 @@
+"""Building the next index during the current group (--pipeline)."""
+
+import logging
+import os
+import shutil
+
+import rdflib
+
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+from sparql_conformance.lifecycle import remove_paths
+from sparql_conformance.parallel import pipeline_cache_directory, run_pipelined, worker_directory
+
+
+class IndexedRdflibManager(RdflibEngineManager):
+    """Builds an N-Quads "index" file that start_server loads."""
+
+    def __init__(self):
+        super().__init__()
+        self.builds = 0
+
+    def _index_file(self, config):
+        return f"{config.run_id}.index.nq"
+
+    def setup(self, config, graph_paths):
+        index_success, index_log = self.build_index(config, graph_paths)
+        if not index_success:
+            return False, False, index_log, ""
+        server_success, server_log = self.start_server(config, graph_paths)
+        return True, server_success, index_log, server_log
+
+    def build_index(self, config, graph_paths):
+        self.builds += 1
+        ok, _, index_log, _ = super().setup(config, graph_paths)
+        if ok:
+            self._dataset.serialize(self._index_file(config), format="nquads")
+        self._dataset = None
+        return ok, index_log
+
+    def start_server(self, config, graph_paths):
+        self._dataset = rdflib.Dataset()
+        self._dataset.parse(self._index_file(config), format="nquads")
+        return True, ""
+
+    def index_artifacts(self, config):
+        return [self._index_file(config)]
+
+    def cleanup(self, config):
+        super().cleanup(config)
+        if os.path.exists(self._index_file(config)):
+            os.remove(self._index_file(config))
+
+
+def test_pipelined_run_only_builds_the_first_index(
+        tmp_path, monkeypatch, make_suite, statuses):
+    monkeypatch.chdir(tmp_path)
+    sequential = make_suite(IndexedRdflibManager())
+    sequential.run()
+
+    manager = IndexedRdflibManager()
+    pipelined = make_suite(manager)
+    assert len(pipelined.index_graph_sets()) > 1
+    run_pipelined(pipelined, IndexedRdflibManager)
+
+    assert manager.builds == 1
+    assert statuses(pipelined) == statuses(sequential)
+    assert pipelined.index_cache is None
+    assert not os.path.exists(pipeline_cache_directory(pipelined.config))
+
+
+def test_pipeline_does_not_build_location_dependent_indexes_ahead(
+        tmp_path, monkeypatch, caplog, mini_suite, make_suite, statuses):
+    monkeypatch.chdir(tmp_path)
+    suite_dir = tmp_path / "suite"
+    shutil.copytree(mini_suite, suite_dir)
+    with open(suite_dir / "data.ttl", "a", encoding="utf-8") as f:
+        f.write("<> ex:p ex:o .\n")
+    sequential = make_suite(IndexedRdflibManager(), suite_dir)
+    sequential.run()
+    pipelined = make_suite(IndexedRdflibManager(), suite_dir)
+
+    with caplog.at_level(logging.INFO):
+        run_pipelined(pipelined, IndexedRdflibManager)
+
+    # The update session uses the changed data.ttl; the syntax session only
+    # the empty graph, which the worker still builds ahead.
+    assert "Not building 1 of 2 indexes ahead" in caplog.text
+    assert statuses(pipelined) == statuses(sequential)
+
+
+def test_pipeline_runs_engines_without_build_index_sequentially(
+        tmp_path, monkeypatch, make_suite, statuses):
+    monkeypatch.chdir(tmp_path)
+    sequential = make_suite(RdflibEngineManager())
+    sequential.run()
+    pipelined = make_suite(RdflibEngineManager())
+    run_pipelined(pipelined, RdflibEngineManager)
+    assert statuses(pipelined) == statuses(sequential)
+
+
+class GlobCleanupManager(IndexedRdflibManager):
+    """Cleans up with the glob of the QLever manager and records what it removed."""
+
+    removed = []
+
+    def cleanup(self, config):
+        super().cleanup(config)
+        self.removed.extend(remove_paths(f"{config.run_id}*", files_only=True))
+
+
+def test_cleanup_during_a_pipeline_keeps_the_worker_directory(
+        tmp_path, monkeypatch, make_suite, statuses):
+    monkeypatch.chdir(tmp_path)
+    sequential = make_suite(IndexedRdflibManager())
+    sequential.run()
+    pipelined = make_suite(GlobCleanupManager())
+    (tmp_path / f"{pipelined.config.run_id}.server-log.txt").write_text("log")
+
+    run_pipelined(pipelined, GlobCleanupManager)
+
+    assert f"{pipelined.config.run_id}.server-log.txt" in GlobCleanupManager.removed
+    assert os.path.isdir(worker_directory(pipelined.config, 1))
+    assert statuses(pipelined) == statuses(sequential)
@@ -3,6 +3,7 @@
 from sparql_conformance.protocol_tools import (
     _ensure_connection_close,
     _set_content_length,
+    parse_raw_http_response,
     send_raw_http,
 )
 
@@ -105,3 +106,79 @@ def test_raw_http_transport_sends_connection_close(monkeypatch):
 
     assert b"Connection: close\r\n" in sock.sent
     assert response.startswith("HTTP/1.1 200 OK")
+
+
+class KeepAliveSocket:
+    """A server that sends the given chunks and keeps the connection open."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def settimeout(self, timeout):
+        pass
+
+    def sendall(self, data):
+        pass
+
+    def recv(self, size):
+        if not self.chunks:
+            raise AssertionError("read past the end of the response")
+        return self.chunks.pop(0)
+
+
+def send_to(monkeypatch, chunks, method="GET"):
+    monkeypatch.setattr(
+        "sparql_conformance.protocol_tools.socket.create_connection",
+        lambda *args, **kwargs: KeepAliveSocket(chunks),
+    )
+    return send_raw_http(
+        "localhost",
+        7001,
+        f"{method} /sparql HTTP/1.1\r\nHost: localhost\r\n\r\n",
+        "",
+        "utf-8",
+    )
+
+
+def test_response_ends_after_content_length(monkeypatch):
+    chunks = [
+        b"HTTP/1.1 200 OK\r\nContent-Length: 11\r\n",
+        b"\r\nhello ",
+        b"world",
+    ]
+
+    response = send_to(monkeypatch, chunks)
+
+    assert response == "HTTP/1.1 200 OK\r\nContent-Length: 11\r\n\r\nhello world"
+
+
+def test_response_ends_after_last_chunk_and_trailers(monkeypatch):
+    raw = (
+        b"HTTP/1.1 100 Continue\r\n\r\n"
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"5;ext=1\r\nhello\r\n6\r\n world\r\n0\r\nX-Trailer: yes\r\n\r\n"
+    )
+
+    response = send_to(monkeypatch, [raw[:60], raw[60:90], raw[90:]])
+
+    assert response == raw.decode("utf-8")
+    assert parse_raw_http_response(response.split("\r\n\r\n", 1)[1])["body"] == "hello world"
+
+
+def test_responses_without_body_end_after_the_headers(monkeypatch):
+    head = b"HTTP/1.1 200 OK\r\nContent-Length: 42\r\n\r\n"
+    assert send_to(monkeypatch, [head], method="HEAD") == head.decode("utf-8")
+    no_content = b"HTTP/1.1 204 No Content\r\n\r\n"
+    assert send_to(monkeypatch, [no_content]) == no_content.decode("utf-8")
+
+
+def test_response_without_framing_is_read_until_close(monkeypatch):
+    chunks = [b"HTTP/1.0 200 OK\r\n\r\nsome ", b"data", b""]
+
+    assert send_to(monkeypatch, chunks) == "HTTP/1.0 200 OK\r\n\r\nsome data"
@@ -56,3 +56,39 @@ def test_known_prefixes_are_recovered():
     b = ("_:x <http://xmlns.com/foaf/0.1/name> \"Alice\" .\n")
     status, *_ = compare_ttl(a, b)
     assert status == Status.PASSED
+
+
+def cycle(labels):
+    return "".join(
+        f"_:{a} <http://e.org/next> _:{b} .\n"
+        for a, b in zip(labels, labels[1:] + labels[:1]))
+
+
+def test_blank_node_structure_must_match():
+    # Same number of triples and the same neighbourhood for every blank node,
+    # but one cycle of six is not two cycles of three.
+    a = cycle(["a", "b", "c", "d", "e", "f"])
+    b = cycle(["x", "y", "z"]) + cycle(["u", "v", "w"])
+    assert compare_ttl(a, b)[0] == Status.FAILED
+    assert compare_ttl(a, cycle(["f", "e", "d", "c", "b", "a"]))[0] == Status.PASSED
+
+
+def test_ground_triples_and_many_blank_nodes():
+    a = "".join(
+        f'_:b{i} <http://e.org/p> "{i}" .\n<http://e.org/s> <http://e.org/p> "{i}" .\n'
+        for i in range(500))
+    b = "".join(
+        f'_:x{i} <http://e.org/p> "{i}" .\n<http://e.org/s> <http://e.org/p> "{i}" .\n'
+        for i in reversed(range(500)))
+    assert compare_ttl(a, b)[0] == Status.PASSED
+    assert compare_ttl(a, b.replace('"7"', '"seven"', 1))[0] == Status.FAILED
+
+
+def test_comparison_budget_exceeded_is_not_tested():
+    labels = [f"n{i}" for i in range(200)]
+    a = cycle(labels)
+    b = cycle(labels[:100]) + cycle(labels[100:])
+    status, error, *_, expected_red, actual_red = compare_ttl(a, b, budget=0.01)
+    assert status == Status.NOT_TESTED
+    assert error == ErrorMessage.COMPARISON_BUDGET_EXCEEDED
+    assert "0.01 seconds" in actual_red
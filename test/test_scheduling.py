@@ -0,0 +1,66 @@
+"""Recorded group durations and longest-first scheduling."""
+
+import time
+
+import pytest
+
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+from sparql_conformance.scheduling import PhaseTimer, estimate_seconds
+
+
+def test_result_file_records_the_duration_of_every_session(
+        tmp_path, monkeypatch, run, make_suite):
+    monkeypatch.chdir(tmp_path)
+    output = run(RdflibEngineManager(), "timed")
+
+    groups = output["suites"]["mini"]["groups"]
+    suite = make_suite(RdflibEngineManager())
+    assert set(groups) == {
+        suite.session_identity(graph_key, parts)
+        for graph_key, parts in suite.sessions()
+    }
+    for durations in groups.values():
+        assert set(durations) == {"setup", "tests", "cleanup", "testCount"}
+        assert all(durations[phase] >= 0 for phase in ("setup", "tests", "cleanup"))
+    assert sum(d["testCount"] for d in groups.values()) == sum(
+        len(tests) for _, parts in suite.sessions() for _, tests in parts)
+
+
+def test_recorded_durations_put_the_longest_session_first(make_suite):
+    suite = make_suite(RdflibEngineManager())
+    sessions = suite.sessions()
+    last_key, last_parts = sessions[-1]
+    history = {
+        suite.session_identity(graph_key, parts): {"tests": 1.0}
+        for graph_key, parts in sessions
+    }
+    history[suite.session_identity(last_key, last_parts)] = {
+        "setup": 50.0, "tests": 10.0, "cleanup": 1.0}
+    suite.schedule(history)
+    scheduled = suite.scheduled_sessions()
+    assert scheduled[0][0] == last_key
+    assert sorted(map(repr, scheduled)) == sorted(map(repr, sessions))
+
+
+def test_sessions_without_history_are_scaled_to_the_recorded_ones(tmp_path):
+    small = tmp_path / "small.ttl"
+    small.write_text("<http://a> <http://b> <http://c> .\n", encoding="utf-8")
+    sessions = [
+        ("a", ((str(small), "-"),), 10),
+        ("b", ((str(small), "-"),), 10),
+        ("c", ((str(small), "-"),), 40),
+    ]
+    estimates = estimate_seconds(sessions, {"a": {"tests": 100.0}})
+    assert estimates[0] == 100.0
+    assert estimates[1] == pytest.approx(100.0)
+    assert estimates[2] > estimates[1]
+
+
+def test_nested_phases_are_not_counted_twice():
+    timer = PhaseTimer()
+    with timer.phase("tests"):
+        with timer.phase("setup"):
+            time.sleep(0.05)
+    durations = timer.durations()
+    assert durations["setup"] >= 0.05
+    assert durations["tests"] < 0.05
@@ -0,0 +1,61 @@
+"""Read-only categories sharing a graph key run in one engine session."""
+
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+
+
+class EventRecordingManager(RdflibEngineManager):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def setup(self, config, graph_paths):
+        self.events.append("setup")
+        return super().setup(config, graph_paths)
+
+    def query(self, config, query, result_format):
+        self.events.append("query")
+        return super().query(config, query, result_format)
+
+    def activate_syntax_test_mode(self, config):
+        self.events.append("syntax-mode")
+
+
+def share_syntax_key(suite):
+    """Move the syntax tests onto the graph of the query tests."""
+    (query_key,) = suite.tests["query"]
+    syntax_tests = [t for group in suite.tests["syntax"].values() for t in group]
+    suite.tests["syntax"] = {query_key: syntax_tests}
+    return suite
+
+
+def test_shared_graph_key_is_set_up_once(tmp_path, monkeypatch, make_suite, statuses):
+    monkeypatch.chdir(tmp_path)
+    separate_manager = EventRecordingManager()
+    separate = make_suite(separate_manager)
+    separate.run()
+
+    manager = EventRecordingManager()
+    suite = share_syntax_key(make_suite(manager))
+    (query_key,) = suite.tests["query"]
+    assert [
+        [category for category, _ in parts]
+        for key, parts in suite.sessions() if key == query_key
+    ] == [["query", "syntax"], ["update"]]
+
+    suite.run()
+
+    assert manager.events.count("setup") == separate_manager.events.count("setup") - 1
+    assert statuses(suite) == statuses(separate)
+
+
+def test_syntax_mode_is_activated_after_the_query_tests(tmp_path, monkeypatch, make_suite):
+    monkeypatch.chdir(tmp_path)
+    manager = EventRecordingManager()
+    suite = share_syntax_key(make_suite(manager))
+    suite.run()
+
+    session = manager.events[:manager.events.index("setup", 1)]
+    query_count = sum(len(tests) for tests in suite.tests["query"].values())
+    assert session[:1 + query_count] == ["setup"] + ["query"] * query_count
+    assert session[1 + query_count] == "syntax-mode"
+    assert session.count("syntax-mode") == 1
@@ -0,0 +1,61 @@
+"""Test --shard and merging the shard results with the rdflib reference engine."""
+
+import argparse
+
+import pytest
+
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+from sparql_conformance.runner import merge_runs
+from sparql_conformance.sharding import assign_shards, parse_shard
+
+
+def test_merged_shards_equal_an_unsharded_run(tmp_path, monkeypatch, run, statuses):
+    monkeypatch.chdir(tmp_path)
+    full = run(RdflibEngineManager(), "full")
+    first = run(RdflibEngineManager(), "part-1", shard=(1, 2))
+    second = run(RdflibEngineManager(), "part-2", shard=(2, 2))
+
+    assert first["shard"] == {"index": 1, "count": 2}
+    assert statuses(first) and statuses(second)
+    assert not set(statuses(first)) & set(statuses(second))
+
+    merged = merge_runs(
+        [str(tmp_path / "results" / f"part-{i}.json.bz2") for i in (2, 1)],
+        "merged",
+        str(tmp_path / "results"),
+    )
+    assert (tmp_path / "results" / "merged.json.bz2").is_file()
+    assert "shard" not in merged
+    assert statuses(merged) == statuses(full)
+    assert merged["suites"]["mini"]["info"] == full["suites"]["mini"]["info"]
+    assert merged["info"] == full["info"]
+
+
+def test_merge_rejects_incomplete_shards(tmp_path, monkeypatch, run):
+    monkeypatch.chdir(tmp_path)
+    run(RdflibEngineManager(), "part-1", shard=(1, 3))
+    run(RdflibEngineManager(), "part-2", shard=(2, 3))
+    with pytest.raises(ValueError, match="missing \\[3\\]"):
+        merge_runs(
+            [str(tmp_path / "results" / f"part-{i}.json.bz2") for i in (1, 2)],
+            "merged",
+            str(tmp_path / "results"),
+        )
+
+
+def test_assignment_is_deterministic_and_balanced():
+    sessions = [("a", 5), ("b", 3), ("c", 3), ("d", 2), ("e", 1)]
+    shards = assign_shards(sessions, 2)
+    assert shards == assign_shards(list(reversed(sessions)), 2)[::-1]
+    loads = [
+        sum(weight for (_, weight), shard in zip(sessions, shards) if shard == i)
+        for i in (1, 2)
+    ]
+    assert sorted(loads) == [7, 7]
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    for value in ("0/4", "5/4", "2", "a/b"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(value)
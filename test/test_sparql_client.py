@@ -0,0 +1,105 @@
+"""The pooled SPARQL protocol client of the engine managers."""
+
+import gzip
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from sparql_conformance.sparql_client import SparqlClient, client_for
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.server.requests.append({
+            "method": self.command,
+            "path": self.path,
+            "headers": dict(self.headers),
+            "body": self.rfile.read(length),
+            "client": self.client_address,
+        })
+        body = "ä,ö\n".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = _respond
+    do_PUT = _respond
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_queries_and_updates_share_one_connection(server):
+    client = SparqlClient(f"127.0.0.1:{server.server_port}", access_token="abc")
+    assert client.query("SELECT * {}", "text/csv", "sparql") == (200, "ä,ö\n")
+    assert client.update("CLEAR ALL", "/update") == (200, "ä,ö\n")
+    client.close()
+
+    query, update = server.requests
+    assert query["path"] == "/sparql"
+    assert parse_qs(query["body"].decode()) == {"query": ["SELECT * {}"]}
+    assert query["headers"]["Accept"] == "text/csv"
+    assert "gzip" in query["headers"]["Accept-Encoding"]
+    assert "Authorization" not in query["headers"]
+    assert parse_qs(update["body"].decode()) == {"update": ["CLEAR ALL"]}
+    assert update["headers"]["Authorization"] == "Bearer abc"
+    # Kept alive: both requests came from the same client socket.
+    assert query["client"] == update["client"]
+
+
+def test_graphs_are_streamed_from_files(server, tmp_path):
+    data = tmp_path / "data.ttl"
+    data.write_text("<s> <p> <o> .\n", encoding="utf-8")
+    client = SparqlClient(f"http://127.0.0.1:{server.server_port}/")
+    status, _ = client.send_graph(
+        "PUT", "ds/data", data, "text/turtle", {"graph": "http://ex.org/g 1"})
+    assert status == 200
+    status, _ = client.send_graph(
+        "PUT", "ds/data", "<a> <b> <c> .", "text/turtle", {"default": None})
+    assert status == 200
+
+    named, default = server.requests
+    assert named["method"] == "PUT"
+    assert named["path"] == "/ds/data?graph=http%3A%2F%2Fex.org%2Fg%201"
+    assert named["body"] == b"<s> <p> <o> .\n"
+    assert named["headers"]["Content-Type"] == "text/turtle"
+    assert default["path"] == "/ds/data?default"
+    assert default["body"] == b"<a> <b> <c> ."
+
+
+def test_unreachable_engine_returns_status_1():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    status, message = SparqlClient(f"127.0.0.1:{port}").query("ASK {}", "text/csv")
+    assert status == 1
+    assert message
+
+
+def test_clients_are_shared_per_engine_and_credentials():
+    client = client_for("localhost:7001", "abc")
+    assert client_for("localhost:7001", "abc") is client
+    assert client_for("localhost:7001") is not client
+    assert client_for("localhost:7002", "abc") is not client
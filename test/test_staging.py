@@ -0,0 +1,89 @@
+"""The content-addressed store of staged graph files."""
+
+import os
+
+import pytest
+
+from sparql_conformance import expectations, rdf_tools
+from sparql_conformance.rdf_tools import (
+    replace_empty_base_iri, rdf_xml_to_turtle, stage_rdf_xml_as_turtle, write_ttl_file)
+from sparql_conformance.staging import stage_file, staging_directory
+from sparql_conformance.util import copy_graph_to_workdir
+
+RDF_XML = """<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:ex="http://example.org/">
+  <rdf:Description rdf:about="x"><ex:p>v</ex:p></rdf:Description>
+</rdf:RDF>
+"""
+
+
+@pytest.fixture()
+def cache_dir(tmp_path):
+    directory = str(tmp_path / "cache")
+    expectations.use_directory(directory)
+    yield directory
+    expectations.use_directory(None)
+
+
+def test_files_are_built_once_and_shared(cache_dir, tmp_path):
+    builds = []
+
+    def build(content):
+        builds.append(content)
+        return content.upper()
+
+    first, second = tmp_path / "first.ttl", tmp_path / "second.ttl"
+    stage_file(str(first), "upper", b"data", ("x",), build)
+    stage_file(str(second), "upper", b"data", ("x",), build)
+
+    assert builds == [b"data"]
+    assert first.read_bytes() == second.read_bytes() == b"DATA"
+    assert staging_directory() == os.path.join(cache_dir, "staged")
+    # Staged files are read-only, and writing a file there replaces it.
+    assert not first.stat().st_mode & 0o222
+    write_ttl_file(str(first), "new")
+    assert first.read_text() == "new"
+    assert second.read_bytes() == b"DATA"
+
+
+def test_staged_transformations(cache_dir, tmp_path):
+    source_dir = tmp_path / "suite"
+    source_dir.mkdir()
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    (source_dir / "data.ttl").write_text("<> <p> <o> .\n", encoding="utf-8")
+    (source_dir / "data.rdf").write_text(RDF_XML, encoding="utf-8")
+
+    name, path = replace_empty_base_iri(
+        source_dir / "data.ttl", workdir, "http://base/", "engine")
+    assert name == "_engine_data.ttl"
+    assert path.read_text(encoding="utf-8") == "<http://base/> <p> <o> .\n"
+    path.unlink()
+    assert replace_empty_base_iri(
+        source_dir / "data.ttl", workdir, "http://base/", "engine")[1].exists()
+
+    assert copy_graph_to_workdir(str(source_dir / "data.rdf"), str(workdir)) == "data.rdf"
+    assert (workdir / "data.rdf").read_text(encoding="utf-8") == RDF_XML
+
+    turtle = rdf_xml_to_turtle(str(source_dir / "data.rdf"), "http://g/")
+    assert "<http://g/x>" in turtle
+    # Another public id is another conversion.
+    assert "<http://h/x>" in rdf_xml_to_turtle(str(source_dir / "data.rdf"), "http://h/")
+
+
+def test_converted_rdf_xml_files_are_staged(cache_dir, tmp_path, monkeypatch):
+    source = tmp_path / "data.rdf"
+    source.write_text(RDF_XML, encoding="utf-8")
+    conversions = []
+    convert = rdf_tools._turtle_from_rdf_xml
+    monkeypatch.setattr(rdf_tools, "_turtle_from_rdf_xml", lambda content, base: (
+        conversions.append(base) or convert(content, base)))
+
+    first, second = tmp_path / "first.ttl", tmp_path / "second.ttl"
+    stage_rdf_xml_as_turtle(str(source), "http://g/", first)
+    stage_rdf_xml_as_turtle(str(source), "http://g/", second)
+
+    assert conversions == ["http://g/"]
+    assert first.read_text(encoding="utf-8") == second.read_text(encoding="utf-8")
+    assert "<http://g/x>" in first.read_text(encoding="utf-8")
@@ -0,0 +1,179 @@
+"""Test request deadlines (--timeout) with the rdflib reference engine."""
+
+import argparse
+import threading
+import time
+
+import pytest
+
+from sparql_conformance.engines.rdflib_manager import RdflibEngineManager
+from sparql_conformance.test_object import TestObject
+from sparql_conformance.testsuite import TestSuite
+from sparql_conformance.timeouts import TimeoutPolicy, parse_timeout_policy
+
+
+class HangingManager(RdflibEngineManager):
+    """
+    Never answers queries containing `hang_on` until the engine is stopped;
+    with hang_setup the first setup and with hang_reset every reset hangs too.
+    """
+
+    def __init__(self, hang_on=None, hang_setup=False, hang_reset=False):
+        super().__init__()
+        self.hang_on = hang_on
+        self.hang_setup = hang_setup
+        self.hang_reset = hang_reset
+        self.setups = 0
+        self._stopped = threading.Event()
+
+    def setup(self, config, graph_paths):
+        self.setups += 1
+        self._stopped.clear()
+        if self.hang_setup and self.setups == 1:
+            self._stopped.wait()
+            return False, False, "", ""
+        return super().setup(config, graph_paths)
+
+    def reset_graphs(self, config, graph_paths):
+        if self.hang_reset:
+            self._stopped.wait()
+            return False
+        return super().reset_graphs(config, graph_paths)
+
+    def cleanup(self, config):
+        self._stopped.set()
+        super().cleanup(config)
+
+    def query(self, config, query, result_format):
+        if self.hang_on and self.hang_on in query:
+            self._stopped.wait()
+            return 500, "Server stopped"
+        return super().query(config, query, result_format)
+
+
+def test_hung_query_times_out_and_the_group_continues(
+        tmp_path, monkeypatch, mini_suite, run):
+    monkeypatch.chdir(tmp_path)
+    baseline_manager = HangingManager()
+    baseline = run(baseline_manager, "baseline")
+    query = (mini_suite / "select-int.rq").read_text(encoding="utf-8")
+    manager = HangingManager(hang_on=query.strip())
+    output = run(manager, "timeout",
+                 timeout_policy=TimeoutPolicy(tests={"select-int": 0.2}))
+
+    tests = output["suites"]["mini"]["tests"]
+    assert tests["select-int"]["status"] == "Failed"
+    assert tests["select-int"]["errorType"] == "Timeout"
+    for name, entry in baseline["suites"]["mini"]["tests"].items():
+        if name != "select-int":
+            assert tests[name]["status"] == entry["status"], name
+    # The engine was restarted once for the rest of the query group.
+    assert manager.setups == baseline_manager.setups + 1
+
+
+def test_hung_setup_fails_its_group_and_the_run_continues(tmp_path, monkeypatch, run):
+    monkeypatch.chdir(tmp_path)
+    baseline = run(HangingManager(), "baseline")
+    manager = HangingManager(hang_setup=True)
+    output = run(manager, "timeout",
+                 timeout_policy=TimeoutPolicy(categories={"setup": 0.2}))
+
+    tests = output["suites"]["mini"]["tests"]
+    timed_out = {name for name, entry in tests.items() if entry["errorType"] == "Timeout"}
+    assert timed_out
+    assert all(tests[name]["status"] == "Failed" for name in timed_out)
+    for name, entry in baseline["suites"]["mini"]["tests"].items():
+        if name not in timed_out:
+            assert tests[name]["status"] == entry["status"], name
+
+
+def test_hung_reset_restarts_the_engine(tmp_path, make_config):
+    data = tmp_path / "data.ttl"
+    data.write_text("<http://ex/a> <http://ex/p> 1 .\n", encoding="utf-8")
+    graph_paths = ((str(data), "-"),)
+    test = TestObject.__new__(TestObject)
+    test.name, test.group, test.type_name = "t1", "grp", "UpdateEvaluationTest"
+    manager = HangingManager(hang_reset=True)
+    suite = TestSuite(
+        name="reset",
+        tests={},
+        test_count=0,
+        config=make_config(tmp_path),
+        engine_manager=manager,
+        timeout_policy=TimeoutPolicy(tests={"grp": 0.2}),
+    )
+    assert suite.prepare_test_environment(graph_paths, [test])
+    assert suite.capture_initial_state(graph_paths, [test])
+
+    assert suite.reset_test_environment(graph_paths)
+    assert manager.setups == 2
+
+
+class LateStartingManager(HangingManager):
+    """Its hung first setup starts a "server" once the engine was stopped."""
+
+    def __init__(self):
+        super().__init__(hang_setup=True)
+        self.events = []
+
+    def setup(self, config, graph_paths):
+        self.events.append("setup")
+        result = super().setup(config, graph_paths)
+        if self.setups == 1:
+            time.sleep(0.1)
+            self.events.append("late server")
+        return result
+
+    def cleanup(self, config):
+        self.events.append("cleanup")
+        super().cleanup(config)
+
+
+def test_timed_out_setup_is_stopped_before_the_next_setup(tmp_path, make_config):
+    data = tmp_path / "data.ttl"
+    data.write_text("<http://ex/a> <http://ex/p> 1 .\n", encoding="utf-8")
+    graph_paths = ((str(data), "-"),)
+    test = TestObject.__new__(TestObject)
+    test.name, test.group, test.type_name = "t1", "grp", "QueryEvaluationTest"
+    test.index_log = test.server_log = ""
+    manager = LateStartingManager()
+    suite = TestSuite(
+        name="late",
+        tests={},
+        test_count=0,
+        config=make_config(tmp_path),
+        engine_manager=manager,
+        timeout_policy=TimeoutPolicy(tests={"grp": 0.2}),
+    )
+    assert not suite.prepare_test_environment(graph_paths, [test])
+    assert suite.prepare_test_environment(graph_paths, [test])
+
+    late = manager.events.index("late server")
+    assert "cleanup" in manager.events[late:manager.events.index("setup", late)]
+
+
+def test_policy_prefers_test_then_group_then_category():
+    policy = TimeoutPolicy(
+        default=10, categories={"update": 20}, tests={"grp": 30, "t1": 40})
+    test = TestObject.__new__(TestObject)
+    test.name, test.group = "t1", "grp"
+    assert policy.seconds("update", test) == 40
+    test.name = "t2"
+    assert policy.seconds("update", test) == 30
+    test.group = "other"
+    assert policy.seconds("update", test) == 20
+    assert policy.seconds("query", test) == 10
+    assert TimeoutPolicy().seconds("query", test) is None
+    assert policy.setup_seconds([test]) == 10
+    assert TimeoutPolicy(categories={"setup": 50}).setup_seconds([test]) == 50
+    test.group = "grp"
+    assert policy.setup_seconds([test]) == 30
+
+
+def test_parse_timeout_policy():
+    assert parse_timeout_policy("30").default == 30
+    policy = parse_timeout_policy('{"categories": {"syntax": 5}}')
+    assert policy.default is None and policy.categories == {"syntax": 5}
+    for value in ("0", "-1", "abc", '{"deadline": 5}', '{"tests": {"a": "x"}}'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_timeout_policy(value)
@@ -46,3 +46,52 @@ def test_missing_row_fails():
     b = "s\nx\n"
     status, *_ = compare_sv(a, b, "csv", [])
     assert status == Status.FAILED
+
+
+def test_numeric_variants_and_value_aliases():
+    a = "s,p\n1,int\n"
+    assert compare_sv(a, "s,p\n1.0,int\n", "csv", [])[0] == Status.PASSED
+    status, error, *_ = compare_sv(
+        a, "s,p\n1,integer\n", "csv", [("int", "integer")])
+    assert status == Status.INTENDED
+    assert error == ErrorMessage.INTENDED_MSG
+
+
+def test_duplicate_rows_are_counted():
+    a = "s\nx\n"
+    b = "s\nx\nx\n"
+    status, _, _, _, expected_red, actual_red = compare_sv(a, b, "csv", [])
+    assert status == Status.FAILED
+    assert expected_red == ""
+    assert actual_red == '<label class="red">x</label>\n'
+
+
+def test_blank_nodes_are_mapped_consistently():
+    a = "s,o\n_:b1,1\n_:b2,int\n_:b1,_:b2\n"
+    b = "s,o\n_:x,_:y\n_:y,int\n_:x,1\n"
+    assert compare_sv(a, b, "csv", [])[0] == Status.PASSED
+    c = "s,o\n_:x,_:x\n_:y,int\n_:x,1\n"
+    assert compare_sv(a, c, "csv", [])[0] == Status.FAILED
+
+
+def test_blank_node_rows_are_matched_by_one_mapping():
+    # Pairing (_:x, _:x) with the first row of the same shape, (_:a, _:b),
+    # fails and must not leave a mapping behind.
+    a = "s,o\n_:a,_:b\n_:c,_:c\n"
+    b = "s,o\n_:x,_:x\n_:y,_:z\n"
+    assert compare_sv(a, b, "csv", [])[0] == Status.PASSED
+    assert compare_sv("s,o\n_:a,_:b\n", "s,o\n_:a,_:a\n", "csv", [])[0] == Status.FAILED
+
+
+def test_large_results_only_highlight_the_differing_rows():
+    expected = "s,o\n" + "".join(f"{i},http://e.org/{i}\n" for i in range(5000))
+    rows = [f"http://e.org/{i},{i}\n" for i in reversed(range(5000))]
+    assert compare_sv(expected, "o,s\n" + "".join(rows), "csv", [])[0] == Status.PASSED
+
+    rows[0] = "http://e.org/x,x\n"
+    status, _, _, actual_html, expected_red, actual_red = compare_sv(
+        expected, "o,s\n" + "".join(rows), "csv", [])
+    assert status == Status.FAILED
+    assert expected_red == '<label class="red">4999,http://e.org/4999</label>\n'
+    assert actual_red == '<label class="red">x,http://e.org/x</label>\n'
+    assert actual_html.count("<label") == 1
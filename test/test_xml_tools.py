@@ -135,3 +135,50 @@ def test_empty_results_pass():
     a = srx([], variables=())
     status, *_ = compare_xml(a, a, [], NUMBER_TYPES)
     assert status == Status.PASSED
+
+
+def test_language_tags_ignore_case_and_plain_literals_equal_xsd_string():
+    a = srx([{"s": '<literal xml:lang="en-US">x</literal>'}, {"s": lit("y")}])
+    b = srx([{"s": '<literal xml:lang="en-us">x</literal>'},
+             {"s": lit("y", XSD + "string")}])
+    status, *_ = compare_xml(a, b, [], NUMBER_TYPES)
+    assert status == Status.PASSED
+
+
+def test_blank_node_mapping_must_be_consistent():
+    a = srx([{"s": bnode("b1"), "o": bnode("b1")}], variables=("s", "o"))
+    b = srx([{"s": bnode("x"), "o": bnode("y")}], variables=("s", "o"))
+    status, *_ = compare_xml(a, b, [], NUMBER_TYPES)
+    assert status == Status.FAILED
+
+
+def test_blank_node_rows_are_matched_by_one_mapping():
+    # Pairing (a, b) with the first row of the same shape, (x, x), would
+    # leave (c, c) without a partner.
+    a = srx([{"s": bnode("a"), "o": bnode("b")},
+             {"s": bnode("c"), "o": bnode("c")}], variables=("s", "o"))
+    b = srx([{"s": bnode("x"), "o": bnode("x")},
+             {"s": bnode("y"), "o": bnode("z")}], variables=("s", "o"))
+    status, *_ = compare_xml(a, b, [], NUMBER_TYPES)
+    assert status == Status.PASSED
+
+
+def test_equal_blank_node_labels_still_need_a_consistent_mapping():
+    a = srx([{"s": bnode("a"), "o": bnode("b")}], variables=("s", "o"))
+    b = srx([{"s": bnode("a"), "o": bnode("a")}], variables=("s", "o"))
+    status, *_ = compare_xml(a, b, [], NUMBER_TYPES)
+    assert status == Status.FAILED
+
+
+def test_large_results_only_highlight_the_differing_rows():
+    rows = [{"s": lit(str(i), XSD + "integer")} for i in range(3000)]
+    rows += [{"s": bnode(f"b{i}")} for i in range(3)]
+    actual = rows[::-1]
+    assert compare_xml(srx(rows), srx(actual), [], NUMBER_TYPES)[0] == Status.PASSED
+
+    actual[0] = {"s": lit("3000", XSD + "integer")}
+    status, _, _, _, expected_red, actual_red = compare_xml(
+        srx(rows), srx(actual), [], NUMBER_TYPES)
+    assert status == Status.FAILED
+    assert "&gt;3000&lt;" in actual_red and "&gt;2999&lt;" not in actual_red
+    assert "bnode" in expected_red and "&gt;0&lt;" not in expected_red